@@ -1,25 +1,42 @@
 # app.py
+#
+# Importing this module is cheap: blueprints, models and Flask-Migrate are
+# imported inside create_app(), and the WSGI `app` object is only built
+# when something asks for it (see __getattr__ below).
 from flask import Flask, render_template, send_from_directory
 from config import Config
 from extensions import db, login_manager, csrf
 import os
 import logging
-from logging.handlers import RotatingFileHandler
 
-# Try to import Flask-Migrate (optional)
-try:
-    from flask_migrate import Migrate
-    migrate = Migrate()
-except ImportError:
-    migrate = None
 
+def create_app(test_config=None, lightweight=None):
+    """
+    Build the application
 
-def create_app():
+    Args:
+        test_config (dict): Config overrides (e.g. an in-memory database)
+        lightweight (bool): Skip the log file, upload folder creation and
+            schema check, for tests and one-off CLI commands
+            (`flask --app "app:create_app(lightweight=True)" ...`).
+            Defaults to on when TESTING is set.
+    """
     app = Flask(__name__)
     app.config.from_object(Config)
 
+    # Overrides used by the test suite (e.g. an in-memory database)
+    if test_config:
+        app.config.update(test_config)
+    if lightweight is None:
+        lightweight = app.testing
+
+    # Load compiled templates from the shared bytecode cache
+    from utils.templates import init_template_cache
+    init_template_cache(app, lightweight)
+
     # Configure logging
-    if not app.debug:
+    if not app.debug and not lightweight:
+        from logging.handlers import RotatingFileHandler
         if not os.path.exists('logs'):
             os.mkdir('logs')
         file_handler = RotatingFileHandler(
@@ -45,22 +62,33 @@ def create_app():
         os.path.join(app.config.get("UPLOAD_FOLDER",
                      "static/uploads"), "avatars"),
         app.config.get("UPLOAD_FOLDER", "static/uploads/assignments"),
-        app.config.get("SUBMISSION_FOLDER", "static/uploads/submissions")
+        app.config.get("SUBMISSION_FOLDER", "uploads/submissions")
     ]
 
-    for folder in upload_folders:
-        os.makedirs(folder, exist_ok=True)
+    if not lightweight:
+        for folder in upload_folders:
+            os.makedirs(folder, exist_ok=True)
 
     # Initialize extensions
+    from utils.replica import init_replica
+    from utils.sqlite_tuning import configure_engine_options, init_sqlite_tuning
+    configure_engine_options(app)
     db.init_app(app)
+    init_sqlite_tuning(app)
+    init_replica(app)
     login_manager.init_app(app)
     login_manager.login_view = 'auth_bp.login'
     login_manager.session_protection = 'strong'
     csrf.init_app(app)  # Initialize CSRF protection
 
     # Initialize Flask-Migrate if available
-    if migrate:
-        migrate.init_app(app, db)
+    try:
+        from flask_migrate import Migrate
+    except ImportError:
+        pass
+    else:
+        # Batch mode lets migrations alter columns on SQLite
+        Migrate(app, db, render_as_batch=True)
 
     # Make CSRF token function available in templates
     @app.context_processor
@@ -76,51 +104,26 @@ def create_app():
     # 2. X-CSRFToken header (for AJAX/JSON requests)
 
     # Import models so SQLAlchemy recognizes them
-    with app.app_context():
-        import models.models  # registers User, Teacher, Student, Assignment, Class, Submission
-
-        # Check if database exists and if schema is outdated
-        db_file = app.config['SQLALCHEMY_DATABASE_URI'].replace(
-            'sqlite:///', '')
-        db_exists = os.path.exists(db_file)
-
-        # Drop and recreate all tables if RECREATE_DB environment variable is set
-        if os.environ.get('RECREATE_DB', '').lower() == 'true':
-            print("WARNING: RECREATE_DB is set to True - dropping all tables...")
-            db.drop_all()
-            print("SUCCESS: All tables dropped")
-        elif db_exists:
-            # Check if schema is outdated by testing queries on multiple models
-            schema_outdated = False
-            try:
-                from models.user import User
-                from models.class_model import Class
-                # Try to query both User and Class - if either fails, schema is outdated
-                test_user = User.query.first()
-                test_class = Class.query.first()
-            except Exception as e:
-                error_str = str(e).lower()
-                if 'no such column' in error_str or 'no such table' in error_str:
-                    print(
-                        "WARNING: Detected outdated database schema. Recreating tables...")
-                    print(f"   Error: {str(e)[:150]}")
-                    schema_outdated = True
-                else:
-                    raise
-
-            if schema_outdated:
-                db.drop_all()
-                print("SUCCESS: Old tables dropped")
-
-        db.create_all()
-        print("SUCCESS: Database tables created/verified")
+    import models.models  # registers User, Teacher, Student, Assignment, Class, Submission, AssignmentAttachment
+
+    # The schema is managed by migrations (`flask db upgrade`, run once per
+    # deploy); workers only compare the database's revision with ours, once
+    if not lightweight:
+        from utils.schema import check_schema
+        check_schema(app)
 
     # Define user loader AFTER models are imported
-    from models.user import User
+    from utils.identity import init_user_cache, load_user_identity
+    from utils.stats import init_admin_stats_cache
+    from utils.teacher_stats import init_teacher_stats_cache
+    init_user_cache(app)
+    init_teacher_stats_cache(app)
+    init_admin_stats_cache(app)
 
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        # Cached user snapshot, or one query for the user and role profile
+        return load_user_identity(user_id)
 
     # Register blueprints
     from routes.auth import auth_bp
@@ -133,6 +136,22 @@ def create_app():
     app.register_blueprint(student_bp)
     app.register_blueprint(admin_bp)
 
+    # Optional SQL timing per request (Server-Timing header, slow-request
+    # log) and query limit (tests). Registered before the other
+    # after_request hooks so they run last and see all of their queries.
+    from utils.sql_metrics import init_sql_metrics
+    init_sql_metrics(app)
+    from utils.query_budget import init_query_budget
+    init_query_budget(app)
+
+    # Write each request's buffered activity log events in one batch
+    from utils.activity import init_activity_log
+    init_activity_log(app)
+
+    # Register CLI maintenance commands
+    from commands import register_commands
+    register_commands(app)
+
     # Home route — redirects or shows welcome page
     @app.route('/')
     def home():
@@ -173,9 +192,18 @@ def create_app():
     return app
 
 
-app = create_app()
+def __getattr__(name):
+    # The module-level `app` (gunicorn "app:app", `flask --app app`) is built
+    # on first access, so importing create_app does not build an app too
+    if name == 'app':
+        globals()['app'] = create_app()
+        return globals()['app']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == '__main__':
+    app = create_app()
+
     # Only run in debug mode if explicitly set via environment variable
     debug_mode = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
 
@@ -0,0 +1,139 @@
+"""
+Flask CLI maintenance commands
+"""
+import os
+import click
+
+
+def register_commands(app):
+    """Attach the project's maintenance commands to the Flask CLI"""
+
+    @app.cli.command('repair-counters')
+    def repair_counters():
+        """Recompute assignment submission counters from submissions."""
+        from utils.stats import rebuild_assignment_counters
+
+        fixed = rebuild_assignment_counters()
+        click.echo(f"Repaired submission counters on {fixed} assignment(s)")
+
+    @app.cli.command('rebuild-grade-summaries')
+    def rebuild_grade_summaries():
+        """Recompute every student's grade summaries from submissions."""
+        from utils.grade_summary import rebuild_grade_summaries as rebuild
+
+        written = rebuild()
+        click.echo(f"Rebuilt {written} grade summary row(s)")
+
+    @app.cli.command('backfill-activity')
+    def backfill_activity():
+        """Seed an empty activity log from existing users, assignments and grades."""
+        from utils.activity import backfill_activity as backfill
+
+        written = backfill()
+        click.echo(f"Wrote {written} activity event(s)" if written
+                   else "Activity log already has entries; nothing to do")
+
+    @app.cli.command('reconcile-attachments')
+    def reconcile_attachments():
+        """Rebuild the assignment attachment manifest from the upload folder."""
+        from utils.attachments import reconcile_attachments as reconcile
+
+        result = reconcile()
+        click.echo(
+            f"Attachments: {result['added']} added, {result['updated']} updated, "
+            f"{result['removed']} removed")
+
+    @app.cli.command('prune-uploads')
+    @click.option('--hours', default=24, show_default=True,
+                  help='Remove uploads idle for longer than this.')
+    def prune_uploads(hours):
+        """Delete abandoned resumable uploads and their partial files."""
+        from utils.submissions import prune_uploads as prune
+
+        removed = prune(hours)
+        click.echo(f"Removed {removed} abandoned upload(s)")
+
+    @app.cli.command('gc-blobs')
+    @click.option('--full', is_flag=True,
+                  help='Recount every reference and remove stray files too.')
+    def gc_blobs(full):
+        """Delete uploaded file blobs that nothing references."""
+        from utils.blobstore import collect_garbage
+
+        result = collect_garbage(full=full)
+        click.echo(
+            f"Removed {result['removed']} blob(s), {result['bytes']} bytes; "
+            f"corrected {result['corrected']} reference count(s)")
+
+    @app.cli.command('import-blobs')
+    def import_blobs():
+        """Move attachment and submission files stored before the blob store into it."""
+        from utils.attachments import import_attachment_files
+        from utils.submissions import import_submission_files
+
+        attachments = import_attachment_files()
+        submissions = import_submission_files()
+        click.echo(f"Moved {attachments} attachment(s) and {submissions} submission(s) into the blob store")
+
+    @app.cli.command('bench-db')
+    @click.option('--seconds', default=5.0, show_default=True, help='Duration of each run.')
+    @click.option('--writers', default=4, show_default=True, help='Concurrent writer threads.')
+    @click.option('--readers', default=8, show_default=True, help='Concurrent reader threads.')
+    def bench_db(seconds, writers, readers):
+        """Compare default and tuned SQLite settings under concurrent reads and writes."""
+        from utils.db_benchmark import compare_profiles
+        from utils.sqlite_tuning import pool_options
+
+        results = compare_profiles(
+            pool_options(app.config), dict(app.config.get('SQLITE_PRAGMAS') or {}),
+            writers=writers, readers=readers, seconds=seconds)
+        for name, result in results.items():
+            click.echo(
+                f"{name:8} journal={result['journal_mode']:6} "
+                f"reads/s={result['reads_per_sec']:9.1f} writes/s={result['writes_per_sec']:8.1f} "
+                f"locked errors={result['errors']}")
+
+    @app.cli.command('reset-db')
+    @click.confirmation_option(prompt='Drop every table and rebuild the schema from the migrations?')
+    def reset_db():
+        """Drop all tables and re-run the migrations (development only)."""
+        from utils.schema import reset_schema
+
+        reset_schema()
+        click.echo("Database rebuilt at the latest migration")
+
+    @app.cli.command('bench-startup')
+    @click.option('--runs', default=5, show_default=True, help='Number of cold starts to time.')
+    def bench_startup(runs):
+        """Time from a cold `import app` to the first request served."""
+        from utils.startup_benchmark import measure_startup
+
+        result = measure_startup(runs)
+        click.echo("  ".join(f"{phase}={seconds * 1000:.0f}ms" for phase, seconds in result.items()))
+
+    @app.cli.command('warm-templates')
+    def warm_templates():
+        """Compile every template into the bytecode cache (run at deploy time)."""
+        from utils.templates import warm_templates as warm
+
+        if app.jinja_env.bytecode_cache is None:
+            raise click.ClickException("No template cache configured (set TEMPLATE_CACHE_DIR)")
+        compiled, failures = warm(app)
+        for name, error in failures:
+            click.echo(f"FAILED {name}: {error}", err=True)
+        click.echo(f"Compiled {compiled} template(s)")
+        if failures:
+            raise click.ClickException(f"{len(failures)} template(s) failed to compile")
+
+    @app.cli.command('jobs-worker')
+    @click.option('--processes', default=os.cpu_count() or 1, show_default=True,
+                  help='Number of worker processes.')
+    @click.option('--burst', is_flag=True, help='Exit once the queue is empty.')
+    @click.option('--poll-interval', default=1.0, show_default=True,
+                  help='Seconds to wait when the queue is empty.')
+    def jobs_worker(processes, burst, poll_interval):
+        """Run background jobs (post-upload processing)."""
+        from utils.jobs import run_worker_pool
+
+        click.echo(f"Starting {processes} job worker(s)")
+        run_worker_pool(processes, burst=burst, poll_interval=poll_interval)
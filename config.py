@@ -18,15 +18,126 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         f"sqlite:///{os.path.join(BASE_DIR, 'instance', 'database.db')}"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Run on every new SQLite connection (see utils/sqlite_tuning.py). WAL
+    # lets readers continue while a writer commits; busy_timeout (ms) makes
+    # writers wait for the lock instead of failing with "database is locked".
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+        'mmap_size': 128 * 1024 * 1024,
+        'cache_size': -16000,  # KiB
+        'foreign_keys': 'ON',
+    }
+
+    # Compiled templates are cached here and shared by all workers
+    # (`flask warm-templates` fills it; defaults to instance/jinja_cache).
+    # Templates are not re-checked for changes on each render unless this is
+    # turned on; development servers with DEBUG set reload them anyway.
+    TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR')
+    TEMPLATES_AUTO_RELOAD = os.environ.get('TEMPLATES_AUTO_RELOAD', '').lower() in ('1', 'true', 'yes') or None
+
+    # Refuse to start unless the database is at the migration head (see
+    # utils/schema.py); the schema is only changed by `flask db upgrade`
+    SCHEMA_CHECK = os.environ.get('SCHEMA_CHECK', 'true').lower() in ('1', 'true', 'yes')
+
+    # Optional read-only replica. Views marked @read_only (utils/replica.py)
+    # read from it; a user who writes reads the primary for the next
+    # REPLICA_PIN_SECONDS so they see their own change.
+    SQLALCHEMY_REPLICA_URI = os.environ.get('DATABASE_REPLICA_URL')
+    REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+
+    # Connection pool per worker process (ignored for in-memory SQLite)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 3600))
     
     # File upload settings
     UPLOAD_FOLDER = os.path.join(BASE_DIR, 'static/uploads/assignments')
     ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx', 'txt', 'zip', 'jpg', 'jpeg', 'png'}
-    SUBMISSION_FOLDER = os.path.join(BASE_DIR, 'static/uploads/submissions')
+    # Kept outside static/ so submissions are only served through the
+    # authorized download route
+    SUBMISSION_FOLDER = os.path.join(BASE_DIR, 'uploads/submissions')
+    MAX_SUBMISSION_SIZE = 16 * 1024 * 1024
+
+    # Content-addressed store shared by attachments and submissions, and how
+    # long (seconds) an unreferenced blob is kept before GC may delete it
+    BLOB_STORE_FOLDER = os.path.join(BASE_DIR, 'uploads/blobs')
+    BLOB_GC_GRACE = 3600
+
+    # Background jobs (`flask jobs-worker`). JOBS_EAGER runs them inline
+    # instead, for tests and single-process setups.
+    JOBS_EAGER = os.environ.get('JOBS_EAGER', '').lower() in ('1', 'true', 'yes')
+    JOB_MAX_ATTEMPTS = 3
+    JOB_TIMEOUT = 600  # seconds before a running job is considered abandoned
+
+    # Chunk size suggested to clients of the resumable upload API; each
+    # chunk is its own request, so it must stay below MAX_CONTENT_LENGTH
+    UPLOAD_CHUNK_SIZE = 1024 * 1024
+    UPLOAD_CLAIM_TIMEOUT = 600  # seconds before a chunk write or completion is considered abandoned
     
     # CSRF Protection
     WTF_CSRF_ENABLED = True
     
+    # Join the Teacher/Student profile into the per-request user lookup
+    LOAD_ROLE_PROFILE = True
+
+    # Cross-request cache of logged-in users (entries, seconds; 0 disables)
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 1024))
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+
+    # Per-teacher dashboard statistics cache (entries, seconds; 0 disables).
+    # Writes invalidate it in the worker that made them; the TTL bounds how
+    # long other workers can show stale numbers, so keep it short.
+    TEACHER_STATS_CACHE_SIZE = int(os.environ.get('TEACHER_STATS_CACHE_SIZE', 512))
+    TEACHER_STATS_TTL = int(os.environ.get('TEACHER_STATS_TTL', 30))
+
+    # Lifetime of the admin dashboard totals snapshot shared by all admin
+    # sessions (seconds; 0 recomputes on every load)
+    ADMIN_STATS_TTL = int(os.environ.get('ADMIN_STATS_TTL', 30))
+
+    # Maximum number of entries accepted by the bulk grading endpoint
+    BULK_GRADE_LIMIT = 500
+
+    # Rows fetched per database round trip (and per chunk sent) by the
+    # streaming CSV/NDJSON exports
+    EXPORT_BATCH_SIZE = 1000
+
+    # Admin activity log page size (keyset paginated, newest first)
+    ACTIVITY_LOG_PER_PAGE = 50
+
+    # Per-request SQL metrics: a Server-Timing header on every response and
+    # a warning in the app log for requests at or over either threshold
+    # (None disables that threshold), listing their slowest statements
+    SQL_METRICS_ENABLED = os.environ.get('SQL_METRICS_ENABLED', '').lower() in ('1', 'true', 'yes')
+    SQL_METRICS_SERVER_TIMING = True
+    SQL_METRICS_SLOWEST = 3
+    SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', 500))
+    SLOW_REQUEST_QUERIES = int(os.environ.get('SLOW_REQUEST_QUERIES', 50))
+
+    # Fail any request that runs more SQL statements than this (None
+    # disables the check; tests set it per app to catch N+1 queries)
+    MAX_QUERIES_PER_REQUEST = None
+
+    # Admin user listings are paginated with a keyset cursor
+    ADMIN_USERS_PER_PAGE = 50
+
+    # Uploaded files are never rewritten, so downloads may be cached this long (seconds)
+    DOWNLOAD_MAX_AGE = 365 * 24 * 3600
+
+    # Let the front proxy send file bodies after Flask has authorized the
+    # download: None (stream from Python), 'x-accel' (nginx) or 'x-sendfile'
+    # (Apache mod_xsendfile, lighttpd). For x-accel, files under
+    # DOWNLOAD_OFFLOAD_ROOT (the uploads directory holding BLOB_STORE_FOLDER
+    # and SUBMISSION_FOLDER, nothing else) are redirected to
+    # DOWNLOAD_OFFLOAD_PREFIX, which nginx should map with e.g.
+    #   location /_protected/ { internal; alias /path/to/app/uploads/; }
+    DOWNLOAD_OFFLOAD = os.environ.get('DOWNLOAD_OFFLOAD') or None
+    DOWNLOAD_OFFLOAD_ROOT = os.path.dirname(BLOB_STORE_FOLDER)
+    DOWNLOAD_OFFLOAD_PREFIX = '/_protected/'
+
     # Maximum file upload size (16MB)
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024
     
@@ -1,5 +1,9 @@
+from flask import current_app, g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from flask_login import LoginManager
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.dml import UpdateBase
 
 # Try to import CSRFProtect, make it optional
 try:
@@ -12,6 +16,27 @@ except ImportError:
             pass
     csrf = CSRFProtect()
 
-db = SQLAlchemy()
+
+class RoutingSession(Session):
+    """
+    Session that sends the SELECTs of read-only views to the replica bind
+
+    utils.replica.read_only sets ``g.db_replica`` for views that may read
+    from the replica. Flushes and INSERT/UPDATE/DELETE statements always use
+    the primary and mark the request as having written, after which its
+    reads go to the primary too.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            if self._flushing or isinstance(clause, UpdateBase):
+                g.db_wrote = True
+            elif (isinstance(clause, Select) and g.get('db_replica')
+                    and not g.get('db_wrote')):
+                return current_app.extensions['db_replica']
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
 login_manager.login_view = "auth_bp.login"
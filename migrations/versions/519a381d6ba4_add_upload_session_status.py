@@ -0,0 +1,26 @@
+"""Add a status to upload sessions so one request at a time can write or complete them
+
+Revision ID: 519a381d6ba4
+Revises: 7e6e94f090fb
+Create Date: 2026-10-18 18:12:40.220517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '519a381d6ba4'
+down_revision = '7e6e94f090fb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('upload_sessions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('status', sa.String(length=20), server_default='open', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('upload_sessions', schema=None) as batch_op:
+        batch_op.drop_column('status')
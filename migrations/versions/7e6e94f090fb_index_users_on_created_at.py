@@ -0,0 +1,26 @@
+"""Index users on (created_at, id) for the admin user listing
+
+Revision ID: 7e6e94f090fb
+Revises: f72063e4eed5
+Create Date: 2026-10-18 17:05:12.418305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e6e94f090fb'
+down_revision = 'f72063e4eed5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('ix_users_created_at_id', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_created_at_id')
@@ -0,0 +1,35 @@
+"""Allow one submission per student and assignment
+
+Revision ID: 9a8fca475924
+Revises: 519a381d6ba4
+Create Date: 2026-10-18 19:02:51.734160
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a8fca475924'
+down_revision = '519a381d6ba4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT COUNT(*) FROM (SELECT assignment_id, student_id FROM submissions "
+        "GROUP BY assignment_id, student_id HAVING COUNT(*) > 1) AS duplicated")).scalar()
+    if duplicates:
+        raise RuntimeError(
+            f"{duplicates} student/assignment pair(s) have more than one submission. "
+            "Delete the extra rows, run `flask repair-counters` and "
+            "`flask rebuild-grade-summaries`, then upgrade again.")
+
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_submission_assignment_student', ['assignment_id', 'student_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_submission_assignment_student', type_='unique')
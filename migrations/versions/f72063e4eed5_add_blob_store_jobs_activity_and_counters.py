@@ -0,0 +1,194 @@
+"""Add the blob store, jobs, activity log, grade summaries and counters
+
+Tables and columns added on top of the baseline schema: submission
+counters on assignments, content hashes on submissions, and the tables
+for blobs, attachments, resumable uploads, background jobs, grade
+summaries and the activity log.
+
+Revision ID: f72063e4eed5
+Revises: f2fe5a81910e
+Create Date: 2026-10-18 16:34:28.261885
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f72063e4eed5'
+down_revision = 'f2fe5a81910e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('assignments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('submission_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('graded_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Count the submissions already in the database (the same totals
+    # `flask repair-counters` recomputes)
+    op.execute(
+        "UPDATE assignments SET "
+        "submission_count = (SELECT COUNT(*) FROM submissions "
+        "WHERE submissions.assignment_id = assignments.id), "
+        "graded_count = (SELECT COUNT(*) FROM submissions "
+        "WHERE submissions.assignment_id = assignments.id AND submissions.grade IS NOT NULL)")
+
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('filename', sa.String(length=255), nullable=True))
+        batch_op.create_index(batch_op.f('ix_submissions_content_hash'), ['content_hash'], unique=False)
+
+    op.create_table('activity_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('type', sa.String(length=40), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=False),
+    sa.Column('actor_id', sa.Integer(), nullable=True),
+    sa.Column('description', sa.String(length=500), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('activity_events', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_activity_events_timestamp'), ['timestamp'], unique=False)
+        batch_op.create_index('ix_activity_events_type_timestamp', ['type', 'timestamp'], unique=False)
+
+    op.create_table('blobs',
+    sa.Column('hash', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('refcount', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('mime_type', sa.String(length=100), nullable=True),
+    sa.Column('page_count', sa.Integer(), nullable=True),
+    sa.Column('has_thumbnail', sa.Boolean(), server_default='0', nullable=False),
+    sa.Column('processed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('hash')
+    )
+
+    op.create_table('jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=50), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('run_after', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.create_index('ix_jobs_status_run_after', ['status', 'run_after'], unique=False)
+
+    op.create_table('student_grade_summary',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('class_id', sa.Integer(), nullable=False),
+    sa.Column('submitted_count', sa.Integer(), nullable=False),
+    sa.Column('graded_count', sa.Integer(), nullable=False),
+    sa.Column('grade_sum', sa.Float(), nullable=False),
+    sa.Column('highest', sa.Float(), nullable=True),
+    sa.Column('lowest', sa.Float(), nullable=True),
+    sa.Column('count_a', sa.Integer(), nullable=False),
+    sa.Column('count_b', sa.Integer(), nullable=False),
+    sa.Column('count_c', sa.Integer(), nullable=False),
+    sa.Column('count_d', sa.Integer(), nullable=False),
+    sa.Column('count_f', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['class_id'], ['classes.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['student_id'], ['students.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('student_id', 'class_id', name='uq_grade_summary_student_class')
+    )
+    with op.batch_alter_table('student_grade_summary', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_student_grade_summary_class_id'), ['class_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_student_grade_summary_student_id'), ['student_id'], unique=False)
+
+    # Summarize the grades already in the database (the same rows
+    # `flask rebuild-grade-summaries` writes)
+    op.execute(
+        "INSERT INTO student_grade_summary (student_id, class_id, submitted_count, graded_count, "
+        "grade_sum, highest, lowest, count_a, count_b, count_c, count_d, count_f, updated_at) "
+        "SELECT submissions.student_id, assignments.class_id, COUNT(submissions.id), "
+        "COUNT(submissions.grade), COALESCE(SUM(submissions.grade), 0), "
+        "MAX(submissions.grade), MIN(submissions.grade), "
+        "SUM(CASE WHEN submissions.grade >= 90 THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN submissions.grade >= 80 AND submissions.grade < 90 THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN submissions.grade >= 70 AND submissions.grade < 80 THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN submissions.grade >= 60 AND submissions.grade < 70 THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN submissions.grade < 60 THEN 1 ELSE 0 END), CURRENT_TIMESTAMP "
+        "FROM submissions JOIN assignments ON submissions.assignment_id = assignments.id "
+        "GROUP BY submissions.student_id, assignments.class_id")
+
+    op.create_table('assignment_attachments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('assignment_id', sa.Integer(), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('mime_type', sa.String(length=100), nullable=True),
+    sa.Column('content_hash', sa.String(length=64), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['assignment_id'], ['assignments.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('assignment_id', 'filename', name='uq_attachment_assignment_filename')
+    )
+    with op.batch_alter_table('assignment_attachments', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_assignment_attachments_assignment_id'), ['assignment_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_assignment_attachments_content_hash'), ['content_hash'], unique=False)
+
+    op.create_table('upload_sessions',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('assignment_id', sa.Integer(), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=False),
+    sa.Column('mime_type', sa.String(length=100), nullable=True),
+    sa.Column('comments', sa.Text(), nullable=True),
+    sa.Column('total_size', sa.Integer(), nullable=False),
+    sa.Column('received', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['assignment_id'], ['assignments.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['student_id'], ['students.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('upload_sessions', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_upload_sessions_assignment_id'), ['assignment_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_upload_sessions_student_id'), ['student_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_upload_sessions_updated_at'), ['updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('upload_sessions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_upload_sessions_updated_at'))
+        batch_op.drop_index(batch_op.f('ix_upload_sessions_student_id'))
+        batch_op.drop_index(batch_op.f('ix_upload_sessions_assignment_id'))
+
+    op.drop_table('upload_sessions')
+    with op.batch_alter_table('assignment_attachments', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_assignment_attachments_content_hash'))
+        batch_op.drop_index(batch_op.f('ix_assignment_attachments_assignment_id'))
+
+    op.drop_table('assignment_attachments')
+    with op.batch_alter_table('student_grade_summary', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_student_grade_summary_student_id'))
+        batch_op.drop_index(batch_op.f('ix_student_grade_summary_class_id'))
+
+    op.drop_table('student_grade_summary')
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.drop_index('ix_jobs_status_run_after')
+
+    op.drop_table('jobs')
+    op.drop_table('blobs')
+    with op.batch_alter_table('activity_events', schema=None) as batch_op:
+        batch_op.drop_index('ix_activity_events_type_timestamp')
+        batch_op.drop_index(batch_op.f('ix_activity_events_timestamp'))
+
+    op.drop_table('activity_events')
+    with op.batch_alter_table('submissions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_submissions_content_hash'))
+        batch_op.drop_column('filename')
+        batch_op.drop_column('content_hash')
+
+    with op.batch_alter_table('assignments', schema=None) as batch_op:
+        batch_op.drop_column('graded_count')
+        batch_op.drop_column('submission_count')
@@ -4,8 +4,14 @@ from .teacher import Teacher
 from .assignment import Assignment
 from .class_model import Class
 from .submission import Submission
+from .attachment import AssignmentAttachment
+from .upload_session import UploadSession
+from .blob import Blob
+from .job import Job
+from .grade_summary import StudentGradeSummary
+from .activity_event import ActivityEvent
 
 # Import db from extensions instead of creating a new instance
 from extensions import db
 
-__all__ = ['User', 'Student', 'Teacher', 'Assignment', 'Class', 'Submission', 'db']
+__all__ = ['User', 'Student', 'Teacher', 'Assignment', 'Class', 'Submission', 'AssignmentAttachment', 'UploadSession', 'Blob', 'Job', 'StudentGradeSummary', 'ActivityEvent', 'db']
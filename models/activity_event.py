@@ -0,0 +1,33 @@
+from extensions import db
+from datetime import datetime
+
+# Event types shown in the admin activity log, with their display labels
+ACTIVITY_TYPES = {
+    'user_registered': 'User Registration',
+    'user_deleted': 'User Deletion',
+    'role_changed': 'Role Change',
+    'class_joined': 'Class Joined',
+    'class_left': 'Class Left',
+    'assignment_created': 'Assignment Created',
+    'assignment_deleted': 'Assignment Deleted',
+    'assignment_graded': 'Assignment Graded',
+}
+
+
+class ActivityEvent(db.Model):
+    """An append-only entry in the admin activity log, written through utils.activity"""
+    __tablename__ = 'activity_events'
+    __table_args__ = (
+        db.Index('ix_activity_events_type_timestamp', 'type', 'timestamp'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    type = db.Column(db.String(40), nullable=False)
+    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    # User who caused the event; kept as a plain id so the history
+    # survives the user being deleted
+    actor_id = db.Column(db.Integer)
+    description = db.Column(db.String(500), nullable=False)
+
+    def __repr__(self):
+        return f"<ActivityEvent {self.type} at {self.timestamp}>"
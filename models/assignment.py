@@ -13,6 +13,10 @@ class Assignment(db.Model):
     file_path = db.Column(db.String(200))  # path to uploaded assignment file
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
+    # Denormalized submission counters, maintained through adjust_counters()
+    submission_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    graded_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
     # Assignment belongs to a class, not individual students
     class_id = db.Column(db.Integer, db.ForeignKey('classes.id', ondelete='CASCADE'), nullable=False, index=True)
     teacher_id = db.Column(db.Integer, db.ForeignKey('teachers.id', ondelete='SET NULL'), index=True)
@@ -20,6 +24,8 @@ class Assignment(db.Model):
     # Relationships
     teacher = db.relationship('Teacher', backref='assignments')
     submissions = db.relationship('Submission', backref='assignment', lazy='dynamic', cascade='all, delete-orphan')
+    attachments = db.relationship('AssignmentAttachment', backref='assignment', cascade='all, delete-orphan',
+                                  order_by='AssignmentAttachment.filename')
 
     def __repr__(self):
         return f"<Assignment {self.title}>"
@@ -30,12 +36,20 @@ class Assignment(db.Model):
     
     def get_submissions_count(self):
         """Get total number of submissions"""
-        return self.submissions.count()
+        return self.submission_count or 0
     
     def get_graded_count(self):
         """Get number of graded submissions"""
-        try:
-            # Filter for non-None grades - use direct iteration since we have dynamic relationship
-            return sum(1 for sub in self.submissions.all() if sub.grade is not None)
-        except (AttributeError, TypeError):
-            return 0
+        return self.graded_count or 0
+
+    @staticmethod
+    def adjust_counters(assignment_id, submissions=0, graded=0):
+        """Add to the submission counters inside the current transaction"""
+        values = {}
+        if submissions:
+            values[Assignment.submission_count] = Assignment.submission_count + submissions
+        if graded:
+            values[Assignment.graded_count] = Assignment.graded_count + graded
+        if values:
+            db.session.query(Assignment).filter(
+                Assignment.id == assignment_id).update(values, synchronize_session='fetch')
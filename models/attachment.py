@@ -0,0 +1,26 @@
+from extensions import db
+from datetime import datetime
+
+
+class AssignmentAttachment(db.Model):
+    __tablename__ = 'assignment_attachments'
+    __table_args__ = (
+        db.UniqueConstraint('assignment_id', 'filename', name='uq_attachment_assignment_filename'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    assignment_id = db.Column(db.Integer, db.ForeignKey('assignments.id', ondelete='CASCADE'), nullable=False, index=True)
+
+    filename = db.Column(db.String(255), nullable=False)  # stored (secure) filename
+    size = db.Column(db.Integer, nullable=False, default=0)  # bytes
+    mime_type = db.Column(db.String(100))
+    content_hash = db.Column(db.String(64), index=True)  # SHA-256 hex digest
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<AssignmentAttachment {self.filename} for Assignment {self.assignment_id}>"
+
+    @property
+    def extension(self):
+        """Lowercase file extension without the dot"""
+        return self.filename.rsplit('.', 1)[-1].lower() if '.' in self.filename else ''
@@ -0,0 +1,21 @@
+from extensions import db
+from datetime import datetime
+
+
+class Blob(db.Model):
+    """A file in the content-addressed blob store, shared by every upload with the same content"""
+    __tablename__ = 'blobs'
+
+    hash = db.Column(db.String(64), primary_key=True)  # SHA-256 hex digest, also the file name
+    size = db.Column(db.Integer, nullable=False, default=0)  # bytes
+    refcount = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    # Filled in by the background processing job
+    mime_type = db.Column(db.String(100))  # sniffed from the content, not the filename
+    page_count = db.Column(db.Integer)  # PDFs only
+    has_thumbnail = db.Column(db.Boolean, nullable=False, default=False, server_default='0')
+    processed_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f"<Blob {self.hash[:12]} refs={self.refcount}>"
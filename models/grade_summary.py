@@ -0,0 +1,54 @@
+from extensions import db
+from datetime import datetime
+
+# Letter bands counted in the grade distribution, highest first
+GRADE_BANDS = (('A', 90), ('B', 80), ('C', 70), ('D', 60), ('F', None))
+
+
+class StudentGradeSummary(db.Model):
+    """
+    A student's grade aggregates in one class, maintained by utils.grade_summary
+
+    Rows are refreshed whenever a grade or submission that feeds them is
+    written, so grade pages can read averages and distributions without
+    scanning submissions.
+    """
+    __tablename__ = 'student_grade_summary'
+    __table_args__ = (db.UniqueConstraint('student_id', 'class_id', name='uq_grade_summary_student_class'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id', ondelete='CASCADE'), nullable=False, index=True)
+    class_id = db.Column(db.Integer, db.ForeignKey('classes.id', ondelete='CASCADE'), nullable=False, index=True)
+
+    submitted_count = db.Column(db.Integer, nullable=False, default=0)
+    graded_count = db.Column(db.Integer, nullable=False, default=0)
+    grade_sum = db.Column(db.Float, nullable=False, default=0)
+    highest = db.Column(db.Float)
+    lowest = db.Column(db.Float)
+
+    # Graded submissions per letter band
+    count_a = db.Column(db.Integer, nullable=False, default=0)
+    count_b = db.Column(db.Integer, nullable=False, default=0)
+    count_c = db.Column(db.Integer, nullable=False, default=0)
+    count_d = db.Column(db.Integer, nullable=False, default=0)
+    count_f = db.Column(db.Integer, nullable=False, default=0)
+
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<StudentGradeSummary student={self.student_id} class={self.class_id}>"
+
+    @property
+    def pending_count(self):
+        """Submissions still waiting for a grade"""
+        return self.submitted_count - self.graded_count
+
+    @property
+    def average(self):
+        """Average grade, or None when nothing is graded"""
+        return self.grade_sum / self.graded_count if self.graded_count else None
+
+    @property
+    def distribution(self):
+        """Letter band -> number of grades in it"""
+        return {letter: getattr(self, f'count_{letter.lower()}') for letter, _ in GRADE_BANDS}
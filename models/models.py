@@ -4,3 +4,9 @@ from .teacher import Teacher
 from .assignment import Assignment
 from .class_model import Class
 from .submission import Submission
+from .attachment import AssignmentAttachment
+from .upload_session import UploadSession
+from .blob import Blob
+from .job import Job
+from .grade_summary import StudentGradeSummary
+from .activity_event import ActivityEvent
@@ -1,15 +1,20 @@
+import os
 from extensions import db
 from datetime import datetime
 
 
 class Submission(db.Model):
     __tablename__ = 'submissions'
+    # One submission per student and assignment, even when two uploads race
+    __table_args__ = (db.UniqueConstraint('assignment_id', 'student_id', name='uq_submission_assignment_student'),)
 
     id = db.Column(db.Integer, primary_key=True)
     assignment_id = db.Column(db.Integer, db.ForeignKey('assignments.id', ondelete='CASCADE'), nullable=False, index=True)
     student_id = db.Column(db.Integer, db.ForeignKey('students.id', ondelete='CASCADE'), nullable=False, index=True)
     
     file_path = db.Column(db.String(200))  # path to submitted file
+    content_hash = db.Column(db.String(64), index=True)  # SHA-256 of the file (blob store key, ETag)
+    filename = db.Column(db.String(255))  # name the file was submitted as
     comments = db.Column(db.Text)
     grade = db.Column(db.Float)  # Grade out of 100
     feedback = db.Column(db.Text)  # Teacher feedback
@@ -22,6 +27,12 @@ class Submission(db.Model):
     def __repr__(self):
         return f"<Submission {self.id} by Student {self.student_id} for Assignment {self.assignment_id}>"
     
+    def get_filename(self):
+        """Name to show and download the submitted file as"""
+        if self.filename:
+            return self.filename
+        return os.path.basename(self.file_path.replace('\\', '/')) if self.file_path else None
+
     def is_graded(self):
         """Check if submission has been graded"""
         return self.grade is not None
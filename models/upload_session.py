@@ -0,0 +1,32 @@
+from extensions import db
+from datetime import datetime
+
+
+class UploadSession(db.Model):
+    """A resumable submission upload that has not been finalized yet"""
+    __tablename__ = 'upload_sessions'
+
+    id = db.Column(db.String(32), primary_key=True)  # random token used in upload URLs
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id', ondelete='CASCADE'), nullable=False, index=True)
+    assignment_id = db.Column(db.Integer, db.ForeignKey('assignments.id', ondelete='CASCADE'), nullable=False, index=True)
+
+    filename = db.Column(db.String(255), nullable=False)  # secure version of the student's filename
+    mime_type = db.Column(db.String(100))
+    comments = db.Column(db.Text)
+    total_size = db.Column(db.Integer, nullable=False)  # bytes declared when the upload started
+    received = db.Column(db.Integer, nullable=False, default=0)  # bytes written so far
+    # 'open', or claimed by the request writing a chunk ('receiving') or completing it ('finishing')
+    status = db.Column(db.String(20), nullable=False, default='open', server_default='open')
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    # Relationships
+    student = db.relationship('Student')
+    assignment = db.relationship('Assignment')
+
+    def __repr__(self):
+        return f"<UploadSession {self.id} {self.received}/{self.total_size}>"
+
+    def is_complete(self):
+        """Check if every declared byte has been received"""
+        return self.received >= self.total_size
@@ -8,13 +8,25 @@ from models.teacher import Teacher
 from models.assignment import Assignment
 from models.class_model import Class
 from models.submission import Submission
+from models.activity_event import ACTIVITY_TYPES, ActivityEvent
 from werkzeug.security import generate_password_hash
-from datetime import datetime
+from sqlalchemy import func, or_
+from datetime import datetime, timedelta
 import os
+from utils.attachments import serialize_attachments
+from utils.activity import record_activity
+from utils.blobstore import release
+from utils.grade_summary import drop_student_summaries, refresh_grade_summaries, summary_pairs
 from utils.helpers import (
     validate_email, validate_password, sanitize_username, 
     get_user_display_name, format_datetime
 )
+from utils.identity import get_current_user_model, get_user_cache, invalidate_user
+from utils.loaders import loader_options
+from utils.pagination import keyset_page, escape_like
+from utils.replica import read_only
+from utils.stats import get_admin_snapshot, invalidate_admin_snapshot, release_submission_counters
+from utils.teacher_stats import clear_teacher_stats, get_teacher_stats_cache
 
 admin_bp = Blueprint("admin_bp", __name__, url_prefix="/admin")
 
@@ -24,14 +36,67 @@ def admin_required(f):
     @wraps(f)
     @login_required
     def decorated_function(*args, **kwargs):
+        # current_user comes from the request-scoped identity; admins have
+        # no role profile, so get_role_profile() never needs to query here
         if not current_user.is_authenticated or current_user.role != 'admin':
             abort(403)
         return f(*args, **kwargs)
     return decorated_function
 
 
+def get_user_page(per_page=None):
+    """
+    Fetch one page of users filtered by the request's query string
+
+    Supports ``role``, ``status`` and ``q`` (username/email search) filters
+    and a ``cursor`` from the previous page. Role profiles are loaded in the
+    same query so display names do not trigger a query per user.
+    """
+    filters = {}
+    for key in ('role', 'status', 'q'):
+        value = request.args.get(key, '').strip()
+        if value:
+            filters[key] = value
+
+    query = User.query.options(*loader_options('admin_user_table'))
+    if 'role' in filters:
+        query = query.filter(User.role == filters['role'])
+    if 'status' in filters:
+        query = query.filter(User.status == filters['status'])
+    if 'q' in filters:
+        pattern = f"%{escape_like(filters['q'])}%"
+        query = query.filter(or_(
+            User.username.ilike(pattern, escape='\\'),
+            User.email.ilike(pattern, escape='\\')
+        ))
+
+    users, next_cursor = keyset_page(
+        query, User.created_at, User.id,
+        cursor=request.args.get('cursor'),
+        per_page=per_page or current_app.config.get('ADMIN_USERS_PER_PAGE', 50)
+    )
+    return users, next_cursor, filters
+
+
+def remove_student_records(student):
+    """
+    Delete a student's submissions and grade summaries before their profile
+    goes away (no commit)
+
+    Assignment submission counters and blob references are given back in
+    the same transaction. Used when a student is deleted and when they
+    are moved to another role.
+    """
+    submissions = Submission.query.filter_by(student_id=student.id)
+    release_submission_counters(submissions)
+    release(h for (h,) in submissions.with_entities(Submission.content_hash))
+    drop_student_summaries(student.id)
+    submissions.delete(synchronize_session='fetch')
+
+
 @admin_bp.route("/dashboard")
 @admin_required
+@read_only
 def dashboard():
     # Get admin user info
     admin_user = current_user
@@ -43,22 +108,13 @@ def dashboard():
         'username': admin_user.username
     }
 
-    # Calculate actual stats from database
-    total_users = User.query.count()
-    total_teachers = User.query.filter_by(role='teacher').count()
-    total_students = User.query.filter_by(role='student').count()
-    total_assignments = Assignment.query.count()
-
-    stats = {
-        'total_users': total_users,
-        'total_teachers': total_teachers,
-        'total_students': total_students,
-        'total_assignments': total_assignments
-    }
+    # System-wide totals come from a short-lived snapshot shared by all
+    # admin sessions
+    snapshot = get_admin_snapshot()
 
-    # Get recent users (last 5 registered)
-    recent_users_data = User.query.order_by(
-        User.created_at.desc()).limit(5).all()
+    # The newest users for management (full list is paginated on
+    # manage_users); the five most recent double as "recent users"
+    all_users_data, _, _ = get_user_page(per_page=10)
     recent_users = [{
         'id': u.id,
         'username': u.username,
@@ -66,13 +122,16 @@ def dashboard():
         'role': u.role,
         'status': u.status,
         'created_at': u.created_at.strftime('%b %d, %Y') if u.created_at else 'N/A'
-    } for u in recent_users_data]
+    } for u in all_users_data[:5]]
 
-    # Get recent activities (simplified - could be enhanced with activity log)
-    recent_activities = []
+    # Latest entries from the activity log
+    recent_activities = [{
+        'type': event.type,
+        'description': event.description,
+        'timestamp': format_datetime(event.timestamp)
+    } for event in ActivityEvent.query.order_by(
+        ActivityEvent.timestamp.desc(), ActivityEvent.id.desc()).limit(5)]
 
-    # Get all users for management
-    all_users_data = User.query.all()
     all_users = []
     for u in all_users_data:
         display_info = get_user_display_name(u)
@@ -87,23 +146,6 @@ def dashboard():
             'created_at': format_datetime(u.created_at)
         })
 
-    # Calculate assignment stats
-    total_assignment_count = Assignment.query.count()
-    pending_count = Assignment.query.filter_by(status='pending').count()
-    graded_count = Submission.query.filter(
-        Submission.grade.isnot(None)).count()
-
-    # Count late assignments (past due date)
-    now = datetime.utcnow()
-    late_count = Assignment.query.filter(Assignment.due_date < now).count()
-
-    assignment_stats = {
-        'total': total_assignment_count,
-        'pending': pending_count,
-        'graded': graded_count,
-        'late': late_count
-    }
-
     system_health = {
         'active_sessions': 0,
         'last_backup': 'N/A'
@@ -112,19 +154,21 @@ def dashboard():
     return render_template(
         "admin/dashboard.html",
         admin=admin,
-        stats=stats,
+        stats=snapshot.stats,
         recent_users=recent_users,
         recent_activities=recent_activities,
         all_users=all_users,
-        assignment_stats=assignment_stats,
-        system_health=system_health
+        assignment_stats=snapshot.assignments,
+        system_health=system_health,
+        stats_computed_at=snapshot.computed_at
     )
 
 
 @admin_bp.route("/users")
 @admin_required
+@read_only
 def manage_users():
-    users_data = User.query.all()
+    users_data, next_cursor, filters = get_user_page()
     users = []
     for u in users_data:
         display_info = get_user_display_name(u)
@@ -139,13 +183,15 @@ def manage_users():
             'created_at': u.created_at
         })
 
-    return render_template("admin/manage_users.html", users=users)
+    return render_template("admin/manage_users.html", users=users,
+                           filters=filters, next_cursor=next_cursor)
 
 
 @admin_bp.route("/teachers")
 @admin_required
+@read_only
 def manage_teachers():
-    teachers_data = Teacher.query.all()
+    teachers_data = Teacher.query.options(*loader_options('admin_teacher_table')).all()
     teachers = [{
         'id': t.id,
         'first_name': t.first_name or '',
@@ -161,15 +207,13 @@ def manage_teachers():
 
 @admin_bp.route("/students")
 @admin_required
+@read_only
 def manage_students():
-    students_data = Student.query.all()
+    students_data = Student.query.options(*loader_options('admin_student_table')).all()
     students = []
     for s in students_data:
         # Get class name if student is enrolled in any class
-        class_name = None
-        if hasattr(s, 'enrolled_classes') and s.enrolled_classes:
-            class_name = s.enrolled_classes[0].name if len(
-                s.enrolled_classes) > 0 else None
+        class_name = s.classes[0].name if s.classes else None
 
         students.append({
             'id': s.id,
@@ -189,8 +233,9 @@ def manage_students():
 
 @admin_bp.route("/assignments")
 @admin_required
+@read_only
 def manage_assignments():
-    assignments_data = Assignment.query.all()
+    assignments_data = Assignment.query.options(*loader_options('admin_assignment_table')).all()
     assignments = []
     for a in assignments_data:
         # Get teacher name
@@ -204,8 +249,7 @@ def manage_assignments():
             course_name = a.class_obj.name
 
         # Get submissions count
-        submissions_count = Submission.query.filter_by(
-            assignment_id=a.id).count()
+        submissions_count = a.get_submissions_count()
 
         assignments.append({
             'id': a.id,
@@ -225,14 +269,17 @@ def manage_assignments():
 
 @admin_bp.route("/roles")
 @admin_required
+@read_only
 def manage_roles():
-    users_data = User.query.all()
+    users_data, next_cursor, filters = get_user_page()
     users = []
 
-    # Calculate role counts
-    admin_count = User.query.filter_by(role='admin').count()
-    teacher_count = User.query.filter_by(role='teacher').count()
-    student_count = User.query.filter_by(role='student').count()
+    # Calculate role counts in one grouped query
+    role_counts = dict(
+        db.session.query(User.role, func.count(User.id)).group_by(User.role).all())
+    admin_count = role_counts.get('admin', 0)
+    teacher_count = role_counts.get('teacher', 0)
+    student_count = role_counts.get('student', 0)
 
     for u in users_data:
         display_info = get_user_display_name(u)
@@ -251,19 +298,21 @@ def manage_roles():
     return render_template("admin/manage_roles.html", users=users,
                            admin_count=admin_count,
                            teacher_count=teacher_count,
-                           student_count=student_count)
+                           student_count=student_count,
+                           filters=filters, next_cursor=next_cursor)
 
 
 @admin_bp.route("/profile", methods=['GET', 'POST'])
 @admin_required
 def edit_profile():
-    admin_user = current_user
+    admin_user = get_current_user_model()
 
     if request.method == 'POST':
         admin_user.email = request.form.get('email', admin_user.email)
 
         try:
             db.session.commit()
+            invalidate_user(admin_user.id)
             flash('Profile updated successfully!', 'success')
         except Exception as e:
             db.session.rollback()
@@ -363,6 +412,8 @@ def add_user():
                 db.session.add(teacher)
 
             db.session.commit()
+            invalidate_admin_snapshot()
+            record_activity('user_registered', f'New {role} added by admin: {username}')
             flash('User added successfully!', 'success')
             return redirect(url_for('admin_bp.manage_users'))
         except Exception as e:
@@ -431,6 +482,8 @@ def add_teacher():
             )
             db.session.add(teacher)
             db.session.commit()
+            invalidate_admin_snapshot()
+            record_activity('user_registered', f'New teacher added by admin: {username}')
             flash('Teacher added successfully!', 'success')
             return redirect(url_for('admin_bp.manage_teachers'))
         except Exception as e:
@@ -501,6 +554,8 @@ def add_student():
             )
             db.session.add(student)
             db.session.commit()
+            invalidate_admin_snapshot()
+            record_activity('user_registered', f'New student added by admin: {username}')
             flash('Student added successfully!', 'success')
             return redirect(url_for('admin_bp.manage_students'))
         except Exception as e:
@@ -524,50 +579,67 @@ def update_settings():
     return redirect(url_for('admin_bp.system_settings'))
 
 
+@admin_bp.route("/settings/user-cache")
+@admin_required
+def user_cache_stats():
+    """Hit/miss counters for this worker's user session cache"""
+    return jsonify(get_user_cache().stats())
+
+
+@admin_bp.route("/settings/teacher-stats-cache")
+@admin_required
+def teacher_stats_cache_stats():
+    """Hit/miss counters for this worker's teacher dashboard stats cache"""
+    return jsonify(get_teacher_stats_cache().stats())
+
+
 @admin_bp.route("/activity-log")
 @admin_required
+@read_only
 def activity_log():
-    activities = []
-    activity_type_filter = request.args.get('type', '')
-
-    # Get recent user registrations
-    recent_users = User.query.order_by(User.created_at.desc()).limit(20).all()
-    for user in recent_users:
-        if not activity_type_filter or activity_type_filter == 'user_registered':
-            activities.append({
-                'type': 'user_registered',
-                'description': f'New {user.role} registered: {user.username}',
-                'timestamp': user.created_at if user.created_at else datetime.utcnow()
-            })
-
-    # Get recent assignments
-    recent_assignments = Assignment.query.order_by(Assignment.created_at.desc()).limit(10).all()
-    for assignment in recent_assignments:
-        if not activity_type_filter or activity_type_filter == 'assignment_created':
-            activities.append({
-                'type': 'assignment_created',
-                'description': f'Assignment "{assignment.title}" created',
-                'timestamp': assignment.created_at if assignment.created_at else datetime.utcnow()
-            })
-
-    # Get recent graded submissions
-    recent_graded = Submission.query.filter(Submission.grade.isnot(None)).order_by(Submission.graded_at.desc()).limit(10).all()
-    for submission in recent_graded:
-        if not activity_type_filter or activity_type_filter == 'assignment_graded':
-            activities.append({
-                'type': 'assignment_graded',
-                'description': f'Assignment graded for student ID {submission.student_id}',
-                'timestamp': submission.graded_at if submission.graded_at else datetime.utcnow()
-            })
-
-    # Sort by timestamp
-    activities.sort(key=lambda x: x['timestamp'], reverse=True)
-
-    return render_template("admin/activity_log.html", activities=activities)
+    """
+    Page through the activity log, newest first
+
+    Supports a ``type`` filter, ``start``/``end`` dates (YYYY-MM-DD,
+    inclusive) and a ``cursor`` from the previous page; all filtering
+    happens in SQL on the (type, timestamp) index.
+    """
+    filters = {}
+    query = ActivityEvent.query
+
+    event_type = request.args.get('type', '').strip()
+    if event_type in ACTIVITY_TYPES:
+        filters['type'] = event_type
+        query = query.filter(ActivityEvent.type == event_type)
+
+    for key in ('start', 'end'):
+        value = request.args.get(key, '').strip()
+        if not value:
+            continue
+        try:
+            day = datetime.strptime(value, '%Y-%m-%d')
+        except ValueError:
+            continue
+        filters[key] = value
+        if key == 'start':
+            query = query.filter(ActivityEvent.timestamp >= day)
+        else:
+            query = query.filter(ActivityEvent.timestamp < day + timedelta(days=1))
+
+    activities, next_cursor = keyset_page(
+        query, ActivityEvent.timestamp, ActivityEvent.id,
+        cursor=request.args.get('cursor'),
+        per_page=current_app.config.get('ACTIVITY_LOG_PER_PAGE', 50)
+    )
+
+    return render_template("admin/activity_log.html", activities=activities,
+                           activity_types=ACTIVITY_TYPES, filters=filters,
+                           next_cursor=next_cursor)
 
 
 @admin_bp.route("/users/<int:user_id>")
 @admin_required
+@read_only
 def view_user(user_id):
     user_data = User.query.get_or_404(user_id)
     display_info = get_user_display_name(user_data)
@@ -634,6 +706,7 @@ def change_role(user_id):
             if old_role != new_role:
                 # Remove old profile
                 if old_role == 'student' and user.student_profile:
+                    remove_student_records(user.student_profile)
                     db.session.delete(user.student_profile)
                 elif old_role == 'teacher' and user.teacher_profile:
                     db.session.delete(user.teacher_profile)
@@ -647,6 +720,12 @@ def change_role(user_id):
                     db.session.add(teacher)
 
             db.session.commit()
+            invalidate_user(user.id)
+            clear_teacher_stats()
+            invalidate_admin_snapshot()
+            if old_role != new_role:
+                record_activity('role_changed',
+                                f'Role of {user.username} changed from {old_role} to {new_role}')
             flash('Role changed successfully!', 'success')
             return redirect(url_for('admin_bp.manage_users'))
         except Exception as e:
@@ -671,8 +750,19 @@ def delete_user(user_id):
 
     try:
         user = User.query.get_or_404(user_id)
+
+        # Keep assignment submission counters, blob references and grade
+        # summaries in step with the deleted submissions
+        if user.student_profile:
+            remove_student_records(user.student_profile)
+
+        description = f'User {user.username} ({user.role}) deleted'
         db.session.delete(user)
         db.session.commit()
+        invalidate_user(user_id)
+        clear_teacher_stats()
+        invalidate_admin_snapshot()
+        record_activity('user_deleted', description)
         return jsonify({'success': True, 'message': 'User deleted successfully'})
     except Exception as e:
         db.session.rollback()
@@ -681,41 +771,21 @@ def delete_user(user_id):
 
 @admin_bp.route("/assignments/<int:assignment_id>")
 @admin_required
+@read_only
 def view_assignment(assignment_id):
     """Get assignment details for admin"""
-    assignment = Assignment.query.get_or_404(assignment_id)
-    
-    # Get assignment files
-    attachments = []
-    assignment_files_dir = os.path.join('static', 'uploads', 'assignments', str(assignment.id))
+    assignment = (
+        Assignment.query.options(*loader_options('admin_assignment_detail'))
+        .filter_by(id=assignment_id)
+        .first_or_404()
+    )
     
-    if os.path.exists(assignment_files_dir):
-        for filename in os.listdir(assignment_files_dir):
-            file_path = os.path.join(assignment_files_dir, filename)
-            if os.path.isfile(file_path):
-                ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
-                icon_map = {
-                    'pdf': 'pdf',
-                    'doc': 'word',
-                    'docx': 'word',
-                    'txt': 'alt',
-                    'jpg': 'image',
-                    'jpeg': 'image',
-                    'png': 'image',
-                    'xlsx': 'excel',
-                    'xls': 'excel',
-                    'zip': 'archive'
-                }
-                icon = icon_map.get(ext, 'file')
-                
-                attachments.append({
-                    'filename': filename,
-                    'icon': icon
-                })
+    # Get assignment files from the attachment manifest
+    attachments = serialize_attachments(assignment)
     
     # Get submission count
-    submission_count = Submission.query.filter_by(assignment_id=assignment_id).count()
-    graded_count = Submission.query.filter_by(assignment_id=assignment_id).filter(Submission.grade.isnot(None)).count()
+    submission_count = assignment.get_submissions_count()
+    graded_count = assignment.get_graded_count()
     
     return jsonify({
         'id': assignment.id,
@@ -740,12 +810,23 @@ def delete_assignment(assignment_id):
         assignment = Assignment.query.get_or_404(assignment_id)
         assignment_title = assignment.title
 
-        # Delete all submissions associated with this assignment
-        Submission.query.filter_by(assignment_id=assignment_id).delete()
+        # Give back the blob references held by its files
+        submissions = Submission.query.filter_by(assignment_id=assignment_id)
+        release(h for (h,) in submissions.with_entities(Submission.content_hash))
+        release(attachment.content_hash for attachment in assignment.attachments)
+        affected = summary_pairs(submissions)
+
+        # Delete all submissions associated with this assignment. The
+        # counters live on the assignment row, which goes in the same commit.
+        submissions.delete()
+        refresh_grade_summaries(affected)
 
         # Delete the assignment
         db.session.delete(assignment)
         db.session.commit()
+        clear_teacher_stats()
+        invalidate_admin_snapshot()
+        record_activity('assignment_deleted', f'Assignment "{assignment_title}" deleted')
 
         return jsonify({'success': True, 'message': f'Assignment "{assignment_title}" deleted successfully'})
     except Exception as e:
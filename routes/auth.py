@@ -5,7 +5,9 @@ from extensions import db
 from models.user import User
 from models.student import Student
 from models.teacher import Teacher
+from utils.activity import record_activity
 from utils.helpers import validate_email, validate_password, sanitize_username
+from utils.identity import invalidate_user
 from datetime import datetime
 
 auth_bp = Blueprint("auth_bp", __name__)
@@ -89,6 +91,7 @@ def register():
             db.session.add(teacher_profile)
 
         db.session.commit()
+        record_activity('user_registered', f'New {role} registered: {username}', actor_id=new_user.id)
 
         flash("✅ Account created successfully! Please log in.", "success")
         return redirect(url_for("auth_bp.login"))
@@ -111,6 +114,7 @@ def login():
             # Update last login
             user.last_login = datetime.utcnow()
             db.session.commit()
+            invalidate_user(user.id)
             
             login_user(user)
             flash("Login successful!", "success")
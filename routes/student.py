@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, flash, redirect, url_for, request, jsonify, send_file
+from flask import Blueprint, current_app, render_template, flash, redirect, url_for, request, jsonify
 from flask_login import login_required, current_user
 from datetime import datetime, timedelta
 from models.student import Student
@@ -7,18 +7,31 @@ from models.submission import Submission
 from models.class_model import Class, class_student
 from models.user import User
 from models.teacher import Teacher
+from models.attachment import AssignmentAttachment
+from models.upload_session import UploadSession
 from extensions import db
 from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from werkzeug.utils import secure_filename
 import os
-from utils.helpers import generate_secure_filename, validate_file_extension, validate_file_mime_type
+from utils.activity import record_activity
+from utils.attachments import attachment_path, serialize_attachments
+from utils.downloads import send_upload
+from utils.grade_summary import combine_summaries, get_class_summaries
+from utils.helpers import validate_file_extension, validate_file_mime_type
+from utils.identity import get_current_student, get_current_user_model, invalidate_user
+from utils.loaders import class_count_columns, loader_options
+from utils.blobstore import store_stream
+from utils.replica import read_only
+from utils.submissions import (
+    ALLOWED_EXTENSIONS, ALLOWED_MIME_TYPES, UploadError, append_chunk, create_submission,
+    discard_upload, finish_upload, start_upload
+)
+from utils.teacher_stats import invalidate_teacher_stats
+from utils.workload import get_student_workload
 
 student_bp = Blueprint("student_bp", __name__, url_prefix="/student")
 
-# Configuration for file uploads
-UPLOAD_FOLDER = 'uploads/submissions'
-ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx', 'txt', 'zip'}
-
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
@@ -27,7 +40,7 @@ def allowed_file(filename):
 
 def get_student_or_redirect():
     """Helper function to get student profile or redirect if not found"""
-    student = Student.query.filter_by(user_id=current_user.id).first()
+    student = get_current_student()
     if not student:
         flash("Student profile not found. Please contact administrator.", "danger")
         return None
@@ -102,70 +115,42 @@ def calculate_letter_grade(percentage):
 # -------------------------
 @student_bp.route("/dashboard")
 @login_required
+@read_only
 def dashboard():
     student = get_student_or_redirect()
     if not student:
         return redirect(url_for('auth_bp.login'))
 
-    # Calculate actual stats
-    enrolled_classes = len(get_student_classes(student))
-
-    # Get all assignments and submissions
-    pending_assignments = 0
-    submitted_assignments = 0
-    total_grades = []
-
-    for cls in get_student_classes(student):
-        for assignment in cls.assignments.all():
-            submission = assignment.submissions.filter_by(
-                student_id=student.id).first()
-            if submission:
-                submitted_assignments += 1
-                if submission.grade is not None:
-                    total_grades.append(submission.grade)
-            else:
-                pending_assignments += 1
-
-    average_grade = sum(total_grades) / \
-        len(total_grades) if total_grades else 0
+    workload = get_student_workload(student)
 
     stats = {
-        "enrolled_classes": enrolled_classes,
-        "pending_assignments": pending_assignments,
-        "submitted_assignments": submitted_assignments,
-        "average_grade": round(average_grade, 1)
+        "enrolled_classes": len(workload.classes),
+        "pending_assignments": workload.unsubmitted_count,
+        "submitted_assignments": workload.submitted_count,
+        "average_grade": round(workload.average_grade, 1)
     }
 
-    # Get recent assignments
-    recent_assignments = []
-    all_cls_assignments = []
-    for cls in get_student_classes(student):
-        for assignment in cls.assignments.all():
-            submission = assignment.submissions.filter_by(
-                student_id=student.id).first()
-            all_cls_assignments.append({
-                'assignment': assignment,
-                'submission': submission,
-                'class_name': cls.name,
-                'due_date': assignment.due_date or datetime.utcnow()
-            })
-    # Sort by due_date descending and take top 5
+    # Get recent assignments, sorted by due_date descending
     recent_assignments = sorted(
-        all_cls_assignments, key=lambda x: x['due_date'], reverse=True)[:5]
-    # Remove the helper key
-    for a in recent_assignments:
-        a.pop('due_date', None)
+        workload.items,
+        key=lambda x: x['assignment'].due_date or workload.now, reverse=True)[:5]
+    recent_assignments = [{
+        'assignment': item['assignment'],
+        'submission': item['submission'],
+        'class_name': item['class'].name
+    } for item in recent_assignments]
 
     # Get recent grades
     recent_grades = []
-    all_submissions = list(student.submissions) if student.submissions else []
+    all_submissions = [item for item in workload.items if item['submission']]
     # Sort by submitted_at descending
     all_submissions.sort(
-        key=lambda s: s.submitted_at if s.submitted_at else datetime.utcnow(), reverse=True)
-    for submission in all_submissions[:5]:
+        key=lambda x: x['submission'].submitted_at or workload.now, reverse=True)
+    for item in all_submissions[:5]:
+        submission = item['submission']
         if submission.grade is not None:
             recent_grades.append({
-                'assignment_title': submission.assignment.title if submission.assignment else 'Unknown',
+                'assignment_title': item['assignment'].title,
                 'grade': submission.grade,
                 'submitted_at': submission.submitted_at
             })
@@ -184,66 +169,57 @@ def dashboard():
 # -------------------------
 @student_bp.route("/assignments")
 @login_required
+@read_only
 def assignments():
     student = get_student_or_redirect()
     if not student:
         return redirect(url_for('auth_bp.login'))
 
+    workload = get_student_workload(student)
+
     # Get all assignments from student's classes
     all_assignments = []
-    subjects = set()
-
-    for cls in get_student_classes(student):
-        subjects.add(cls.name)
-        for assignment in cls.assignments.all():
-            submission = assignment.submissions.filter_by(
-                student_id=student.id).first()
-
-            # Determine status
-            if submission:
-                if submission.grade is not None:
-                    status = 'graded'
-                else:
-                    status = 'submitted'
-            else:
-                if assignment.due_date and assignment.due_date < datetime.utcnow():
-                    status = 'overdue'
-                else:
-                    status = 'pending'
-
-            # Calculate days left
-            days_left = None
-            if assignment.due_date and status == 'pending':
-                delta = assignment.due_date - datetime.utcnow()
-                if delta.days >= 0:
-                    days_left = f"{delta.days} days left" if delta.days > 0 else "Due today"
-
-            all_assignments.append({
-                'id': assignment.id,
-                'title': assignment.title,
-                'description': assignment.description,
-                'subject': cls.name,
-                'professor': cls.teacher.full_name if cls.teacher else 'No Teacher',
-                'due_date': assignment.due_date,
-                'due_date_formatted': assignment.due_date.strftime('%b %d, %Y') if assignment.due_date else 'N/A',
-                'status': status,
-                'status_label': status.upper(),
-                'days_left': days_left,
-                'submission': submission,
-                'grade': submission.grade if submission else None,
-                'letter_grade': calculate_letter_grade(submission.grade) if submission and submission.grade else None,
-                'submitted_date': submission.submitted_at.strftime('%b %d, %Y') if submission and submission.submitted_at else None,
-                'graded_date': submission.graded_at.strftime('%b %d, %Y') if submission and submission.graded_at else None,
-                'card_class': 'urgent' if status == 'overdue' else status,
-                'icon': 'fas fa-book',
-                'icon_bg': 'rgba(59, 130, 246, 0.1)',
-                'icon_color': '#3b82f6',
-                'grade_class': 'excellent' if submission and submission.grade and submission.grade >= 90 else 'good' if submission and submission.grade and submission.grade >= 80 else 'average',
-                'file_path': assignment.file_path
-            })
+    subjects = set(cls.name for cls in workload.classes)
+
+    for item in workload.items:
+        cls = item['class']
+        assignment = item['assignment']
+        submission = item['submission']
+        status = item['status']
+
+        # Calculate days left
+        days_left = None
+        if assignment.due_date and status == 'pending':
+            delta = assignment.due_date - workload.now
+            if delta.days >= 0:
+                days_left = f"{delta.days} days left" if delta.days > 0 else "Due today"
+
+        all_assignments.append({
+            'id': assignment.id,
+            'title': assignment.title,
+            'description': assignment.description,
+            'subject': cls.name,
+            'professor': cls.teacher.full_name if cls.teacher else 'No Teacher',
+            'due_date': assignment.due_date,
+            'due_date_formatted': assignment.due_date.strftime('%b %d, %Y') if assignment.due_date else 'N/A',
+            'status': status,
+            'status_label': status.upper(),
+            'days_left': days_left,
+            'submission': submission,
+            'grade': submission.grade if submission else None,
+            'letter_grade': calculate_letter_grade(submission.grade) if submission and submission.grade else None,
+            'submitted_date': submission.submitted_at.strftime('%b %d, %Y') if submission and submission.submitted_at else None,
+            'graded_date': submission.graded_at.strftime('%b %d, %Y') if submission and submission.graded_at else None,
+            'card_class': 'urgent' if status == 'overdue' else status,
+            'icon': 'fas fa-book',
+            'icon_bg': 'rgba(59, 130, 246, 0.1)',
+            'icon_color': '#3b82f6',
+            'grade_class': 'excellent' if submission and submission.grade and submission.grade >= 90 else 'good' if submission and submission.grade and submission.grade >= 80 else 'average',
+            'file_path': assignment.file_path
+        })
 
     # Calculate stats
-    today = datetime.utcnow()
+    today = workload.now
     week_from_now = today + timedelta(days=7)
 
     due_this_week = sum(1 for a in all_assignments
@@ -337,6 +313,7 @@ def assignments():
 # -------------------------
 @student_bp.route("/assignments/<int:assignment_id>/details")
 @login_required
+@read_only
 def assignment_details(assignment_id):
     """Get assignment details for modal"""
     student = get_student_or_redirect()
@@ -350,35 +327,11 @@ def assignment_details(assignment_id):
     if assignment.class_obj not in enrolled_classes:
         return jsonify({'error': 'Unauthorized'}), 403
 
-    # Get assignment files from the upload directory
-    attachments = []
-    assignment_files_dir = os.path.join('static', 'uploads', 'assignments', str(assignment.id))
-    
-    if os.path.exists(assignment_files_dir):
-        for filename in os.listdir(assignment_files_dir):
-            file_path = os.path.join(assignment_files_dir, filename)
-            if os.path.isfile(file_path):
-                # Determine file icon based on extension
-                ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
-                icon_map = {
-                    'pdf': 'pdf',
-                    'doc': 'word',
-                    'docx': 'word',
-                    'txt': 'alt',
-                    'jpg': 'image',
-                    'jpeg': 'image',
-                    'png': 'image',
-                    'xlsx': 'excel',
-                    'xls': 'excel',
-                    'zip': 'archive'
-                }
-                icon = icon_map.get(ext, 'file')
-                
-                attachments.append({
-                    'filename': filename,
-                    'icon': icon,
-                    'url': f'/student/assignments/{assignment_id}/download/{filename}'
-                })
+    # Get assignment files from the attachment manifest
+    attachments = serialize_attachments(
+        assignment,
+        lambda filename: f'/student/assignments/{assignment_id}/download/{filename}'
+    )
 
     return jsonify({
         'id': assignment.id,
@@ -407,34 +360,24 @@ def download_assignment_file(assignment_id, filename):
     if assignment.class_obj not in enrolled_classes:
         return jsonify({'error': 'Unauthorized'}), 403
 
-    # Get the base directory (project root)
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    
-    # Construct file path
-    file_path = os.path.join('static', 'uploads', 'assignments', str(assignment.id), filename)
-    full_path = os.path.join(base_dir, file_path)
-    
-    # Normalize path to handle .. and . correctly
-    full_path = os.path.normpath(os.path.abspath(full_path))
-    base_dir = os.path.normpath(os.path.abspath(base_dir))
-    
-    # Security check: ensure file is within project directory
-    if not full_path.startswith(base_dir):
-        return jsonify({'error': 'Access denied'}), 403
-    
-    # Security check: ensure file exists
-    if not os.path.exists(full_path) or not os.path.isfile(full_path):
+    # Only files recorded in the attachment manifest can be downloaded, which
+    # also rules out directory traversal through the filename
+    attachment = AssignmentAttachment.query.filter_by(
+        assignment_id=assignment.id, filename=filename).first()
+    if not attachment:
+        return jsonify({'error': 'File not found'}), 404
+
+    full_path = attachment_path(attachment)
+    try:
+        return send_upload(full_path, attachment.content_hash, attachment.created_at,
+                           download_name=filename, mimetype=attachment.mime_type)
+    except FileNotFoundError:
         return jsonify({'error': 'File not found'}), 404
-    
-    # Security check: prevent directory traversal
-    if '..' in filename or '/' in filename or '\\' in filename:
-        return jsonify({'error': 'Invalid filename'}), 400
-    
-    return send_file(full_path, as_attachment=False, download_name=filename)
 
 
 @student_bp.route("/assignments/<int:assignment_id>/feedback")
 @login_required
+@read_only
 def assignment_feedback(assignment_id):
     """Get assignment feedback for modal"""
     student = get_student_or_redirect()
@@ -461,6 +404,7 @@ def assignment_feedback(assignment_id):
 
 @student_bp.route("/assignments/<int:assignment_id>/submission")
 @login_required
+@read_only
 def assignment_submission(assignment_id):
     """Get assignment submission details for modal"""
     student = get_student_or_redirect()
@@ -477,7 +421,7 @@ def assignment_submission(assignment_id):
     return jsonify({
         'title': assignment.title,
         'submitted_date': submission.submitted_at.strftime('%b %d, %Y at %I:%M %p') if submission.submitted_at else 'N/A',
-        'submission_file': os.path.basename(submission.file_path) if submission.file_path else 'No file',
+        'submission_file': submission.get_filename() or 'No file',
         'file_icon': 'pdf',
         'comments': submission.comments or 'No comments provided',
         'grading_status': 'Graded' if submission.grade is not None else 'Pending grading'
@@ -514,150 +458,230 @@ def submit_assignment():
             return jsonify({'success': False, 'message': 'Assignment already submitted'}), 400
 
         # Handle file upload
-        file_path = None
         if file and file.filename:
             # Validate file extension
             if not validate_file_extension(file.filename, ALLOWED_EXTENSIONS):
                 return jsonify({'success': False, 'message': 'Invalid file type. Allowed: PDF, DOC, DOCX, TXT, ZIP'}), 400
             
             # Validate MIME type
-            allowed_mime_types = [
-                'application/pdf',
-                'application/msword',
-                'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                'text/plain',
-                'application/zip'
-            ]
-            if not validate_file_mime_type(file, allowed_mime_types):
+            if not validate_file_mime_type(file, ALLOWED_MIME_TYPES):
                 return jsonify({'success': False, 'message': 'Invalid file type. Allowed: PDF, DOC, DOCX, TXT, ZIP'}), 400
             
-            # Generate secure filename
-            filename = generate_secure_filename(file.filename)
+            # Store the file in the blob store under its secure name
+            filename = secure_filename(file.filename)
             if filename:
-                os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-                file_path = os.path.join(UPLOAD_FOLDER, filename)
-                file.save(file_path)
+                content_hash, _ = store_stream(file.stream)
             else:
                 return jsonify({'success': False, 'message': 'Invalid filename'}), 400
         else:
             return jsonify({'success': False, 'message': 'No file provided'}), 400
 
         # Create submission
-        submission = Submission(
-            assignment_id=assignment_id,
-            student_id=student.id,
-            file_path=file_path,
-            comments=comments,
-            submitted_at=datetime.utcnow()
-        )
-
-        db.session.add(submission)
+        create_submission(assignment, student, content_hash, filename, comments)
         db.session.commit()
+        invalidate_teacher_stats(assignment.class_obj.teacher_id)
 
         flash('Assignment submitted successfully!', 'success')
         return jsonify({'success': True, 'message': 'Assignment submitted successfully'})
 
+    except IntegrityError:
+        # A concurrent submission for the same assignment committed first
+        db.session.rollback()
+        return jsonify({'success': False, 'message': 'Assignment already submitted'}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
+# -------------------------
+# Resumable (chunked) submission uploads
+# -------------------------
+# POST /uploads starts an upload, each PUT appends a chunk at the offset
+# given in the Upload-Offset header, GET reports the offset to resume from
+# and POST /uploads/<id>/complete turns the file into a submission.
+
+def upload_status(upload):
+    """JSON body describing an upload's progress"""
+    return {
+        'success': True,
+        'upload_id': upload.id,
+        'offset': upload.received,
+        'size': upload.total_size,
+        'complete': upload.is_complete()
+    }
+
+
+def get_upload_or_404(upload_id, student):
+    """Get one of the student's upload sessions, or abort with 404"""
+    return UploadSession.query.filter_by(id=upload_id, student_id=student.id).first_or_404()
+
+
+@student_bp.route("/uploads", methods=['POST'])
+@login_required
+def start_submission_upload():
+    """Start a resumable submission upload"""
+    student = get_student_or_redirect()
+    if not student:
+        return jsonify({'success': False, 'message': 'Student not found'}), 404
+
+    data = request.get_json(silent=True) or request.form
+    assignment = Assignment.query.get_or_404(data.get('assignment_id'))
+
+    if assignment.class_obj not in get_student_classes(student):
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    if assignment.submissions.filter_by(student_id=student.id).first():
+        return jsonify({'success': False, 'message': 'Assignment already submitted'}), 400
+
+    try:
+        size = int(data.get('size', 0))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'Invalid file size'}), 400
+
+    try:
+        upload = start_upload(assignment, student, data.get('filename'), size,
+                              mime_type=data.get('content_type'),
+                              comments=data.get('comments', ''))
+    except UploadError as e:
+        return jsonify({'success': False, 'message': e.message}), e.status_code
+    db.session.commit()
+
+    status = upload_status(upload)
+    status['chunk_size'] = current_app.config['UPLOAD_CHUNK_SIZE']
+    return jsonify(status), 201
+
+
+@student_bp.route("/uploads/<upload_id>", methods=['GET'])
+@login_required
+def submission_upload_status(upload_id):
+    """Report how many bytes of an upload have been received"""
+    student = get_student_or_redirect()
+    if not student:
+        return jsonify({'success': False, 'message': 'Student not found'}), 404
+    return jsonify(upload_status(get_upload_or_404(upload_id, student)))
+
+
+@student_bp.route("/uploads/<upload_id>", methods=['PUT'])
+@login_required
+def upload_submission_chunk(upload_id):
+    """Append the request body to an upload, streaming it to disk"""
+    student = get_student_or_redirect()
+    if not student:
+        return jsonify({'success': False, 'message': 'Student not found'}), 404
+    upload = get_upload_or_404(upload_id, student)
+
+    try:
+        offset = int(request.headers['Upload-Offset'])
+    except (KeyError, ValueError):
+        return jsonify({'success': False, 'message': 'Upload-Offset header required'}), 400
+
+    try:
+        append_chunk(upload, offset, request.stream)
+    except UploadError as e:
+        if e.status_code == 404:
+            return jsonify({'success': False, 'message': e.message}), 404
+        # Tell the client where to resume
+        body = upload_status(upload)
+        body.update(success=False, message=e.message)
+        return jsonify(body), e.status_code
+    return jsonify(upload_status(upload))
+
+
+@student_bp.route("/uploads/<upload_id>/complete", methods=['POST'])
+@login_required
+def complete_submission_upload(upload_id):
+    """Finalize an upload into a submission"""
+    student = get_student_or_redirect()
+    if not student:
+        return jsonify({'success': False, 'message': 'Student not found'}), 404
+    upload = get_upload_or_404(upload_id, student)
+
+    data = request.get_json(silent=True) or request.form
+    try:
+        finish_upload(upload, expected_hash=data.get('sha256'))
+    except UploadError as e:
+        return jsonify({'success': False, 'message': e.message}), e.status_code
+
+    flash('Assignment submitted successfully!', 'success')
+    return jsonify({'success': True, 'message': 'Assignment submitted successfully'})
+
+
+@student_bp.route("/uploads/<upload_id>", methods=['DELETE'])
+@login_required
+def cancel_submission_upload(upload_id):
+    """Abandon an upload and delete its partial file"""
+    student = get_student_or_redirect()
+    if not student:
+        return jsonify({'success': False, 'message': 'Student not found'}), 404
+    discard_upload(get_upload_or_404(upload_id, student))
+    db.session.commit()
+    return jsonify({'success': True, 'message': 'Upload cancelled'})
+
+
 # -------------------------
 # Grades
 # -------------------------
 @student_bp.route("/grades")
 @login_required
+@read_only
 def grades():
     student = get_student_or_redirect()
     if not student:
         return redirect(url_for('auth_bp.login'))
 
-    # Get all graded submissions
-    all_submissions = []
-    total_grades = []
-
-    for cls in get_student_classes(student):
-        for assignment in cls.assignments.all():
-            submission = assignment.submissions.filter_by(
-                student_id=student.id).first()
-            if submission and submission.grade is not None:
-                all_submissions.append({
-                    'assignment': assignment,
-                    'submission': submission,
-                    'class': cls,
-                    'teacher': cls.teacher
-                })
-                total_grades.append(submission.grade)
+    # Aggregates come from the materialized per-class summaries
+    class_summaries = get_class_summaries(student)
+    totals = combine_summaries(summary for _, summary, _, _ in class_summaries)
+
+    # Graded submissions in the student's current classes, newest first.
+    # Their classes (and teachers) are already in the session from above.
+    graded = (
+        db.session.query(Submission, Assignment, Class)
+        .join(Assignment, Submission.assignment_id == Assignment.id)
+        .join(Class, Assignment.class_id == Class.id)
+        .join(class_student, class_student.c.class_id == Class.id)
+        .filter(class_student.c.student_id == student.id,
+                Submission.student_id == student.id,
+                Submission.grade.isnot(None))
+        .order_by(func.coalesce(Submission.graded_at, Submission.submitted_at).desc())
+        .all()
+    )
+    all_submissions = [{
+        'assignment': assignment,
+        'submission': submission,
+        'class': cls,
+        'teacher': cls.teacher
+    } for submission, assignment, cls in graded]
 
     # Calculate overall stats
-    overall_average = sum(total_grades) / \
-        len(total_grades) if total_grades else 0
-    overall_letter = calculate_letter_grade(
-        overall_average) if total_grades else "N/A"
-    graded_count = len(all_submissions)
-
-    # Count pending grades
-    pending_grades = 0
-    for cls in get_student_classes(student):
-        for assignment in cls.assignments.all():
-            submission = assignment.submissions.filter_by(
-                student_id=student.id).first()
-            if submission and submission.grade is None:
-                pending_grades += 1
-
+    overall_average = totals['average']
     overall_stats = {
         'average': round(overall_average, 1),
-        'letter_grade': overall_letter,
-        'graded_count': graded_count,
-        'pending_count': pending_grades
+        'letter_grade': calculate_letter_grade(overall_average) if totals['graded_count'] else "N/A",
+        'graded_count': totals['graded_count'],
+        'pending_count': totals['pending_count']
     }
 
-    # Calculate performance by subject
+    # Performance by subject
     subjects_performance = []
-    for cls in get_student_classes(student):
-        class_grades = []
-        class_submissions = []
-
-        for assignment in cls.assignments.all():
-            submission = assignment.submissions.filter_by(
-                student_id=student.id).first()
-            if submission and submission.grade is not None:
-                class_grades.append(submission.grade)
-                class_submissions.append(submission)
-
-        if class_grades:
-            avg = sum(class_grades) / len(class_grades)
+    for cls, summary, _, _ in class_summaries:
+        if summary is not None and summary.graded_count:
+            avg = summary.average
             subjects_performance.append({
                 'class': cls,
                 'teacher': cls.teacher,
                 'average': round(avg, 1),
                 'letter_grade': calculate_letter_grade(avg),
-                'assignments_count': len(class_submissions),
-                'highest': max(class_grades),
-                'lowest': min(class_grades)
+                'assignments_count': summary.graded_count,
+                'highest': summary.highest,
+                'lowest': summary.lowest
             })
 
-    # Sort submissions by date
-    all_submissions.sort(
-        key=lambda x: x['submission'].graded_at or x['submission'].submitted_at, reverse=True)
-
-    # Calculate grade distribution
-    grade_distribution = {
-        'A': sum(1 for g in total_grades if g >= 90),
-        'B': sum(1 for g in total_grades if 80 <= g < 90),
-        'C': sum(1 for g in total_grades if 70 <= g < 80),
-        'D': sum(1 for g in total_grades if 60 <= g < 70),
-        'F': sum(1 for g in total_grades if g < 60)
-    }
-
-    total = sum(grade_distribution.values())
+    # Grade distribution as percentages
+    grade_distribution = totals['distribution']
+    total = totals['graded_count']
     if total > 0:
         grade_distribution_percent = {
-            'A': round((grade_distribution['A'] / total) * 100),
-            'B': round((grade_distribution['B'] / total) * 100),
-            'C': round((grade_distribution['C'] / total) * 100),
-            'D': round((grade_distribution['D'] / total) * 100),
-            'F': round((grade_distribution['F'] / total) * 100)
+            letter: round((count / total) * 100) for letter, count in grade_distribution.items()
         }
     else:
         grade_distribution_percent = {'A': 0, 'B': 0, 'C': 0, 'D': 0, 'F': 0}
@@ -692,8 +716,9 @@ def profile():
             student.section = request.form.get('section', '').strip()
 
             # Update user email if provided and changed
+            user = get_current_user_model()
             new_email = request.form.get('email', '').strip()
-            if new_email and new_email != current_user.email:
+            if new_email and new_email != user.email:
                 # Check if email is already taken
                 existing_user = User.query.filter(
                     User.email == new_email,
@@ -704,10 +729,11 @@ def profile():
                     flash('Email is already registered to another user.', 'danger')
                     return redirect(url_for('student_bp.profile'))
 
-                current_user.email = new_email
+                user.email = new_email
 
             # Commit all changes
             db.session.commit()
+            invalidate_user(user.id)
             flash('Profile updated successfully!', 'success')
 
         except Exception as e:
@@ -717,48 +743,30 @@ def profile():
 
         return redirect(url_for('student_bp.profile'))
 
-    # GET request - calculate stats
-    enrolled_classes = len(get_student_classes(student))
-
-    total_grades = []
-    total_assignments = 0
-
-    for cls in get_student_classes(student):
-        for assignment in cls.assignments.all():
-            total_assignments += 1
-            submission = assignment.submissions.filter_by(
-                student_id=student.id).first()
-            if submission and submission.grade is not None:
-                total_grades.append(submission.grade)
-
-    average_grade = round(sum(total_grades) /
-                          len(total_grades), 1) if total_grades else 0
+    # GET request - stats come from the materialized grade summaries
+    class_summaries = get_class_summaries(student)
+    totals = combine_summaries(summary for _, summary, _, _ in class_summaries)
 
     profile_stats = {
-        'courses': enrolled_classes,
-        'average_grade': average_grade,
-        'total_assignments': total_assignments
+        'courses': len(class_summaries),
+        'average_grade': round(totals['average'], 1),
+        'total_assignments': sum(assignment_count for _, _, _, assignment_count in class_summaries)
     }
 
     # Get current courses with grades
     current_courses = []
-    for cls in get_student_classes(student):
-        class_grades = []
-
-        for assignment in cls.assignments.all():
-            submission = assignment.submissions.filter_by(
-                student_id=student.id).first()
-            if submission and submission.grade is not None:
-                class_grades.append(submission.grade)
-
-        course_average = round(sum(class_grades) /
-                               len(class_grades), 1) if class_grades else None
+    for cls, summary, student_count, assignment_count in class_summaries:
+        course_average = summary.average if summary is not None else None
+        if course_average is not None:
+            course_average = round(course_average, 1)
 
         current_courses.append({
             'class': cls,
             'teacher': cls.teacher,
             'average': course_average,
-            'letter_grade': calculate_letter_grade(course_average) if course_average else 'N/A'
+            'letter_grade': calculate_letter_grade(course_average) if course_average else 'N/A',
+            'student_count': student_count or 0,
+            'assignment_count': assignment_count or 0
         })
 
     return render_template(
@@ -774,14 +782,20 @@ def profile():
 # -------------------------
 @student_bp.route("/classes")
 @login_required
+@read_only
 def classes():
     """View available classes and enrolled classes"""
     student = get_student_or_redirect()
     if not student:
         return redirect(url_for('auth_bp.login'))
 
-    # Get all available classes
-    all_classes = Class.query.all()
+    # Get all available classes with their teachers and sizes
+    student_count, assignment_count = class_count_columns()
+    all_classes = (
+        db.session.query(Class, student_count, assignment_count)
+        .options(*loader_options('student_class_list'))
+        .all()
+    )
     
     # Get enrolled class IDs
     student_classes = get_student_classes(student)
@@ -791,7 +805,7 @@ def classes():
     enrolled_classes = []
     available_classes = []
     
-    for cls in all_classes:
+    for cls, student_total, assignment_total in all_classes:
         class_info = {
             'id': cls.id,
             'name': cls.name,
@@ -799,8 +813,8 @@ def classes():
             'teacher': cls.teacher.full_name if cls.teacher else 'No Teacher',
             'teacher_id': cls.teacher_id,
             'created_at': cls.created_at.strftime('%b %d, %Y') if cls.created_at else 'N/A',
-            'student_count': cls.students.count() if cls.students else 0,
-            'assignment_count': cls.assignments.count() if cls.assignments else 0
+            'student_count': student_total,
+            'assignment_count': assignment_total
         }
         
         if cls.id in enrolled_class_ids:
@@ -846,6 +860,8 @@ def join_class_page():
             # Enroll student in class
             student.classes.append(cls)
             db.session.commit()
+            invalidate_teacher_stats(cls.teacher_id)
+            record_activity('class_joined', f'{student.full_name} joined {cls.name}')
             
             flash(f'Successfully joined {cls.name}!', 'success')
             return redirect(url_for('student_bp.classes'))
@@ -891,6 +907,8 @@ def join_class_by_code(class_code):
         # If POST request, enroll the student
         student.classes.append(cls)
         db.session.commit()
+        invalidate_teacher_stats(cls.teacher_id)
+        record_activity('class_joined', f'{student.full_name} joined {cls.name}')
         
         flash(f'Successfully joined {cls.name}!', 'success')
         return redirect(url_for('student_bp.classes'))
@@ -918,6 +936,8 @@ def join_class(class_id):
         # Enroll student in class
         student.classes.append(cls)
         db.session.commit()
+        invalidate_teacher_stats(cls.teacher_id)
+        record_activity('class_joined', f'{student.full_name} joined {cls.name}')
         
         return jsonify({
             'success': True, 
@@ -946,6 +966,8 @@ def leave_class(class_id):
         # Remove student from class
         student.classes.remove(cls)
         db.session.commit()
+        invalidate_teacher_stats(cls.teacher_id)
+        record_activity('class_left', f'{student.full_name} left {cls.name}')
         
         return jsonify({
             'success': True, 
@@ -1,17 +1,29 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, send_file
+from flask import Blueprint, current_app, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
 from extensions import db
 from models.teacher import Teacher
 from models.student import Student
-from models.class_model import Class
+from models.class_model import Class, class_student
 from models.assignment import Assignment
 from models.submission import Submission
+from models.user import User
+from sqlalchemy import func
 from datetime import datetime
 from werkzeug.security import check_password_hash, generate_password_hash
 from werkzeug.utils import secure_filename
 import os
 from pathlib import Path
+from utils.activity import record_activity
+from utils.attachments import save_attachment
+from utils.downloads import send_upload
+from utils.exports import EXPORT_FORMATS, export_batches, stream_export
+from utils.grading import apply_grades
 from utils.helpers import generate_secure_filename, validate_file_extension, validate_file_mime_type
+from utils.identity import get_current_teacher, get_current_user_model, invalidate_user
+from utils.loaders import class_count_columns, loader_options
+from utils.replica import read_only
+from utils.submissions import resolve_submission_file
+from utils.teacher_stats import get_teacher_stats, invalidate_teacher_stats
 
 teacher_bp = Blueprint("teacher_bp", __name__, url_prefix="/teacher")
 
@@ -28,6 +40,10 @@ def teacher_required(f):
         if not current_user.is_authenticated or current_user.role != "teacher":
             flash("Access denied.", "danger")
             return redirect(url_for("auth_bp.login"))
+        # Resolve the profile once; handlers reuse it via get_current_teacher()
+        if get_current_teacher() is None:
+            flash("Teacher profile not found. Please contact administrator.", "danger")
+            return redirect(url_for("auth_bp.login"))
         return f(*args, **kwargs)
     return wrapper
 
@@ -38,79 +54,25 @@ def teacher_required(f):
 @teacher_bp.route("/dashboard")
 @login_required
 @teacher_required
+@read_only
 def dashboard():
-    teacher = Teacher.query.filter_by(user_id=current_user.id).first()
+    teacher = get_current_teacher()
+    cached = get_teacher_stats(teacher.id)
 
-    # Calculate stats
-    classes_taught = Class.query.filter_by(teacher_id=teacher.id).all()
-    total_students = 0
-    for cls in classes_taught:
-        total_students += cls.students.count()
-    total_classes = len(classes_taught)
-
-    # Pending grading: submissions without a grade
-    pending_assignments = Submission.query.join(Assignment, Submission.assignment_id == Assignment.id).join(
-        Class, Assignment.class_id == Class.id).filter(Class.teacher_id == teacher.id, Submission.grade == None).count()
-
-    # Upcoming deadlines: assignments with due dates in the future
-    from datetime import datetime, timedelta
-    upcoming = Assignment.query.join(Class, Assignment.class_id == Class.id).filter(
-        Class.teacher_id == teacher.id, Assignment.due_date > datetime.utcnow()).count()
-
-    stats = {
-        "total_students": total_students,
-        "total_classes": total_classes,
-        "pending_assignments": pending_assignments,
-        "upcoming_deadlines": upcoming,
-    }
-
-    # Recent classes (limit 5)
-    recent_classes = Class.query.filter_by(
-        teacher_id=teacher.id).limit(5).all()
-    classes_formatted = []
-    for cls in recent_classes:
-        student_count = cls.students.count()
-        classes_formatted.append({
-            "id": cls.id,
-            "name": cls.name,
-            "student_count": student_count,
-        })
-
-    # Recent assignments (limit 5)
-    recent_assignments = Assignment.query.join(Class, Assignment.class_id == Class.id).filter(
-        Class.teacher_id == teacher.id).order_by(Assignment.created_at.desc()).limit(5).all()
-    assignments_formatted = []
-    for assignment in recent_assignments:
-        assignments_formatted.append({
-            "id": assignment.id,
-            "title": assignment.title,
-            "due_date": assignment.due_date.strftime("%b %d, %Y") if assignment.due_date else "No date",
-            "status": "pending",  # or compute based on submission grades
-        })
+    return render_template("teacher/dashboard.html", teacher=teacher, stats=cached.counts(),
+                           recent_classes=cached.recent_classes,
+                           recent_assignments=cached.recent_assignments,
+                           recent_students=cached.recent_students)
 
-    # Recent students (limit 5) - those with recent submissions
-    recent_students = (
-        db.session.query(Student, Assignment, Submission)
-        .join(Class, Student.classes)
-        .join(Assignment, Assignment.class_id == Class.id)
-        .join(Submission, Submission.student_id == Student.id)
-        .filter(Class.teacher_id == teacher.id)
-        .order_by(Submission.submitted_at.desc())
-        .limit(5)
-        .all()
-    )
-    students_formatted = []
-    for student, assignment, submission in recent_students:
-        students_formatted.append({
-            "id": student.id,
-            "first_name": student.first_name or "",
-            "last_name": student.last_name or "",
-            "class_name": assignment.class_obj.name if assignment.class_obj else "",
-            "last_assignment": assignment.title,
-            "grade": submission.grade if submission.grade else None,
-        })
 
-    return render_template("teacher/dashboard.html", teacher=teacher, stats=stats, recent_classes=classes_formatted, recent_assignments=assignments_formatted, recent_students=students_formatted)
+@teacher_bp.route("/stats", methods=["GET"])
+@login_required
+@teacher_required
+@read_only
+def dashboard_stats():
+    """Dashboard statistics as JSON, served from the per-teacher cache"""
+    teacher = get_current_teacher()
+    return jsonify({"success": True, **get_teacher_stats(teacher.id).to_dict()})
 
 
 # ---------------------------------------------------------
@@ -119,20 +81,28 @@ def dashboard():
 @teacher_bp.route("/students")
 @login_required
 @teacher_required
+@read_only
 def students():
-    teacher = Teacher.query.filter_by(user_id=current_user.id).first()
+    teacher = get_current_teacher()
 
-    # Get all classes taught by this teacher
-    classes_taught = Class.query.filter_by(teacher_id=teacher.id).all()
+    # Every (student, class) enrollment in this teacher's classes
+    enrollments = (
+        db.session.query(Student, Class)
+        .join(class_student, class_student.c.student_id == Student.id)
+        .join(Class, class_student.c.class_id == Class.id)
+        .filter(Class.teacher_id == teacher.id)
+        .options(*loader_options('teacher_student_list'))
+        .order_by(Class.id, Student.id)
+        .all()
+    )
 
-    # Get all students in those classes (remove duplicates)
+    # List each student once, under the first of their classes
     all_students = []
     student_ids = set()
-    for cls in classes_taught:
-        for student in cls.students:
-            if student.id not in student_ids:
-                all_students.append((student, cls))
-                student_ids.add(student.id)
+    for student, cls in enrollments:
+        if student.id not in student_ids:
+            all_students.append((student, cls))
+            student_ids.add(student.id)
 
     formatted = []
     for student, cls in all_students:
@@ -152,16 +122,19 @@ def students():
 @teacher_bp.route("/classes")
 @login_required
 @teacher_required
+@read_only
 def classes():
-    teacher = Teacher.query.filter_by(user_id=current_user.id).first()
+    teacher = get_current_teacher()
 
-    classes = Class.query.filter_by(teacher_id=teacher.id).all()
+    student_count, assignment_count = class_count_columns()
+    classes = (
+        db.session.query(Class, student_count, assignment_count)
+        .filter(Class.teacher_id == teacher.id)
+        .all()
+    )
 
     formatted = []
-    for cls in classes:
-        student_count = cls.students.count()
-        assignment_count = cls.assignments.count()
-
+    for cls, student_count, assignment_count in classes:
         formatted.append({
             "id": cls.id,
             "name": cls.name,
@@ -181,23 +154,24 @@ def classes():
 @teacher_bp.route("/assignments")
 @login_required
 @teacher_required
+@read_only
 def assignments():
-    teacher = Teacher.query.filter_by(user_id=current_user.id).first()
+    teacher = get_current_teacher()
 
     assignments = (
-        db.session.query(Assignment, Class)
-        .join(Class, Assignment.class_id == Class.id)
+        Assignment.query
+        .join(Assignment.class_obj)
         .filter(Class.teacher_id == teacher.id)
+        .options(*loader_options('teacher_assignment_list'))
         .all()
     )
 
     formatted = []
-    for assignment, cls in assignments:
-        # Count total submissions and graded submissions
-        total_submissions = Submission.query.filter_by(
-            assignment_id=assignment.id).count()
-        graded_submissions = Submission.query.filter_by(
-            assignment_id=assignment.id).filter(Submission.grade != None).count()
+    for assignment in assignments:
+        cls = assignment.class_obj
+        # Submission counters are maintained on the assignment row
+        total_submissions = assignment.get_submissions_count()
+        graded_submissions = assignment.get_graded_count()
 
         # Determine status
         if total_submissions == 0:
@@ -235,8 +209,9 @@ def assignments():
 @teacher_bp.route("/grades")
 @login_required
 @teacher_required
+@read_only
 def grades():
-    teacher = Teacher.query.filter_by(user_id=current_user.id).first()
+    teacher = get_current_teacher()
 
     grades = (
         db.session.query(Submission, Student, Assignment, Class)
@@ -267,7 +242,7 @@ def grades():
 @login_required
 @teacher_required
 def profile():
-    teacher = Teacher.query.filter_by(user_id=current_user.id).first()
+    teacher = get_current_teacher()
 
     if request.method == "POST":
         try:
@@ -277,6 +252,7 @@ def profile():
             teacher.bio = request.form.get("bio", "")
 
             db.session.commit()
+            invalidate_user(current_user.id)
             flash("Profile updated!", "success")
         except:
             db.session.rollback()
@@ -293,9 +269,10 @@ def profile():
 @teacher_bp.route("/students/<int:id>")
 @login_required
 @teacher_required
+@read_only
 def view_student(id):
     student = Student.query.get_or_404(id)
-    teacher = Teacher.query.filter_by(user_id=current_user.id).first()
+    teacher = get_current_teacher()
 
     # Check that student is in one of teacher's classes
     # Use safe method to get student classes (handles both dynamic and list)
@@ -309,11 +286,15 @@ def view_student(id):
         return redirect(url_for("teacher_bp.students"))
 
     # Get student submissions and grades
-    submissions = Submission.query.filter_by(student_id=student.id).all()
+    submissions = (
+        Submission.query.filter_by(student_id=student.id)
+        .options(*loader_options('teacher_student_detail'))
+        .all()
+    )
 
     formatted_submissions = []
     for submission in submissions:
-        assignment = Assignment.query.get(submission.assignment_id)
+        assignment = submission.assignment
         if assignment and assignment.class_id in teacher_class_ids:
             formatted_submissions.append({
                 "id": submission.id,
@@ -340,11 +321,13 @@ def change_password():
     if new_password != confirm:
         return jsonify({"success": False, "message": "Passwords do not match"}), 400
 
-    if not check_password_hash(current_user.password, current_password):
+    user = get_current_user_model()
+    if not check_password_hash(user.password, current_password):
         return jsonify({"success": False, "message": "Incorrect current password"}), 400
 
-    current_user.password = generate_password_hash(new_password)
+    user.password = generate_password_hash(new_password)
     db.session.commit()
+    invalidate_user(user.id)
 
     return jsonify({"success": True, "message": "Password updated"})
 
@@ -356,63 +339,100 @@ def change_password():
 @login_required
 @teacher_required
 def grade_submission(id):
-    submission = Submission.query.get_or_404(id)
-    teacher = Teacher.query.filter_by(user_id=current_user.id).first()
+    teacher = get_current_teacher()
 
-    # Verify submission belongs to teacher's class
-    assignment = Assignment.query.get(submission.assignment_id)
-    cls = Class.query.get(assignment.class_id)
-    if cls.teacher_id != teacher.id:
-        return jsonify({"success": False, "message": "Unauthorized"}), 403
+    # Ownership, validation and the write are handled by apply_grades
+    result = apply_grades(teacher, [{
+        "submission_id": id,
+        "grade": request.form.get("grade", ""),
+        "feedback": request.form.get("feedback", ""),
+    }])[0]
 
-    grade_str = request.form.get("grade", "").strip()
-    feedback = request.form.get("feedback", "").strip()
+    if not result["success"]:
+        return jsonify({"success": False, "message": result["message"]}), result["status"]
+    return jsonify({"success": True, "message": result["message"], "grade": result["grade"]})
 
-    # Validate grade
-    try:
-        grade = float(grade_str)
-        if grade < 0 or grade > 100:
-            return jsonify({"success": False, "message": "Grade must be between 0 and 100"}), 400
-    except (ValueError, TypeError):
-        return jsonify({"success": False, "message": "Invalid grade format"}), 400
 
-    submission.grade = grade
-    submission.feedback = feedback
-    submission.graded_at = datetime.utcnow()
-
-    db.session.commit()
+# ---------------------------------------------------------
+# Bulk Grade Submissions
+# ---------------------------------------------------------
+@teacher_bp.route("/submissions/grade", methods=["POST"])
+@login_required
+@teacher_required
+def bulk_grade_submissions():
+    """
+    Grade many submissions at once
+
+    Expects JSON: {"grades": [{"submission_id": 1, "grade": 95, "feedback": "..."}, ...]}
+    and reports a result for each entry.
+    """
+    teacher = get_current_teacher()
+    data = request.get_json(silent=True) or {}
+    entries = data.get("grades")
+
+    if not isinstance(entries, list) or not entries:
+        return jsonify({"success": False, "message": "A non-empty 'grades' list is required"}), 400
+    limit = current_app.config.get("BULK_GRADE_LIMIT", 500)
+    if len(entries) > limit:
+        return jsonify({"success": False, "message": f"At most {limit} grades per request"}), 413
+
+    results = apply_grades(teacher, entries)
+    saved = sum(1 for result in results if result["success"])
 
-    return jsonify({"success": True, "message": "Grade saved!", "grade": grade})
+    return jsonify({
+        "success": saved == len(results),
+        "message": f"Saved {saved} of {len(results)} grades",
+        "saved": saved,
+        "failed": len(results) - saved,
+        "results": results,
+    })
 
 
 # ---------------------------------------------------------
 # Export Grades
 # ---------------------------------------------------------
+def export_format():
+    """Requested export format (?format=json|csv|ndjson), or None if unsupported"""
+    fmt = request.args.get("format", "json").lower()
+    return fmt if fmt in EXPORT_FORMATS else None
+
+
+def unsupported_export_format():
+    formats = ", ".join(EXPORT_FORMATS)
+    return jsonify({"success": False, "message": f"Unsupported format. Use one of: {formats}"}), 400
+
+
 @teacher_bp.route("/export_grades", methods=["GET"])
 @login_required
 @teacher_required
+@read_only
 def export_grades():
-    teacher = Teacher.query.filter_by(user_id=current_user.id).first()
-
-    grades = (
-        db.session.query(Submission, Student, Assignment, Class)
+    fmt = export_format()
+    if fmt is None:
+        return unsupported_export_format()
+    teacher = get_current_teacher()
+
+    # Plain columns rather than entities, so batches are not kept in the session
+    query = export_batches(
+        db.session.query(Student.first_name, Student.last_name, Class.name,
+                         Assignment.title, Submission.grade)
         .join(Student, Submission.student_id == Student.id)
         .join(Assignment, Submission.assignment_id == Assignment.id)
         .join(Class, Assignment.class_id == Class.id)
         .filter(Class.teacher_id == teacher.id)
-        .all()
+        .order_by(Class.name, Assignment.title, Submission.id)
     )
 
-    formatted = []
-    for submission, student, assignment, cls in grades:
-        formatted.append({
-            "student": f"{student.first_name or ''} {student.last_name or ''}".strip(),
-            "class": cls.name,
-            "assignment": assignment.title,
-            "grade": submission.grade if submission.grade else "N/A",
-        })
-
-    return jsonify({"success": True, "data": formatted})
+    rows = (
+        {
+            "student": f"{first_name or ''} {last_name or ''}".strip(),
+            "class": class_name,
+            "assignment": title,
+            "grade": grade if grade is not None else "N/A",
+        }
+        for first_name, last_name, class_name, title, grade in query
+    )
+    return stream_export(rows, ["student", "class", "assignment", "grade"], fmt, "grades_export")
 
 
 # ---------------------------------------------------------
@@ -421,27 +441,36 @@ def export_grades():
 @teacher_bp.route("/export_students", methods=["GET"])
 @login_required
 @teacher_required
+@read_only
 def export_students():
-    teacher = Teacher.query.filter_by(user_id=current_user.id).first()
-    classes_taught = Class.query.filter_by(teacher_id=teacher.id).all()
-
-    all_students = []
-    student_ids = set()
-    for cls in classes_taught:
-        for student in cls.students:
-            if student.id not in student_ids:
-                all_students.append((student, cls))
-                student_ids.add(student.id)
-
-    formatted = []
-    for student, cls in all_students:
-        formatted.append({
-            "name": f"{student.first_name or ''} {student.last_name or ''}".strip(),
-            "email": student.user.email if student.user else "",
-            "class": cls.name,
-        })
+    fmt = export_format()
+    if fmt is None:
+        return unsupported_export_format()
+    teacher = get_current_teacher()
+
+    # One row per student, listed under the first of the teacher's classes
+    # (by name) they are enrolled in
+    query = export_batches(
+        db.session.query(Student.id, Student.first_name, Student.last_name,
+                         User.email, func.min(Class.name))
+        .join(class_student, class_student.c.student_id == Student.id)
+        .join(Class, Class.id == class_student.c.class_id)
+        .outerjoin(User, User.id == Student.user_id)
+        .filter(Class.teacher_id == teacher.id)
+        .group_by(Student.id, Student.first_name, Student.last_name, User.email)
+        .order_by(Student.id)
+    )
 
-    return jsonify({"success": True, "data": formatted})
+    rows = (
+        {
+            "id": student_id,
+            "name": f"{first_name or ''} {last_name or ''}".strip(),
+            "email": email or "",
+            "class": class_name,
+        }
+        for student_id, first_name, last_name, email, class_name in query
+    )
+    return stream_export(rows, ["id", "name", "email", "class"], fmt, "students_export")
 
 
 # ---------------------------------------------------------
@@ -451,7 +480,7 @@ def export_students():
 @login_required
 @teacher_required
 def create_class():
-    teacher = Teacher.query.filter_by(user_id=current_user.id).first()
+    teacher = get_current_teacher()
 
     name = request.form.get("name", "").strip()
     description = request.form.get("description", "").strip()
@@ -462,6 +491,7 @@ def create_class():
     cls = Class(name=name, description=description, teacher_id=teacher.id)
     db.session.add(cls)
     db.session.commit()
+    invalidate_teacher_stats(teacher.id)
 
     # Generate join link
     join_link = cls.get_join_link(request.url_root.rstrip('/'))
@@ -483,7 +513,7 @@ def create_class():
 @login_required
 @teacher_required
 def create_assignment():
-    teacher = Teacher.query.filter_by(user_id=current_user.id).first()
+    teacher = get_current_teacher()
 
     class_id = request.form.get("class_id", type=int)
     title = request.form.get("title", "").strip()
@@ -509,15 +539,13 @@ def create_assignment():
         title=title, description=description, class_id=class_id, due_date=due_date)
     db.session.add(assignment)
     db.session.commit()
+    invalidate_teacher_stats(teacher.id)
+    record_activity('assignment_created', f'Assignment "{title}" created in {cls.name}')
 
     # Handle file uploads
     if 'assignment_file' in request.files:
         files = request.files.getlist('assignment_file')
 
-        # Create upload directory if it doesn't exist
-        upload_dir = Path("static/uploads/assignments") / str(assignment.id)
-        upload_dir.mkdir(parents=True, exist_ok=True)
-
         allowed_extensions = {'pdf', 'doc', 'docx',
                               'txt', 'jpg', 'jpeg', 'png', 'xlsx', 'xls'}
 
@@ -544,9 +572,10 @@ def create_assignment():
                 # Generate secure filename
                 filename = generate_secure_filename(file.filename)
                 if filename:
-                    # Save file
-                    file_path = upload_dir / filename
-                    file.save(str(file_path))
+                    # Save file and record it in the attachment manifest
+                    save_attachment(assignment, file, filename)
+
+        db.session.commit()
 
     return jsonify({"success": True, "message": "Assignment created!", "assignment_id": assignment.id})
 
@@ -558,7 +587,7 @@ def create_assignment():
 @login_required
 @teacher_required
 def upload_avatar():
-    teacher = Teacher.query.filter_by(user_id=current_user.id).first()
+    teacher = get_current_teacher()
 
     if "avatar" not in request.files:
         return jsonify({"success": False, "message": "No file provided"}), 400
@@ -579,7 +608,7 @@ def upload_avatar():
 @login_required
 @teacher_required
 def update_notifications():
-    teacher = Teacher.query.filter_by(user_id=current_user.id).first()
+    teacher = get_current_teacher()
 
     # Get notification preferences from form
     email_notifications = request.form.get("email_notifications") == "on"
@@ -596,9 +625,10 @@ def update_notifications():
 @teacher_bp.route("/classes/<int:class_id>")
 @login_required
 @teacher_required
+@read_only
 def view_class(class_id):
     cls = Class.query.get_or_404(class_id)
-    teacher = Teacher.query.filter_by(user_id=current_user.id).first()
+    teacher = get_current_teacher()
 
     # Check that class belongs to teacher
     if cls.teacher_id != teacher.id:
@@ -606,7 +636,7 @@ def view_class(class_id):
         return redirect(url_for("teacher_bp.classes"))
 
     # Get students in this class
-    students = cls.students.all()
+    students = cls.students.options(*loader_options('teacher_class_roster')).all()
     students_formatted = []
     for student in students:
         students_formatted.append({
@@ -619,7 +649,7 @@ def view_class(class_id):
     assignments = Assignment.query.filter_by(class_id=class_id).all()
     assignments_formatted = []
     for assignment in assignments:
-        submissions_count = assignment.submissions.count() if assignment.submissions else 0
+        submissions_count = assignment.get_submissions_count()
         assignments_formatted.append({
             "id": assignment.id,
             "title": assignment.title,
@@ -636,9 +666,10 @@ def view_class(class_id):
 @teacher_bp.route("/assignments/<int:assignment_id>")
 @login_required
 @teacher_required
+@read_only
 def view_assignment(assignment_id):
     assignment = Assignment.query.get_or_404(assignment_id)
-    teacher = Teacher.query.filter_by(user_id=current_user.id).first()
+    teacher = get_current_teacher()
     cls = Class.query.get(assignment.class_id)
 
     # Check that assignment's class belongs to teacher
@@ -647,10 +678,14 @@ def view_assignment(assignment_id):
         return redirect(url_for("teacher_bp.assignments"))
 
     # Get submissions for this assignment
-    submissions = Submission.query.filter_by(assignment_id=assignment_id).all()
+    submissions = (
+        Submission.query.filter_by(assignment_id=assignment_id)
+        .options(*loader_options('teacher_assignment_detail'))
+        .all()
+    )
     submissions_formatted = []
     for submission in submissions:
-        student = Student.query.get(submission.student_id)
+        student = submission.student
         submissions_formatted.append({
             "id": submission.id,
             "student_name": f"{student.first_name or ''} {student.last_name or ''}".strip(),
@@ -673,7 +708,7 @@ def view_assignment(assignment_id):
 def download_submission(submission_id):
     """Download a submission file"""
     submission = Submission.query.get_or_404(submission_id)
-    teacher = Teacher.query.filter_by(user_id=current_user.id).first()
+    teacher = get_current_teacher()
     
     # Get the assignment and verify teacher owns the class
     assignment = Assignment.query.get(submission.assignment_id)
@@ -691,24 +726,9 @@ def download_submission(submission_id):
         flash("No file attached to this submission.", "warning")
         return redirect(url_for("teacher_bp.view_assignment", assignment_id=assignment.id))
     
-    # Get the base directory (project root)
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    
-    # Handle Windows path separators and normalize
-    file_path = submission.file_path.replace('\\', os.sep).replace('/', os.sep)
-    
-    # Construct full path
-    if os.path.isabs(file_path):
-        full_path = file_path
-    else:
-        # Relative path from project root
-        full_path = os.path.join(base_dir, file_path)
-    
-    # Normalize path to handle .. and . correctly
-    full_path = os.path.normpath(os.path.abspath(full_path))
-    
-    # Security check: ensure file is within project directory
-    if not full_path.startswith(base_dir):
+    # Security check: ensure file is within the submissions folder
+    full_path = resolve_submission_file(submission.file_path)
+    if full_path is None:
         flash("Access denied.", "danger")
         return redirect(url_for("teacher_bp.view_assignment", assignment_id=assignment.id))
     
@@ -717,10 +737,8 @@ def download_submission(submission_id):
         flash("File not found.", "danger")
         return redirect(url_for("teacher_bp.view_assignment", assignment_id=assignment.id))
     
-    # Get filename for download
-    filename = os.path.basename(full_path)
-    
-    return send_file(full_path, as_attachment=False, download_name=filename)
+    return send_upload(full_path, submission.content_hash, submission.submitted_at,
+                       download_name=submission.get_filename())
 
 
 # ---------------------------------------------------------
@@ -729,6 +747,7 @@ def download_submission(submission_id):
 @teacher_bp.route("/assignments/<int:assignment_id>/grade")
 @login_required
 @teacher_required
+@read_only
 def grade_assignment(assignment_id):
     # Same as view_assignment - shows submission list with grading capability
     return view_assignment(assignment_id)
@@ -0,0 +1,144 @@
+import re
+import unittest
+from datetime import datetime
+from sqlalchemy import event
+from app import create_app, db
+from models.user import User
+from models.student import Student
+from models.teacher import Teacher
+from models.class_model import Class
+from models.assignment import Assignment
+from models.submission import Submission
+from models.activity_event import ActivityEvent
+from werkzeug.security import generate_password_hash
+
+
+class ActivityLogTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'WTF_CSRF_ENABLED': False,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+            'ACTIVITY_LOG_PER_PAGE': 3,
+        })
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            users = {name: User(username=name, email=f"{name}@example.com",
+                                password=generate_password_hash("testpass1"), role=name)
+                     for name in ("admin", "teacher", "student")}
+            db.session.add_all(users.values())
+            db.session.flush()
+            teacher = Teacher(user_id=users["teacher"].id)
+            student = Student(user_id=users["student"].id, first_name="Ada", last_name="King")
+            db.session.add_all([teacher, student])
+            db.session.flush()
+            cls = Class(name="Math", teacher_id=teacher.id)
+            db.session.add(cls)
+            db.session.flush()
+            assignment = Assignment(title="Algebra", description="d", class_id=cls.id)
+            db.session.add(assignment)
+            db.session.flush()
+            self.submission_ids = []
+            for n in range(4):
+                other = User(username=f"s{n}", email=f"s{n}@example.com", password="x", role="student")
+                db.session.add(other)
+                db.session.flush()
+                profile = Student(user_id=other.id)
+                db.session.add(profile)
+                db.session.flush()
+                submission = Submission(assignment_id=assignment.id, student_id=profile.id)
+                db.session.add(submission)
+                db.session.flush()
+                self.submission_ids.append(submission.id)
+            Assignment.adjust_counters(assignment.id, submissions=4)
+            db.session.commit()
+            self.class_id = cls.id
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def login(self, name):
+        client = self.app.test_client()
+        client.post("/login", data={"email": f"{name}@example.com", "password": "testpass1"})
+        return client
+
+    def events(self, event_type=None):
+        with self.app.app_context():
+            query = ActivityEvent.query.order_by(ActivityEvent.id)
+            if event_type:
+                query = query.filter_by(type=event_type)
+            return [(e.type, e.description, e.actor_id) for e in query]
+
+    def test_bulk_grading_writes_events_in_one_insert(self):
+        teacher = self.login("teacher")
+        inserts = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("INSERT INTO activity_events"):
+                inserts.append(executemany)
+
+        with self.app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            response = teacher.post("/teacher/submissions/grade", json={"grades": [
+                {"submission_id": submission_id, "grade": 80} for submission_id in self.submission_ids]})
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+        self.assertEqual(response.get_json()["saved"], 4)
+        self.assertEqual(inserts, [True])
+        graded = self.events("assignment_graded")
+        self.assertEqual(len(graded), 4)
+        self.assertIn('"Algebra" graded', graded[0][1])
+
+    def test_registration_and_enrollment_are_logged(self):
+        self.client.post("/register", data={"username": "newbie", "email": "newbie@example.com",
+                                            "password": "Testpass1!", "confirm_password": "Testpass1!",
+                                            "role": "student"})
+        self.assertEqual([e[1] for e in self.events("user_registered")],
+                         ["New student registered: newbie"])
+
+        student = self.login("student")
+        student.post(f"/student/classes/{self.class_id}/join")
+        student.post(f"/student/classes/{self.class_id}/leave")
+        logged = self.events()
+        self.assertEqual([e[0] for e in logged[-2:]], ["class_joined", "class_left"])
+        self.assertEqual(logged[-1][1], "Ada King left Math")
+
+    def test_view_filters_and_pages_in_sql(self):
+        with self.app.app_context():
+            for day in range(1, 8):
+                db.session.add(ActivityEvent(type="user_registered" if day % 2 else "role_changed",
+                                             description=f"event {day}",
+                                             timestamp=datetime(2024, 3, day, 12)))
+            db.session.commit()
+        admin = self.login("admin")
+
+        def collect(url):
+            seen = []
+            while url:
+                html = admin.get(url).get_data(as_text=True)
+                seen.extend(re.findall(r"event \d", html))
+                match = re.search(r'href="([^"]*cursor=[^"]*)"[^>]*>\s*Next Page', html)
+                url = match.group(1).replace("&amp;", "&") if match else None
+            return seen
+
+        self.assertEqual(collect("/admin/activity-log"), [f"event {d}" for d in range(7, 0, -1)])
+        self.assertEqual(collect("/admin/activity-log?type=role_changed"), ["event 6", "event 4", "event 2"])
+        self.assertEqual(collect("/admin/activity-log?start=2024-03-03&end=2024-03-05"),
+                         ["event 5", "event 4", "event 3"])
+        self.assertEqual(collect("/admin/activity-log?type=bogus&start=nope"),
+                         [f"event {d}" for d in range(7, 0, -1)])
+
+    def test_backfill_command(self):
+        runner = self.app.test_cli_runner()
+        self.assertIn("Wrote 8", runner.invoke(args=["backfill-activity"]).output)
+        self.assertIn("nothing to do", runner.invoke(args=["backfill-activity"]).output)
+
+
+if __name__ == "__main__":
+    unittest.main()
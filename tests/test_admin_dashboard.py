@@ -0,0 +1,126 @@
+import unittest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import create_app, db
+from models.user import User
+from models.teacher import Teacher
+from models.class_model import Class
+from models.assignment import Assignment
+from utils.cache import TTLCache
+from werkzeug.security import generate_password_hash
+
+
+class AdminDashboardTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'WTF_CSRF_ENABLED': False,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        })
+        self.now = 1000.0
+        self.app.extensions['admin_stats_cache'] = TTLCache(maxsize=1, ttl=30, clock=lambda: self.now)
+
+        with self.app.app_context():
+            db.create_all()
+            for name in ("admin", "admin2"):
+                db.session.add(User(username=name, email=f"{name}@example.com",
+                                    password=generate_password_hash("testpass1"), role="admin"))
+            teacher_user = User(username="teacher", email="teacher@example.com", password="x", role="teacher")
+            db.session.add(teacher_user)
+            for i in range(6):
+                db.session.add(User(username=f"s{i}", email=f"s{i}@example.com", password="x",
+                                    role="student", status="inactive" if i == 0 else "active"))
+            db.session.flush()
+            teacher = Teacher(user_id=teacher_user.id)
+            db.session.add(teacher)
+            db.session.flush()
+            cls = Class(name="Math", teacher_id=teacher.id)
+            db.session.add(cls)
+            db.session.flush()
+            db.session.add_all([
+                Assignment(title="Past", description="d", class_id=cls.id, status="pending",
+                           due_date=datetime.utcnow() - timedelta(days=1),
+                           submission_count=4, graded_count=3),
+                Assignment(title="Future", description="d", class_id=cls.id, status="active",
+                           due_date=datetime.utcnow() + timedelta(days=1),
+                           submission_count=2, graded_count=0),
+            ])
+            db.session.commit()
+
+        self.client = self.app.test_client()
+        self.client.post("/login", data={"email": "admin@example.com", "password": "testpass1"})
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def load_dashboard(self, client):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with self.app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            response = client.get("/admin/dashboard")
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        self.assertEqual(response.status_code, 200)
+        return response, [s for s in statements if "count(" in s.lower()]
+
+    def test_snapshot_totals(self):
+        from utils.stats import get_admin_snapshot
+
+        with self.app.app_context():
+            snapshot = get_admin_snapshot()
+        self.assertEqual(snapshot.stats, {
+            'total_users': 9, 'total_teachers': 1, 'total_students': 6,
+            'total_admins': 2, 'active_users': 8, 'total_assignments': 2,
+        })
+        self.assertEqual(snapshot.assignments, {
+            'total': 2, 'pending': 1, 'late': 1, 'submissions': 6, 'graded': 3,
+        })
+
+    def test_cached_snapshot_is_read_only(self):
+        from utils.stats import get_admin_snapshot
+
+        with self.app.app_context():
+            snapshot = get_admin_snapshot()
+            with self.assertRaises(TypeError):
+                snapshot.assignments['total'] = 0
+            with self.assertRaises(TypeError):
+                snapshot.users[('admin', 'active')] = 0
+            self.assertEqual(get_admin_snapshot().assignments['total'], 2)
+
+    def test_dashboard_uses_two_rollups(self):
+        response, counts = self.load_dashboard(self.client)
+        self.assertEqual(len(counts), 2)
+        self.assertIn(b"Statistics computed at", response.data)
+
+    def test_snapshot_shared_across_admin_sessions(self):
+        self.load_dashboard(self.client)
+
+        other = self.app.test_client()
+        other.post("/login", data={"email": "admin2@example.com", "password": "testpass1"})
+        _, counts = self.load_dashboard(other)
+        self.assertEqual(counts, [])
+
+        self.now += 31
+        _, counts = self.load_dashboard(other)
+        self.assertEqual(len(counts), 2)
+
+    def test_admin_changes_refresh_snapshot(self):
+        self.load_dashboard(self.client)
+        with self.app.app_context():
+            user_id = User.query.filter_by(username="s1").one().id
+        self.client.post(f"/admin/users/{user_id}/delete")
+
+        response, counts = self.load_dashboard(self.client)
+        self.assertEqual(len(counts), 2)
+        self.assertIn(b">8<", response.data.replace(b" ", b""))
+
+
+if __name__ == "__main__":
+    unittest.main()
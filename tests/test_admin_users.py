@@ -0,0 +1,93 @@
+import re
+import unittest
+from datetime import datetime
+from sqlalchemy import event
+from app import create_app, db
+from models.user import User
+from models.student import Student
+from werkzeug.security import generate_password_hash
+
+
+class AdminUserListingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'WTF_CSRF_ENABLED': False,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+            'ADMIN_USERS_PER_PAGE': 3,
+        })
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            admin = User(username="admin", email="admin@example.com",
+                         password=generate_password_hash("testpass1"), role="admin",
+                         created_at=datetime(2024, 1, 1))
+            db.session.add(admin)
+            # Several users share a timestamp so paging has to break ties on id
+            same_time = datetime(2024, 2, 1, 9, 30)
+            for i in range(7):
+                user = User(username=f"student{i}", email=f"student{i}@example.com",
+                            password="x", role="student", created_at=same_time)
+                db.session.add(user)
+                db.session.flush()
+                db.session.add(Student(user_id=user.id, first_name=f"First{i}"))
+            db.session.commit()
+
+        self.client.post("/login", data={"email": "admin@example.com", "password": "testpass1"})
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def collect(self, url):
+        """Follow Next Page links and return every username seen"""
+        seen = []
+        while url:
+            html = self.client.get(url).get_data(as_text=True)
+            seen.extend(re.findall(r'student\d@example\.com|admin@example\.com', html))
+            match = re.search(r'href="([^"]*cursor=[^"]*)"[^>]*>\s*Next Page', html)
+            url = match.group(1).replace('&amp;', '&') if match else None
+        return seen
+
+    def test_pages_cover_every_user_once(self):
+        seen = self.collect("/admin/users")
+        self.assertEqual(len(seen), 8)
+        self.assertEqual(len(set(seen)), 8)
+        self.assertEqual(seen[-1], "admin@example.com")
+
+    def test_filters_are_applied_in_sql(self):
+        self.assertEqual(len(self.collect("/admin/users?role=admin")), 1)
+        self.assertEqual(self.collect("/admin/users?q=student4"), ["student4@example.com"])
+        self.assertEqual(self.collect("/admin/users?q=%25"), [])
+
+    def test_pages_are_read_through_the_created_at_index(self):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if "ORDER BY users.created_at DESC" in statement:
+                statements.append((statement, parameters))
+
+        with self.app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            self.collect("/admin/users")
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        self.assertEqual(len(statements), 3)
+
+        with engine.connect() as conn:
+            for statement, parameters in statements:
+                plan = " ".join(row[-1] for row in conn.exec_driver_sql(
+                    f"EXPLAIN QUERY PLAN {statement}", parameters))
+                self.assertIn("ix_users_created_at_id", plan)
+                self.assertNotIn("TEMP B-TREE FOR ORDER BY", plan)
+
+    def test_invalid_cursor_starts_from_first_page(self):
+        response = self.client.get("/admin/roles?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
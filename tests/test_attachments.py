@@ -0,0 +1,117 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from app import create_app, db
+from models.user import User
+from models.student import Student
+from models.teacher import Teacher
+from models.class_model import Class
+from models.attachment import AssignmentAttachment
+from models.blob import Blob
+from werkzeug.security import generate_password_hash
+
+
+class AttachmentManifestTestCase(unittest.TestCase):
+    def setUp(self):
+        self.upload_dir = tempfile.mkdtemp()
+        self.app = create_app({
+            'TESTING': True,
+            'WTF_CSRF_ENABLED': False,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+            'UPLOAD_FOLDER': self.upload_dir,
+            'BLOB_STORE_FOLDER': os.path.join(self.upload_dir, 'blobs'),
+        })
+
+        with self.app.app_context():
+            db.create_all()
+            teacher_user = User(username="teacher", email="teacher@example.com",
+                                password=generate_password_hash("testpass1"), role="teacher")
+            student_user = User(username="student", email="student@example.com",
+                                password=generate_password_hash("testpass1"), role="student")
+            db.session.add_all([teacher_user, student_user])
+            db.session.flush()
+            teacher = Teacher(user_id=teacher_user.id)
+            student = Student(user_id=student_user.id)
+            db.session.add_all([teacher, student])
+            db.session.flush()
+            cls = Class(name="Math", teacher_id=teacher.id)
+            db.session.add(cls)
+            db.session.flush()
+            student.classes.append(cls)
+            db.session.commit()
+            self.class_id = cls.id
+
+        self.teacher = self.app.test_client()
+        self.teacher.post("/login", data={"email": "teacher@example.com", "password": "testpass1"})
+        self.student = self.app.test_client()
+        self.student.post("/login", data={"email": "student@example.com", "password": "testpass1"})
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+        shutil.rmtree(self.upload_dir, ignore_errors=True)
+
+    def create_assignment(self, content):
+        response = self.teacher.post("/teacher/assignments", data={
+            "class_id": self.class_id,
+            "title": "Essay",
+            "description": "Write it",
+            "assignment_file": (io.BytesIO(content), "brief.pdf", "application/pdf"),
+        }, content_type="multipart/form-data")
+        return response.get_json()["assignment_id"]
+
+    def test_upload_is_recorded_and_served_from_manifest(self):
+        content = b"%PDF-1.4 handout"
+        assignment_id = self.create_assignment(content)
+
+        with self.app.app_context():
+            attachment = AssignmentAttachment.query.filter_by(assignment_id=assignment_id).one()
+            self.assertEqual(attachment.size, len(content))
+            self.assertEqual(attachment.content_hash, hashlib.sha256(content).hexdigest())
+            self.assertEqual(attachment.mime_type, "application/pdf")
+
+        details = self.student.get(f"/student/assignments/{assignment_id}/details").get_json()
+        self.assertEqual(len(details["attachments"]), 1)
+        self.assertEqual(details["attachments"][0]["icon"], "pdf")
+
+        response = self.student.get(details["attachments"][0]["url"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, content)
+        response.close()
+
+        missing = self.student.get(f"/student/assignments/{assignment_id}/download/..%2Fsecret.txt")
+        self.assertEqual(missing.status_code, 404)
+
+    def test_reconcile_rebuilds_manifest_from_disk(self):
+        content = b"%PDF-1.4 handout"
+        assignment_id = self.create_assignment(content)
+        with self.app.app_context():
+            from utils.blobstore import blob_path
+            os.remove(blob_path(hashlib.sha256(content).hexdigest()))
+        folder = os.path.join(self.upload_dir, str(assignment_id))
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, "extra.txt"), "wb") as f:
+            f.write(b"notes")
+
+        result = self.app.test_cli_runner().invoke(args=["reconcile-attachments"])
+        self.assertIn("1 added, 0 updated, 1 removed", result.output)
+
+        notes = hashlib.sha256(b"notes").hexdigest()
+        with self.app.app_context():
+            names = [a.filename for a in AssignmentAttachment.query.all()]
+            self.assertEqual(names, ["extra.txt"])
+            # The removed row released its blob and the added one took a reference
+            self.assertEqual(db.session.get(Blob, hashlib.sha256(content).hexdigest()).refcount, 0)
+            self.assertEqual(db.session.get(Blob, notes).refcount, 1)
+
+        # Importing the file keeps the reference it already has
+        self.app.test_cli_runner().invoke(args=["import-blobs"])
+        with self.app.app_context():
+            self.assertEqual(db.session.get(Blob, notes).refcount, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,15 +1,19 @@
 import unittest
 from app import create_app, db
 from models.user import User
+from models.student import Student
 from werkzeug.security import generate_password_hash
 
 
 class AuthTestCase(unittest.TestCase):
     def setUp(self):
-        self.app = create_app()
-        self.app.config['TESTING'] = True
-        # In-memory DB for tests
-        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        # In-memory DB for tests; it has to be configured before the app is
+        # built, or the app connects to (and checks the schema of) the real one
+        self.app = create_app({
+            'TESTING': True,
+            'WTF_CSRF_ENABLED': False,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        })
         self.client = self.app.test_client()
 
         with self.app.app_context():
@@ -18,6 +22,9 @@ class AuthTestCase(unittest.TestCase):
             user = User(username="testuser", email="test@example.com", 
                        password=generate_password_hash("testpass"), role="student")
             db.session.add(user)
+            db.session.flush()
+            # Students need a profile to reach their dashboard
+            db.session.add(Student(user_id=user.id))
             db.session.commit()
 
     def tearDown(self):
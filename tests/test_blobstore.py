@@ -0,0 +1,208 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from sqlalchemy import event
+from app import create_app, db
+from models.user import User
+from models.student import Student
+from models.teacher import Teacher
+from models.class_model import Class
+from models.assignment import Assignment
+from models.attachment import AssignmentAttachment
+from models.blob import Blob
+from models.submission import Submission
+from utils.blobstore import add_ref
+from werkzeug.security import generate_password_hash
+
+HANDOUT = b"%PDF-1.4 shared handout"
+
+
+class BlobStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.app = create_app({
+            'TESTING': True,
+            'WTF_CSRF_ENABLED': False,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+            'UPLOAD_FOLDER': os.path.join(self.root, 'assignments'),
+            'SUBMISSION_FOLDER': os.path.join(self.root, 'submissions'),
+            'BLOB_STORE_FOLDER': os.path.join(self.root, 'blobs'),
+            'BLOB_GC_GRACE': 0,
+        })
+
+        with self.app.app_context():
+            db.create_all()
+            admin = User(username="admin", email="admin@example.com",
+                         password=generate_password_hash("testpass1"), role="admin")
+            teacher_user = User(username="teacher", email="teacher@example.com",
+                                password=generate_password_hash("testpass1"), role="teacher")
+            db.session.add_all([admin, teacher_user])
+            db.session.flush()
+            teacher = Teacher(user_id=teacher_user.id)
+            db.session.add(teacher)
+            db.session.flush()
+            sections = [Class(name=f"Math {n}", teacher_id=teacher.id) for n in (1, 2)]
+            db.session.add_all(sections)
+            db.session.flush()
+            self.student_user_ids = []
+            for n, cls in enumerate(sections):
+                user = User(username=f"student{n}", email=f"student{n}@example.com",
+                            password=generate_password_hash("testpass1"), role="student")
+                db.session.add(user)
+                db.session.flush()
+                student = Student(user_id=user.id)
+                db.session.add(student)
+                student.classes.append(cls)
+                self.student_user_ids.append(user.id)
+            db.session.commit()
+            self.class_ids = [cls.id for cls in sections]
+
+        self.teacher = self.login("teacher@example.com")
+        self.admin = self.login("admin@example.com")
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def login(self, email):
+        client = self.app.test_client()
+        client.post("/login", data={"email": email, "password": "testpass1"})
+        return client
+
+    def create_assignment(self, class_id):
+        response = self.teacher.post("/teacher/assignments", data={
+            "class_id": class_id,
+            "title": "Essay",
+            "description": "Write it",
+            "assignment_file": (io.BytesIO(HANDOUT), "handout.pdf", "application/pdf"),
+        }, content_type="multipart/form-data")
+        return response.get_json()["assignment_id"]
+
+    def blob_files(self):
+        return [name for _, dirs, files in os.walk(os.path.join(self.root, 'blobs'))
+                for name in files if not name.endswith('.part')]
+
+    def gc(self, *args):
+        return self.app.test_cli_runner().invoke(args=["gc-blobs", *args]).output
+
+    def test_identical_files_share_one_blob(self):
+        first = self.create_assignment(self.class_ids[0])
+        second = self.create_assignment(self.class_ids[1])
+        for n, assignment_id in enumerate((first, second)):
+            student = self.login(f"student{n}@example.com")
+            student.post("/student/assignments/submit", data={
+                "assignment_id": assignment_id,
+                "file": (io.BytesIO(b"template answer"), "answer.txt", "text/plain"),
+            }, content_type="multipart/form-data")
+
+        self.assertEqual(len(self.blob_files()), 2)
+        with self.app.app_context():
+            refcounts = {blob.hash: blob.refcount for blob in Blob.query.all()}
+            self.assertEqual(refcounts[hashlib.sha256(HANDOUT).hexdigest()], 2)
+            self.assertEqual(refcounts[hashlib.sha256(b"template answer").hexdigest()], 2)
+
+        # Both assignments' downloads are served from the shared blob
+        student = self.login("student1@example.com")
+        details = student.get(f"/student/assignments/{second}/details").get_json()
+        response = student.get(details["attachments"][0]["url"])
+        self.assertEqual(response.get_data(), HANDOUT)
+        response.close()
+
+    def test_deletes_release_references_and_gc_removes_unused_blobs(self):
+        first = self.create_assignment(self.class_ids[0])
+        second = self.create_assignment(self.class_ids[1])
+        student = self.login("student0@example.com")
+        student.post("/student/assignments/submit", data={
+            "assignment_id": first,
+            "file": (io.BytesIO(b"my answer"), "answer.txt", "text/plain"),
+        }, content_type="multipart/form-data")
+
+        self.admin.post(f"/admin/assignments/{first}/delete")
+        self.assertIn("Removed 1 blob(s)", self.gc())
+        # The handout is still used by the second assignment
+        self.assertEqual(len(self.blob_files()), 1)
+
+        self.admin.post(f"/admin/assignments/{second}/delete")
+        self.gc()
+        self.assertEqual(self.blob_files(), [])
+
+    def test_role_change_releases_student_submissions(self):
+        assignment_id = self.create_assignment(self.class_ids[0])
+        student = self.login("student0@example.com")
+        student.post("/student/assignments/submit", data={
+            "assignment_id": assignment_id,
+            "file": (io.BytesIO(b"my answer"), "answer.txt", "text/plain"),
+        }, content_type="multipart/form-data")
+
+        self.admin.post(f"/admin/users/{self.student_user_ids[0]}/change-role", data={"role": "teacher"})
+        with self.app.app_context():
+            self.assertEqual(db.session.get(User, self.student_user_ids[0]).role, "teacher")
+            self.assertEqual(Submission.query.count(), 0)
+            answer = db.session.get(Blob, hashlib.sha256(b"my answer").hexdigest())
+            self.assertEqual(answer.refcount, 0)
+            self.assertEqual(db.session.get(Assignment, assignment_id).get_submissions_count(), 0)
+
+    def test_concurrent_first_uploads_share_one_row(self):
+        content_hash = hashlib.sha256(b"same").hexdigest()
+
+        # Another worker inserts the row after this one found none
+        def insert_elsewhere(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("INSERT INTO blobs"):
+                cursor.connection.cursor().execute(
+                    "INSERT INTO blobs (hash, size, refcount, created_at, has_thumbnail) "
+                    "VALUES (?, 4, 1, '2024-01-01', 0)", (content_hash,))
+
+        with self.app.app_context():
+            event.listen(db.engine, "before_cursor_execute", insert_elsewhere)
+            try:
+                add_ref(content_hash, 4)
+            finally:
+                event.remove(db.engine, "before_cursor_execute", insert_elsewhere)
+            db.session.commit()
+            self.assertEqual(db.session.get(Blob, content_hash).refcount, 2)
+
+    def test_full_gc_recounts_and_removes_stray_files(self):
+        self.create_assignment(self.class_ids[0])
+        with self.app.app_context():
+            Blob.query.update({Blob.refcount: 0})
+            db.session.commit()
+        stray = os.path.join(self.root, 'blobs', 'ff', 'ff', 'f' * 64)
+        os.makedirs(os.path.dirname(stray))
+        with open(stray, 'wb') as f:
+            f.write(b"left behind")
+
+        self.assertIn("Removed 1 blob(s), 11 bytes; corrected 1", self.gc("--full"))
+        self.assertEqual(len(self.blob_files()), 1)
+
+    def test_import_moves_legacy_files_into_store(self):
+        assignment_id = self.create_assignment(self.class_ids[0])
+        legacy_dir = os.path.join(self.root, 'assignments', str(assignment_id))
+        os.makedirs(legacy_dir, exist_ok=True)
+        with open(os.path.join(legacy_dir, "old.pdf"), 'wb') as f:
+            f.write(HANDOUT)
+        os.makedirs(os.path.join(self.root, 'submissions'), exist_ok=True)
+        with open(os.path.join(self.root, 'submissions', 'abc_essay.pdf'), 'wb') as f:
+            f.write(HANDOUT)
+        with self.app.app_context():
+            db.session.add(AssignmentAttachment(assignment_id=assignment_id, filename="old.pdf", size=0))
+            db.session.add(Submission(assignment_id=assignment_id, student_id=1,
+                                      file_path=os.path.join(self.root, 'submissions', 'abc_essay.pdf')))
+            db.session.commit()
+
+        output = self.app.test_cli_runner().invoke(args=["import-blobs"]).output
+        self.assertIn("Moved 1 attachment(s) and 1 submission(s)", output)
+        self.assertEqual(os.listdir(legacy_dir), [])
+        self.assertEqual(len(self.blob_files()), 1)
+        with self.app.app_context():
+            submission = Submission.query.one()
+            self.assertEqual(submission.get_filename(), "abc_essay.pdf")
+            self.assertEqual(submission.content_hash, hashlib.sha256(HANDOUT).hexdigest())
+            self.assertEqual(db.session.get(Blob, submission.content_hash).refcount, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
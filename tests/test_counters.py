@@ -0,0 +1,87 @@
+import unittest
+from app import create_app, db
+from models.user import User
+from models.student import Student
+from models.teacher import Teacher
+from models.class_model import Class
+from models.assignment import Assignment
+from models.submission import Submission
+from werkzeug.security import generate_password_hash
+
+
+class SubmissionCounterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'WTF_CSRF_ENABLED': False,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        })
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            teacher_user = User(username="teacher", email="teacher@example.com",
+                                password=generate_password_hash("testpass1"), role="teacher")
+            student_user = User(username="student", email="student@example.com",
+                                password=generate_password_hash("testpass1"), role="student")
+            db.session.add_all([teacher_user, student_user])
+            db.session.flush()
+            teacher = Teacher(user_id=teacher_user.id)
+            student = Student(user_id=student_user.id)
+            db.session.add_all([teacher, student])
+            db.session.flush()
+            cls = Class(name="Math", teacher_id=teacher.id)
+            db.session.add(cls)
+            db.session.flush()
+            assignment = Assignment(title="Algebra", description="d", class_id=cls.id)
+            db.session.add(assignment)
+            db.session.flush()
+            submission = Submission(assignment_id=assignment.id, student_id=student.id)
+            db.session.add(submission)
+            Assignment.adjust_counters(assignment.id, submissions=1)
+            db.session.commit()
+
+            self.assignment_id = assignment.id
+            self.submission_id = submission.id
+            self.student_user_id = student_user.id
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def counters(self):
+        with self.app.app_context():
+            assignment = db.session.get(Assignment, self.assignment_id)
+            return assignment.get_submissions_count(), assignment.get_graded_count()
+
+    def test_grading_counts_each_submission_once(self):
+        self.client.post("/login", data={"email": "teacher@example.com", "password": "testpass1"})
+        self.assertEqual(self.counters(), (1, 0))
+
+        for grade in ("80", "95"):
+            response = self.client.post(f"/teacher/submissions/{self.submission_id}/grade",
+                                        data={"grade": grade})
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.counters(), (1, 1))
+
+    def test_repair_command_recomputes_counters(self):
+        with self.app.app_context():
+            db.session.get(Submission, self.submission_id).grade = 70
+            db.session.get(Assignment, self.assignment_id).submission_count = 9
+            db.session.commit()
+
+        result = self.app.test_cli_runner().invoke(args=["repair-counters"])
+        self.assertIn("1 assignment", result.output)
+        self.assertEqual(self.counters(), (1, 1))
+
+    def test_release_counters(self):
+        from utils.stats import release_submission_counters
+
+        with self.app.app_context():
+            release_submission_counters(Submission.query.filter_by(id=self.submission_id))
+            db.session.commit()
+        self.assertEqual(self.counters(), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
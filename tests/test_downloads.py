@@ -0,0 +1,239 @@
+import hashlib
+import io
+import shutil
+import os
+import tempfile
+import unittest
+from urllib.parse import unquote
+from app import create_app, db
+from config import Config
+from models.attachment import AssignmentAttachment
+from models.user import User
+from models.student import Student
+from models.teacher import Teacher
+from models.class_model import Class
+from werkzeug.security import generate_password_hash
+
+CONTENT = b"%PDF-1.4 " + bytes(range(256)) * 4
+
+
+class FakeAccelProxy:
+    """WSGI stand-in for nginx: resolves X-Accel-Redirect from a directory"""
+
+    def __init__(self, app, prefix, root):
+        self.app = app
+        self.prefix = prefix
+        self.root = root
+
+    def __call__(self, environ, start_response):
+        captured = {}
+
+        def capture(status, headers, exc_info=None):
+            captured['status'], captured['headers'] = status, headers
+
+        body = b"".join(self.app(environ, capture))
+        headers = dict(captured['headers'])
+        location = headers.pop('X-Accel-Redirect', None)
+        if location:
+            path = os.path.join(self.root, unquote(location[len(self.prefix):]))
+            with open(path, 'rb') as f:
+                body = f.read()
+            headers['Content-Length'] = str(len(body))
+            headers['X-Served-By'] = 'proxy'
+        start_response(captured['status'], list(headers.items()))
+        return [body]
+
+
+class DownloadTestBase(unittest.TestCase):
+    config = {}
+
+    def setUp(self):
+        self.upload_dir = tempfile.mkdtemp()
+        self.app = create_app({
+            'TESTING': True,
+            'WTF_CSRF_ENABLED': False,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+            'UPLOAD_FOLDER': self.upload_dir,
+            'BLOB_STORE_FOLDER': os.path.join(self.upload_dir, 'blobs'),
+            **self.config,
+        })
+
+        with self.app.app_context():
+            db.create_all()
+            teacher_user = User(username="teacher", email="teacher@example.com",
+                                password=generate_password_hash("testpass1"), role="teacher")
+            student_user = User(username="student", email="student@example.com",
+                                password=generate_password_hash("testpass1"), role="student")
+            db.session.add_all([teacher_user, student_user])
+            db.session.flush()
+            teacher = Teacher(user_id=teacher_user.id)
+            student = Student(user_id=student_user.id)
+            db.session.add_all([teacher, student])
+            db.session.flush()
+            cls = Class(name="Math", teacher_id=teacher.id)
+            db.session.add(cls)
+            db.session.flush()
+            student.classes.append(cls)
+            db.session.commit()
+            class_id = cls.id
+
+        teacher_client = self.app.test_client()
+        teacher_client.post("/login", data={"email": "teacher@example.com", "password": "testpass1"})
+        response = teacher_client.post("/teacher/assignments", data={
+            "class_id": class_id,
+            "title": "Essay",
+            "description": "Write it",
+            "assignment_file": (io.BytesIO(CONTENT), "brief.pdf", "application/pdf"),
+        }, content_type="multipart/form-data")
+        assignment_id = self.assignment_id = response.get_json()["assignment_id"]
+
+        self.client = self.app.test_client()
+        self.client.post("/login", data={"email": "student@example.com", "password": "testpass1"})
+        details = self.client.get(f"/student/assignments/{assignment_id}/details").get_json()
+        self.url = details["attachments"][0]["url"]
+        self.etag = hashlib.sha256(CONTENT).hexdigest()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+        shutil.rmtree(self.upload_dir, ignore_errors=True)
+
+    def get(self, **headers):
+        response = self.client.get(self.url, headers=headers)
+        data = response.get_data()
+        response.close()
+        return response, data
+
+
+class DownloadTestCase(DownloadTestBase):
+    def test_full_download_has_validators(self):
+        response, data = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data, CONTENT)
+        self.assertEqual(response.headers["ETag"], f'"{self.etag}"')
+        self.assertIn("immutable", response.headers["Cache-Control"])
+        self.assertEqual(response.headers["Accept-Ranges"], "bytes")
+        self.assertIsNotNone(response.last_modified)
+
+    def test_conditional_requests_return_304(self):
+        response, data = self.get(**{"If-None-Match": f'"{self.etag}"'})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(data, b"")
+
+        response, _ = self.get(**{"If-None-Match": '"something-else"'})
+        self.assertEqual(response.status_code, 200)
+
+        last_modified = self.get()[0].headers["Last-Modified"]
+        response, _ = self.get(**{"If-Modified-Since": last_modified})
+        self.assertEqual(response.status_code, 304)
+
+    def test_last_modified_comes_from_the_row(self):
+        last_modified = self.get()[0].headers["Last-Modified"]
+        # Uploading the same content again refreshes the shared blob's mtime
+        blob = os.path.join(self.upload_dir, 'blobs', self.etag[:2], self.etag[2:4], self.etag)
+        os.utime(blob, (os.path.getatime(blob), os.path.getmtime(blob) + 3600))
+        self.assertEqual(self.get()[0].headers["Last-Modified"], last_modified)
+
+    def test_unhashed_rows_get_weak_etag_without_writes(self):
+        legacy_dir = os.path.join(self.upload_dir, str(self.assignment_id))
+        os.makedirs(legacy_dir)
+        with open(os.path.join(legacy_dir, unquote(self.url.rsplit('/', 1)[1])), 'wb') as f:
+            f.write(CONTENT)
+        with self.app.app_context():
+            AssignmentAttachment.query.update({AssignmentAttachment.content_hash: None})
+            db.session.commit()
+
+        response, data = self.get()
+        self.assertEqual(data, CONTENT)
+        self.assertTrue(response.headers["ETag"].startswith('W/"'))
+        response, _ = self.get(**{"If-None-Match": response.headers["ETag"]})
+        self.assertEqual(response.status_code, 304)
+        with self.app.app_context():
+            self.assertIsNone(AssignmentAttachment.query.one().content_hash)
+
+    def test_single_range(self):
+        response, data = self.get(Range="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(data, CONTENT[10:20])
+        self.assertEqual(response.headers["Content-Range"], f"bytes 10-19/{len(CONTENT)}")
+
+        response, data = self.get(Range="bytes=-5")
+        self.assertEqual(data, CONTENT[-5:])
+
+    def test_multiple_ranges(self):
+        response, data = self.get(Range="bytes=0-3,100-103")
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response.content_type.startswith("multipart/byteranges; boundary="))
+        self.assertEqual(len(data), response.content_length)
+        boundary = response.content_type.split("boundary=")[1].encode()
+        parts = data.split(b"--" + boundary)[1:-1]
+        self.assertEqual(len(parts), 2)
+        self.assertIn(f"Content-Range: bytes 0-3/{len(CONTENT)}".encode(), parts[0])
+        self.assertTrue(parts[0].endswith(b"\r\n\r\n" + CONTENT[0:4] + b"\r\n"))
+        self.assertTrue(parts[1].endswith(b"\r\n\r\n" + CONTENT[100:104] + b"\r\n"))
+
+    def test_if_range_and_unsatisfiable_ranges(self):
+        response, data = self.get(Range="bytes=0-3", **{"If-Range": f'"{self.etag}"'})
+        self.assertEqual(response.status_code, 206)
+
+        response, data = self.get(Range="bytes=0-3", **{"If-Range": '"stale"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data, CONTENT)
+
+        response, _ = self.get(Range=f"bytes={len(CONTENT) + 10}-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response.headers["Content-Range"], f"bytes */{len(CONTENT)}")
+
+
+class OffloadTestCase(DownloadTestBase):
+    config = {'DOWNLOAD_OFFLOAD': 'x-accel', 'DOWNLOAD_OFFLOAD_PREFIX': '/_protected/'}
+
+    def setUp(self):
+        super().setUp()
+        self.app.config['DOWNLOAD_OFFLOAD_ROOT'] = self.upload_dir
+
+    def test_accel_redirect_leaves_body_to_proxy(self):
+        response, data = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data, b"")
+        location = response.headers["X-Accel-Redirect"]
+        self.assertTrue(location.startswith("/_protected/"))
+        self.assertEqual(response.headers["ETag"], f'"{self.etag}"')
+        self.assertIn("inline", response.headers["Content-Disposition"])
+
+        # Conditional requests are still answered by Flask
+        response, _ = self.get(**{"If-None-Match": f'"{self.etag}"'})
+        self.assertEqual(response.status_code, 304)
+        self.assertNotIn("X-Accel-Redirect", response.headers)
+
+    def test_proxy_serves_redirected_file(self):
+        self.app.wsgi_app = FakeAccelProxy(self.app.wsgi_app, "/_protected/", self.upload_dir)
+        response, data = self.get()
+        self.assertEqual(response.headers["X-Served-By"], "proxy")
+        self.assertEqual(data, CONTENT)
+
+    def test_files_outside_root_are_streamed(self):
+        self.app.config['DOWNLOAD_OFFLOAD_ROOT'] = os.path.join(self.upload_dir, "elsewhere")
+        response, data = self.get()
+        self.assertNotIn("X-Accel-Redirect", response.headers)
+        self.assertEqual(data, CONTENT)
+
+    def test_default_root_only_covers_uploads(self):
+        root = Config.DOWNLOAD_OFFLOAD_ROOT
+        self.assertEqual(os.path.dirname(Config.SUBMISSION_FOLDER), root)
+        self.assertEqual(os.path.dirname(Config.BLOB_STORE_FOLDER), root)
+        database = Config.SQLALCHEMY_DATABASE_URI.replace("sqlite:///", "")
+        self.assertNotEqual(os.path.commonpath([root, database]), root)
+
+    def test_sendfile_header_carries_absolute_path(self):
+        self.app.config['DOWNLOAD_OFFLOAD'] = 'x-sendfile'
+        response, data = self.get()
+        self.assertEqual(data, b"")
+        path = response.headers["X-Sendfile"]
+        self.assertTrue(os.path.isabs(path))
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), CONTENT)
+
+
+if __name__ == "__main__":
+    unittest.main()
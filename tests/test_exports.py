@@ -0,0 +1,117 @@
+import csv
+import io
+import json
+import unittest
+from app import create_app, db
+from models.user import User
+from models.student import Student
+from models.teacher import Teacher
+from models.class_model import Class
+from models.assignment import Assignment
+from models.submission import Submission
+from werkzeug.security import generate_password_hash
+
+
+class ExportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'WTF_CSRF_ENABLED': False,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+            'EXPORT_BATCH_SIZE': 4,
+        })
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            users = [User(username=name, email=f"{name}@example.com",
+                          password=generate_password_hash("testpass1"), role="teacher")
+                     for name in ("teacher", "other")]
+            db.session.add_all(users)
+            db.session.flush()
+            teacher, other = Teacher(user_id=users[0].id), Teacher(user_id=users[1].id)
+            db.session.add_all([teacher, other])
+            db.session.flush()
+
+            algebra = Class(name="Algebra", teacher_id=teacher.id)
+            biology = Class(name="Biology", teacher_id=teacher.id)
+            foreign = Class(name="Chemistry", teacher_id=other.id)
+            db.session.add_all([algebra, biology, foreign])
+            db.session.flush()
+
+            for cls in (algebra, foreign):
+                assignment = Assignment(title=f"{cls.name} homework", description="d", class_id=cls.id)
+                db.session.add(assignment)
+                db.session.flush()
+                for n in range(10):
+                    student_user = User(username=f"s{cls.id}-{n}", email=f"s{cls.id}-{n}@example.com",
+                                        password="x", role="student")
+                    db.session.add(student_user)
+                    db.session.flush()
+                    student = Student(user_id=student_user.id, first_name=f"Student{n}",
+                                      last_name=cls.name)
+                    db.session.add(student)
+                    db.session.flush()
+                    cls.students.append(student)
+                    if cls is algebra:
+                        biology.students.append(student)  # enrolled in two of my classes
+                    db.session.add(Submission(assignment_id=assignment.id, student_id=student.id,
+                                              grade=n * 10 if n % 2 == 0 else None))
+            # A name a spreadsheet would evaluate as a formula
+            db.session.get(Student, 1).first_name = "=HYPERLINK(\"x\")"
+            db.session.commit()
+
+        self.client.post("/login", data={"email": "teacher@example.com", "password": "testpass1"})
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def test_grades_csv_is_streamed(self):
+        response = self.client.get("/teacher/export_grades?format=csv")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.mimetype, "text/csv")
+        self.assertIn('filename="grades_export.csv"', response.headers["Content-Disposition"])
+
+        rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+        self.assertEqual(rows[0], ["student", "class", "assignment", "grade"])
+        self.assertEqual(len(rows), 11)  # header + only this teacher's submissions
+        self.assertTrue(all(row[1] == "Algebra" for row in rows[1:]))
+        self.assertEqual(rows[1][0], "'=HYPERLINK(\"x\") Algebra")
+        grades = sorted(row[3] for row in rows[1:])
+        self.assertIn("0.0", grades)  # a zero grade is not "N/A"
+        self.assertEqual(grades.count("N/A"), 5)
+
+    def test_grades_ndjson(self):
+        response = self.client.get("/teacher/export_grades?format=ndjson")
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual(len(records), 10)
+        self.assertEqual(set(records[0]), {"student", "class", "assignment", "grade"})
+
+    def test_grades_json_is_default(self):
+        response = self.client.get("/teacher/export_grades")
+        self.assertEqual(response.mimetype, "application/json")
+        data = response.get_json()
+        self.assertTrue(data["success"])
+        self.assertEqual(len(data["data"]), 10)
+
+    def test_students_export_deduplicates(self):
+        response = self.client.get("/teacher/export_students?format=ndjson")
+        records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual(len(records), 10)
+        self.assertEqual({record["class"] for record in records}, {"Algebra"})
+        self.assertTrue(all(record["email"].endswith("@example.com") for record in records))
+
+        as_csv = self.client.get("/teacher/export_students?format=csv")
+        self.assertEqual(len(as_csv.get_data(as_text=True).splitlines()), 11)
+
+    def test_unknown_format_rejected(self):
+        response = self.client.get("/teacher/export_grades?format=xlsx")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.get_json()["success"])
+
+
+if __name__ == "__main__":
+    unittest.main()
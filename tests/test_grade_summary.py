@@ -0,0 +1,129 @@
+import unittest
+from app import create_app, db
+from models.user import User
+from models.student import Student
+from models.teacher import Teacher
+from models.class_model import Class
+from models.assignment import Assignment
+from models.submission import Submission
+from models.grade_summary import StudentGradeSummary
+from werkzeug.security import generate_password_hash
+
+
+class GradeSummaryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'WTF_CSRF_ENABLED': False,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        })
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            users = {name: User(username=name, email=f"{name}@example.com",
+                                password=generate_password_hash("testpass1"), role=name)
+                     for name in ("teacher", "student", "admin")}
+            db.session.add_all(users.values())
+            db.session.flush()
+            teacher = Teacher(user_id=users["teacher"].id)
+            student = Student(user_id=users["student"].id, first_name="Grace", last_name="Hopper")
+            db.session.add_all([teacher, student])
+            db.session.flush()
+
+            math = Class(name="Math", teacher_id=teacher.id)
+            physics = Class(name="Physics", teacher_id=teacher.id)
+            db.session.add_all([math, physics])
+            db.session.flush()
+            math.students.append(student)
+            physics.students.append(student)
+
+            self.submission_ids = []
+            for cls, title in ((math, "Algebra"), (math, "Geometry"), (physics, "Optics")):
+                assignment = Assignment(title=title, description="d", class_id=cls.id)
+                db.session.add(assignment)
+                db.session.flush()
+                submission = Submission(assignment_id=assignment.id, student_id=student.id)
+                db.session.add(submission)
+                db.session.flush()
+                Assignment.adjust_counters(assignment.id, submissions=1)
+                self.submission_ids.append(submission.id)
+            db.session.commit()
+
+            self.student_id = student.id
+            self.math_id, self.physics_id = math.id, physics.id
+            self.geometry_id = db.session.get(Submission, self.submission_ids[1]).assignment_id
+
+        self.assertIn("rebuilt 2", self.rebuild().lower())
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def rebuild(self):
+        return self.app.test_cli_runner().invoke(args=["rebuild-grade-summaries"]).output
+
+    def summary(self, class_id):
+        with self.app.app_context():
+            row = StudentGradeSummary.query.filter_by(
+                student_id=self.student_id, class_id=class_id).first()
+            if row is None:
+                return None
+            return (row.submitted_count, row.graded_count, row.average,
+                    row.highest, row.lowest, row.distribution)
+
+    def grade(self, submission_id, grade):
+        response = self.client.post(f"/teacher/submissions/{submission_id}/grade",
+                                    data={"grade": grade})
+        self.assertEqual(response.status_code, 200)
+
+    def test_grading_updates_summary(self):
+        self.assertEqual(self.summary(self.math_id)[:3], (2, 0, None))
+
+        self.client.post("/login", data={"email": "teacher@example.com", "password": "testpass1"})
+        self.grade(self.submission_ids[0], "95")
+        self.grade(self.submission_ids[1], "72")
+        self.assertEqual(self.summary(self.math_id), (
+            2, 2, 83.5, 95, 72, {'A': 1, 'B': 0, 'C': 1, 'D': 0, 'F': 0}))
+
+        # Regrading replaces the old grade rather than adding to it
+        self.grade(self.submission_ids[0], "50")
+        self.assertEqual(self.summary(self.math_id), (
+            2, 2, 61, 72, 50, {'A': 0, 'B': 0, 'C': 1, 'D': 0, 'F': 1}))
+        self.assertEqual(self.summary(self.physics_id)[:2], (1, 0))
+
+    def test_assignment_deletion_refreshes_summary(self):
+        self.client.post("/login", data={"email": "teacher@example.com", "password": "testpass1"})
+        self.grade(self.submission_ids[1], "88")
+        self.client.get("/logout")
+
+        self.client.post("/login", data={"email": "admin@example.com", "password": "testpass1"})
+        response = self.client.post(f"/admin/assignments/{self.geometry_id}/delete")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.summary(self.math_id)[:3], (1, 0, None))
+
+    def test_rebuild_repairs_drift(self):
+        with self.app.app_context():
+            db.session.get(Submission, self.submission_ids[2]).grade = 64
+            db.session.commit()
+        self.assertEqual(self.summary(self.physics_id)[1], 0)
+
+        self.rebuild()
+        self.assertEqual(self.summary(self.physics_id)[1:5], (1, 64, 64, 64))
+
+    def test_pages_read_from_summary(self):
+        # Skew the summary so the pages can only show it if they read it
+        with self.app.app_context():
+            row = StudentGradeSummary.query.filter_by(class_id=self.physics_id).one()
+            row.graded_count, row.grade_sum, row.highest, row.lowest, row.count_b = 1, 81.5, 81.5, 81.5, 1
+            db.session.commit()
+
+        self.client.post("/login", data={"email": "student@example.com", "password": "testpass1"})
+        for page in ("grades", "profile"):
+            response = self.client.get(f"/student/{page}")
+            self.assertEqual(response.status_code, 200, page)
+            self.assertIn(b"81.5", response.data, page)
+
+
+if __name__ == "__main__":
+    unittest.main()
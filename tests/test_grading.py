@@ -0,0 +1,172 @@
+import unittest
+from sqlalchemy import event
+from app import create_app, db
+from models.user import User
+from models.student import Student
+from models.teacher import Teacher
+from models.class_model import Class
+from models.assignment import Assignment
+from models.submission import Submission
+from werkzeug.security import generate_password_hash
+
+
+class BulkGradingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'WTF_CSRF_ENABLED': False,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        })
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            users = [User(username=name, email=f"{name}@example.com",
+                          password=generate_password_hash("testpass1"), role=role)
+                     for name, role in (("teacher", "teacher"), ("other", "teacher"))]
+            db.session.add_all(users)
+            db.session.flush()
+            teacher, other = Teacher(user_id=users[0].id), Teacher(user_id=users[1].id)
+            db.session.add_all([teacher, other])
+            db.session.flush()
+
+            self.submission_ids = {}
+            for owner in (teacher, other):
+                cls = Class(name="Math", teacher_id=owner.id)
+                db.session.add(cls)
+                db.session.flush()
+                assignment = Assignment(title="Algebra", description="d", class_id=cls.id)
+                db.session.add(assignment)
+                db.session.flush()
+                ids = []
+                for n in range(60):
+                    student_user = User(username=f"s{owner.id}-{n}", email=f"s{owner.id}-{n}@example.com",
+                                        password="x", role="student")
+                    db.session.add(student_user)
+                    db.session.flush()
+                    student = Student(user_id=student_user.id)
+                    db.session.add(student)
+                    db.session.flush()
+                    submission = Submission(assignment_id=assignment.id, student_id=student.id,
+                                            feedback="old")
+                    db.session.add(submission)
+                    db.session.flush()
+                    ids.append(submission.id)
+                Assignment.adjust_counters(assignment.id, submissions=60)
+                self.submission_ids[owner.id] = ids
+            db.session.commit()
+            self.mine = self.submission_ids[teacher.id]
+            self.theirs = self.submission_ids[other.id]
+
+        self.client.post("/login", data={"email": "teacher@example.com", "password": "testpass1"})
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def bulk(self, entries):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with self.app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            response = self.client.post("/teacher/submissions/grade", json={"grades": entries})
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        return response, statements
+
+    def test_results_are_reported_per_item(self):
+        entries = [
+            {"submission_id": self.mine[0], "grade": 91, "feedback": " Good "},
+            {"submission_id": self.mine[1], "grade": "88.5"},
+            {"submission_id": self.mine[2], "grade": 150},
+            {"submission_id": self.mine[3], "grade": "nan"},
+            {"submission_id": self.theirs[0], "grade": 70},
+            {"submission_id": 999999, "grade": 70},
+            {"submission_id": self.mine[0], "grade": 50},
+            {"grade": 70},
+        ]
+        response, _ = self.bulk(entries)
+        data = response.get_json()
+        self.assertFalse(data["success"])
+        self.assertEqual((data["saved"], data["failed"]), (2, 6))
+        self.assertEqual([r["status"] for r in data["results"]], [200, 200, 400, 400, 403, 404, 400, 400])
+
+        with self.app.app_context():
+            first = db.session.get(Submission, self.mine[0])
+            second = db.session.get(Submission, self.mine[1])
+            self.assertEqual((first.grade, first.feedback), (91, "Good"))
+            # No feedback given: the existing feedback is kept
+            self.assertEqual((second.grade, second.feedback), (88.5, "old"))
+            self.assertIsNotNone(second.graded_at)
+            self.assertIsNone(db.session.get(Submission, self.theirs[0]).grade)
+            self.assertEqual(first.assignment.get_graded_count(), 2)
+
+    def test_statement_count_does_not_grow_with_batch(self):
+        _, small = self.bulk([{"submission_id": i, "grade": 80} for i in self.mine[:5]])
+        _, large = self.bulk([{"submission_id": i, "grade": 80} for i in self.mine[5:60]])
+        self.assertEqual(len(small), len(large))
+        updates = [s for s in large if s.startswith("UPDATE submissions")]
+        self.assertEqual(len(updates), 1)
+
+        with self.app.app_context():
+            assignment = db.session.get(Submission, self.mine[0]).assignment
+            self.assertEqual(assignment.get_graded_count(), 60)
+
+    def test_regrading_does_not_count_twice(self):
+        self.bulk([{"submission_id": self.mine[0], "grade": 80}])
+        self.bulk([{"submission_id": self.mine[0], "grade": 85}])
+        with self.app.app_context():
+            self.assertEqual(db.session.get(Submission, self.mine[0]).assignment.get_graded_count(), 1)
+
+    def test_concurrent_first_grade_counts_once(self):
+        with self.app.app_context():
+            engine = db.engine
+
+        # Another worker grades the submission after ours read it as ungraded
+        raced = []
+
+        def grade_elsewhere(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("UPDATE submissions") and not raced:
+                raced.append(statement)
+                other = cursor.connection.cursor()
+                other.execute("UPDATE submissions SET grade = 50 WHERE id = ?", (self.mine[0],))
+                other.execute("UPDATE assignments SET graded_count = graded_count + 1")
+
+        event.listen(engine, "before_cursor_execute", grade_elsewhere)
+        try:
+            response = self.client.post("/teacher/submissions/grade",
+                                        json={"grades": [{"submission_id": self.mine[0], "grade": 80}]})
+        finally:
+            event.remove(engine, "before_cursor_execute", grade_elsewhere)
+        self.assertTrue(response.get_json()["success"])
+
+        with self.app.app_context():
+            submission = db.session.get(Submission, self.mine[0])
+            self.assertEqual(submission.grade, 80)
+            self.assertEqual(submission.assignment.get_graded_count(), 1)
+
+    def test_rejects_malformed_or_oversized_requests(self):
+        self.assertEqual(self.client.post("/teacher/submissions/grade", json={}).status_code, 400)
+        self.app.config["BULK_GRADE_LIMIT"] = 3
+        response, _ = self.bulk([{"submission_id": i, "grade": 80} for i in self.mine[:4]])
+        self.assertEqual(response.status_code, 413)
+
+    def test_single_grade_endpoint_uses_same_checks(self):
+        response = self.client.post(f"/teacher/submissions/{self.theirs[0]}/grade", data={"grade": "80"})
+        self.assertEqual(response.status_code, 403)
+        response = self.client.post("/teacher/submissions/999999/grade", data={"grade": "80"})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post(f"/teacher/submissions/{self.mine[0]}/grade", data={"grade": "abc"})
+        self.assertEqual(response.get_json()["message"], "Invalid grade format")
+        response = self.client.post(f"/teacher/submissions/{self.mine[0]}/grade",
+                                    data={"grade": "77", "feedback": "ok"})
+        self.assertEqual(response.get_json(), {"success": True, "message": "Grade saved!", "grade": 77.0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+from sqlalchemy import event
+from app import create_app, db
+from models.user import User
+from models.teacher import Teacher
+from werkzeug.security import generate_password_hash
+
+
+class IdentityTestCase(unittest.TestCase):
+    def make_app(self, **config):
+        app = create_app({
+            'TESTING': True,
+            'WTF_CSRF_ENABLED': False,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+            **config,
+        })
+        with app.app_context():
+            db.create_all()
+            user = User(username="teacher", email="teacher@example.com",
+                        password=generate_password_hash("testpass1"), role="teacher")
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Teacher(user_id=user.id, first_name="Ada"))
+            db.session.commit()
+        self.addCleanup(self.drop, app)
+        return app
+
+    def drop(self, app):
+        with app.app_context():
+            db.drop_all()
+
+    def login(self, app):
+        client = app.test_client()
+        client.post("/login", data={"email": "teacher@example.com", "password": "testpass1"})
+        return client
+
+    def statements_for(self, app, url, client=None):
+        client = client or self.login(app)
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            response = client.get(url)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        self.assertEqual(response.status_code, 200)
+        return statements
+
+    def test_profile_is_joined_into_user_lookup(self):
+        app = self.make_app()
+        statements = self.statements_for(app, "/teacher/profile")
+        self.assertEqual(len(statements), 1)
+        self.assertIn("teachers", statements[0])
+
+    def test_profile_loaded_once_when_not_joined(self):
+        app = self.make_app(LOAD_ROLE_PROFILE=False)
+        statements = self.statements_for(app, "/teacher/profile")
+        self.assertEqual(len(statements), 2)
+        self.assertNotIn("teachers", statements[0])
+
+    def test_cached_snapshot_skips_user_query(self):
+        app = self.make_app()
+        client = self.login(app)
+        self.statements_for(app, "/teacher/profile", client)
+        statements = self.statements_for(app, "/teacher/profile", client)
+        # Only the profile lookup remains; the user came from the cache
+        self.assertEqual(len(statements), 1)
+        self.assertNotIn("FROM users", statements[0])
+        with app.app_context():
+            from utils.identity import get_user_cache
+            self.assertGreaterEqual(get_user_cache().stats()['hits'], 1)
+
+    def test_password_change_invalidates_snapshot(self):
+        app = self.make_app()
+        client = self.login(app)
+        client.get("/teacher/profile")
+        response = client.post("/teacher/profile/password", data={
+            "current_password": "testpass1", "new_password": "newpass12", "confirm_password": "newpass12"})
+        self.assertTrue(response.get_json()["success"])
+        # The cached snapshot still held the old hash; a stale entry would reject this
+        response = client.post("/teacher/profile/password", data={
+            "current_password": "newpass12", "new_password": "testpass1", "confirm_password": "testpass1"})
+        self.assertTrue(response.get_json()["success"])
+
+    def test_snapshot_is_read_only(self):
+        app = self.make_app()
+        with app.test_request_context():
+            from utils.identity import load_user_identity
+            snapshot = load_user_identity(1)
+            self.assertEqual(snapshot.username, "teacher")
+            self.assertTrue(snapshot.is_teacher())
+            with self.assertRaises(AttributeError):
+                snapshot.email = "other@example.com"
+
+
+if __name__ == "__main__":
+    unittest.main()
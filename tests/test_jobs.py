@@ -0,0 +1,145 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from app import create_app, db
+from models.user import User
+from models.teacher import Teacher
+from models.class_model import Class
+from models.attachment import AssignmentAttachment
+from models.blob import Blob
+from models.job import Job
+from werkzeug.security import generate_password_hash
+
+TWO_PAGE_PDF = (b"%PDF-1.4\n1 0 obj << /Type /Pages /Kids [2 0 R 3 0 R] /Count 2 >> endobj\n"
+                b"2 0 obj << /Type /Page /Parent 1 0 R >> endobj\n"
+                b"3 0 obj << /Type/Page /Parent 1 0 R >> endobj\n%%EOF\n")
+
+
+class JobQueueTestCase(unittest.TestCase):
+    def make_app(self, **config):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, True)
+        app = create_app({
+            'TESTING': True,
+            'WTF_CSRF_ENABLED': False,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+            'UPLOAD_FOLDER': os.path.join(self.root, 'assignments'),
+            'BLOB_STORE_FOLDER': os.path.join(self.root, 'blobs'),
+            **config,
+        })
+        with app.app_context():
+            db.create_all()
+            user = User(username="teacher", email="teacher@example.com",
+                        password=generate_password_hash("testpass1"), role="teacher")
+            db.session.add(user)
+            db.session.flush()
+            teacher = Teacher(user_id=user.id)
+            db.session.add(teacher)
+            db.session.flush()
+            cls = Class(name="Math", teacher_id=teacher.id)
+            db.session.add(cls)
+            db.session.commit()
+            self.class_id = cls.id
+        self.addCleanup(self.drop, app)
+        self.client = app.test_client()
+        self.client.post("/login", data={"email": "teacher@example.com", "password": "testpass1"})
+        return app
+
+    def drop(self, app):
+        with app.app_context():
+            db.drop_all()
+
+    def upload(self, content, filename, mime_type):
+        response = self.client.post("/teacher/assignments", data={
+            "class_id": self.class_id,
+            "title": "Essay",
+            "description": "Write it",
+            "assignment_file": (io.BytesIO(content), filename, mime_type),
+        }, content_type="multipart/form-data")
+        self.assertTrue(response.get_json()["success"])
+
+    def test_upload_is_processed_by_worker(self):
+        app = self.make_app()
+        self.upload(TWO_PAGE_PDF, "reader.pdf", "application/pdf")
+
+        with app.app_context():
+            job = Job.query.one()
+            self.assertEqual((job.kind, job.status), ("process_blob", "queued"))
+            self.assertIsNone(Blob.query.one().processed_at)
+
+            from utils.jobs import work
+            self.assertEqual(work(burst=True), 1)
+
+            blob = Blob.query.one()
+            self.assertEqual(blob.mime_type, "application/pdf")
+            self.assertEqual(blob.page_count, 2)
+            self.assertIsNotNone(blob.processed_at)
+            self.assertEqual(Job.query.one().status, "done")
+
+    def test_sniffed_type_fills_in_unknown_attachment_type(self):
+        app = self.make_app(JOBS_EAGER=True)
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as z:
+            z.writestr("word/document.xml", "<w:document/>")
+        # A .docx upload whose name carries no usable type
+        self.upload(archive.getvalue(), "notes.docx", "application/pdf")
+
+        with app.app_context():
+            self.assertEqual(Job.query.count(), 0)  # ran inline
+            blob = Blob.query.one()
+            self.assertEqual(blob.mime_type,
+                             "application/vnd.openxmlformats-officedocument.wordprocessingml.document")
+            attachment = AssignmentAttachment.query.one()
+            attachment.mime_type = None
+            db.session.commit()
+            from utils.processing import process_blob
+            process_blob(blob.hash)
+            db.session.commit()
+            self.assertEqual(AssignmentAttachment.query.one().mime_type, blob.mime_type)
+
+    def test_failing_jobs_are_retried_then_marked_failed(self):
+        app = self.make_app(JOB_MAX_ATTEMPTS=2)
+        from utils.jobs import JOB_HANDLERS, claim_job, enqueue, job_handler, run_job
+
+        @job_handler('explode')
+        def explode():
+            raise RuntimeError("boom")
+        self.addCleanup(JOB_HANDLERS.pop, 'explode')
+
+        with app.app_context():
+            enqueue('explode')
+            db.session.commit()
+
+            self.assertFalse(run_job(claim_job()))
+            job = Job.query.one()
+            self.assertEqual(job.status, "queued")
+            self.assertGreater(job.run_after, job.created_at)
+            self.assertIsNone(claim_job())  # backing off
+
+            job.run_after = job.created_at
+            db.session.commit()
+            self.assertFalse(run_job(claim_job()))
+            job = Job.query.one()
+            self.assertEqual((job.status, job.attempts), ("failed", 2))
+            self.assertIn("boom", job.last_error)
+
+    def test_sniff_mime_type(self):
+        from utils.processing import sniff_mime_type
+        samples = {
+            b"\x89PNG\r\n\x1a\n....": "image/png",
+            "plain text é".encode(): "text/plain",
+            b"\x00\x01\x02binary": "application/octet-stream",
+        }
+        for content, expected in samples.items():
+            path = os.path.join(tempfile.mkdtemp(), "sample")
+            self.addCleanup(shutil.rmtree, os.path.dirname(path), True)
+            with open(path, "wb") as f:
+                f.write(content)
+            self.assertEqual(sniff_mime_type(path), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+from datetime import datetime
+from app import create_app, db
+from models.user import User
+from models.student import Student
+from models.teacher import Teacher
+from models.class_model import Class
+from models.assignment import Assignment
+from models.submission import Submission
+from utils.loaders import LOADER_STRATEGIES, loader_options
+from utils.query_budget import QueryBudgetExceeded
+from werkzeug.security import generate_password_hash
+
+# Every listing below must render within this many statements however
+# many rows it shows
+QUERY_BUDGET = 8
+
+
+class LoaderStrategiesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'WTF_CSRF_ENABLED': False,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+            'MAX_QUERIES_PER_REQUEST': QUERY_BUDGET,
+        })
+
+        with self.app.app_context():
+            db.create_all()
+            password = generate_password_hash("testpass1")
+            for name in ("admin", "teacher"):
+                db.session.add(User(username=name, email=f"{name}@example.com",
+                                    password=password, role=name))
+            db.session.flush()
+            teacher = Teacher(user_id=User.query.filter_by(username="teacher").one().id)
+            db.session.add(teacher)
+            db.session.flush()
+
+            students = []
+            for i in range(12):
+                user = User(username=f"s{i}", email=f"s{i}@example.com", password=password, role="student")
+                db.session.add(user)
+                db.session.flush()
+                students.append(Student(user_id=user.id, first_name=f"S{i}"))
+            db.session.add_all(students)
+            db.session.flush()
+
+            for c in range(4):
+                cls = Class(name=f"Class {c}", description="d", teacher_id=teacher.id)
+                db.session.add(cls)
+                db.session.flush()
+                for student in students:
+                    cls.students.append(student)
+                for a in range(3):
+                    assignment = Assignment(title=f"A{c}{a}", description="d", class_id=cls.id,
+                                            teacher_id=teacher.id)
+                    db.session.add(assignment)
+                    db.session.flush()
+                    db.session.add_all([
+                        Submission(assignment_id=assignment.id, student_id=student.id,
+                                   submitted_at=datetime.utcnow(), grade=75 if a else None)
+                        for student in students])
+                    Assignment.adjust_counters(assignment.id, submissions=len(students),
+                                               graded=len(students) if a else 0)
+            db.session.commit()
+
+            self.class_id = cls.id
+            self.assignment_id = assignment.id
+            self.student_id = students[0].id
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def login(self, email):
+        client = self.app.test_client()
+        client.post("/login", data={"email": email, "password": "testpass1"})
+        return client
+
+    def assert_pages_load(self, client, urls):
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(client.get(url).status_code, 200)
+
+    def test_teacher_pages_within_budget(self):
+        self.assert_pages_load(self.login("teacher@example.com"), [
+            "/teacher/students", "/teacher/classes", "/teacher/assignments",
+            f"/teacher/students/{self.student_id}", f"/teacher/classes/{self.class_id}",
+            f"/teacher/assignments/{self.assignment_id}",
+        ])
+
+    def test_admin_pages_within_budget(self):
+        self.assert_pages_load(self.login("admin@example.com"), [
+            "/admin/users", "/admin/teachers", "/admin/students", "/admin/assignments",
+            f"/admin/assignments/{self.assignment_id}",
+        ])
+
+    def test_student_pages_within_budget(self):
+        self.assert_pages_load(self.login("s0@example.com"), ["/student/classes"])
+
+    def test_listings_keep_their_content(self):
+        teacher = self.login("teacher@example.com")
+        html = teacher.get("/teacher/students").get_data(as_text=True)
+        self.assertIn("s11@example.com", html)
+        self.assertEqual(html.count("s1@example.com"), 1)
+
+        admin = self.login("admin@example.com")
+        self.assertIn("Class 0", admin.get("/admin/students").get_data(as_text=True))
+
+    def test_request_over_budget_fails(self):
+        client = self.login("teacher@example.com")
+        self.app.config['MAX_QUERIES_PER_REQUEST'] = 1
+        with self.assertRaises(QueryBudgetExceeded) as raised:
+            client.get("/teacher/classes")
+        self.assertIn("limit 1", str(raised.exception))
+
+    def test_every_strategy_builds(self):
+        with self.app.app_context():
+            for name in LOADER_STRATEGIES:
+                self.assertTrue(loader_options(name))
+        with self.assertRaises(KeyError):
+            loader_options("no_such_page")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from app import create_app, db
+from models.user import User
+from models.student import Student
+from models.teacher import Teacher
+from models.class_model import Class
+from utils.query_budget import QueryBudgetExceeded
+from utils.replica import PIN_SESSION_KEY
+from werkzeug.security import generate_password_hash
+
+
+class ReplicaRoutingTestCase(unittest.TestCase):
+    """Primary and replica are two SQLite files; replicate() plays the lagging replication"""
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.primary = os.path.join(self.workdir, 'primary.db')
+        self.replica = os.path.join(self.workdir, 'replica.db')
+        self.app = create_app({
+            'TESTING': True,
+            'WTF_CSRF_ENABLED': False,
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{self.primary}",
+            'SQLALCHEMY_REPLICA_URI': f"sqlite:///{self.replica}",
+            'SCHEMA_CHECK': False,
+            'SQL_METRICS_ENABLED': True,
+            'MAX_QUERIES_PER_REQUEST': 50,
+        })
+
+        with self.app.app_context():
+            db.create_all()
+            password = generate_password_hash("testpass1")
+            teacher_user = User(username="teacher", email="teacher@example.com", password=password, role="teacher")
+            student_user = User(username="student", email="student@example.com", password=password, role="student")
+            db.session.add_all([teacher_user, student_user])
+            db.session.flush()
+            teacher = Teacher(user_id=teacher_user.id)
+            db.session.add_all([teacher, Student(user_id=student_user.id, first_name="Ada")])
+            db.session.flush()
+            cls = Class(name="Math", description="d", teacher_id=teacher.id)
+            db.session.add(cls)
+            db.session.commit()
+            self.teacher_id = teacher.id
+            self.class_code = cls.class_code
+        self.replicate()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+            db.engine.dispose()
+        self.app.extensions['db_replica'].dispose()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def replicate(self):
+        source = sqlite3.connect(self.primary)
+        target = sqlite3.connect(self.replica)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+
+    def login(self, name):
+        client = self.app.test_client()
+        client.post("/login", data={"email": f"{name}@example.com", "password": "testpass1"})
+        # Logging in records last_login; start each test once that pin has expired
+        with client.session_transaction() as session:
+            session.pop(PIN_SESSION_KEY)
+        return client
+
+    def add_class_on_primary(self, name):
+        with self.app.app_context():
+            db.session.add(Class(name=name, description="d", teacher_id=self.teacher_id))
+            db.session.commit()
+
+    def test_read_only_views_use_replica(self):
+        teacher = self.login("teacher")
+        self.add_class_on_primary("Physics")
+
+        self.assertNotIn(b"Physics", teacher.get("/teacher/classes").data)
+        self.replicate()
+        self.assertIn(b"Physics", teacher.get("/teacher/classes").data)
+
+    def test_writer_reads_own_write(self):
+        student = self.login("student")
+        response = student.post(f"/student/join/{self.class_code}")
+        self.assertEqual(response.status_code, 302)
+        with student.session_transaction() as session:
+            self.assertIn(PIN_SESSION_KEY, session)
+
+        # The replica has not caught up, but the writer is pinned to the primary
+        self.assertIn(b"Leave", student.get("/student/classes").data)
+
+        # Other users still read the lagging replica
+        teacher = self.login("teacher")
+        self.assertEqual(teacher.get("/teacher/stats").get_json()["stats"]["total_students"], 0)
+
+    def test_replica_reads_are_measured_and_budgeted(self):
+        teacher = self.login("teacher")
+        timing = teacher.get("/teacher/classes").headers["Server-Timing"]
+        self.assertNotIn('desc="0 queries"', timing)
+
+        self.app.config["MAX_QUERIES_PER_REQUEST"] = 1
+        with self.assertRaises(QueryBudgetExceeded):
+            teacher.get("/teacher/classes")
+
+    def test_replica_rejects_writes(self):
+        with self.app.app_context():
+            with self.app.extensions['db_replica'].connect() as conn:
+                with self.assertRaises(Exception):
+                    conn.exec_driver_sql("DELETE FROM classes")
+
+
+if __name__ == "__main__":
+    unittest.main()
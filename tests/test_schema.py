@@ -0,0 +1,116 @@
+import os
+import shutil
+import tempfile
+import unittest
+import click
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from flask_migrate import stamp, upgrade
+from sqlalchemy import text
+from app import create_app, db
+from models.grade_summary import StudentGradeSummary
+from utils.schema import MIGRATIONS_DIR, SchemaOutdated
+
+BASELINE = 'f2fe5a81910e'
+
+
+class SchemaMigrationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workdir, ignore_errors=True)
+        self.uri = f"sqlite:///{os.path.join(self.workdir, 'app.db')}"
+        # Builds the database without the startup check
+        self.admin = self.make_app(SCHEMA_CHECK=False)
+
+    def make_app(self, **config):
+        app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': self.uri, **config},
+                         lightweight=False)
+        self.addCleanup(self.dispose, app)
+        return app
+
+    def dispose(self, app):
+        with app.app_context():
+            db.engine.dispose()
+
+    def test_startup_fails_until_upgraded(self):
+        with self.assertRaises(SchemaOutdated):
+            self.make_app()
+        with self.admin.app_context():
+            # The check never creates tables
+            self.assertEqual(db.inspect(db.engine).get_table_names(), [])
+            upgrade(directory=MIGRATIONS_DIR)
+        self.assertEqual(self.make_app().test_client().get("/login").status_code, 200)
+
+    def test_cli_commands_start_on_an_outdated_database(self):
+        # `flask db upgrade` has to load the app before it can upgrade
+        with click.Context(click.Command('db')):
+            self.make_app()
+
+    def test_migrations_match_models(self):
+        with self.admin.app_context():
+            upgrade(directory=MIGRATIONS_DIR)
+            with db.engine.connect() as conn:
+                diff = compare_metadata(MigrationContext.configure(conn), db.metadata)
+        self.assertEqual(diff, [])
+
+    def test_existing_database_is_upgraded_in_place(self):
+        with self.admin.app_context():
+            # A database created before the migrations: baseline tables, no revision
+            upgrade(directory=MIGRATIONS_DIR, revision=BASELINE)
+            db.session.execute(text("DROP TABLE alembic_version"))
+            for statement in (
+                "INSERT INTO users (id, username, email, password, role, status, created_at) "
+                "VALUES (1, 'kept', 'kept@example.com', 'x', 'student', 'active', '2024-01-01'), "
+                "(2, 'other', 'other@example.com', 'x', 'student', 'active', '2024-01-01')",
+                "INSERT INTO students (id, user_id, created_at) VALUES (1, 1, '2024-01-01'), (2, 2, '2024-01-01')",
+                "INSERT INTO classes (id, name, class_code, created_at) VALUES (1, 'Math', 'ABC123', '2024-01-01')",
+                "INSERT INTO assignments (id, title, description, due_date, created_at, class_id) "
+                "VALUES (1, 'A', 'd', '2024-02-01', '2024-01-01', 1), (2, 'B', 'd', '2024-02-01', '2024-01-01', 1)",
+                "INSERT INTO submissions (assignment_id, student_id, grade, submitted_at) "
+                "VALUES (1, 1, 90, '2024-01-02'), (1, 2, NULL, '2024-01-03')",
+            ):
+                db.session.execute(text(statement))
+            db.session.commit()
+
+            stamp(directory=MIGRATIONS_DIR, revision=BASELINE)
+            upgrade(directory=MIGRATIONS_DIR)
+            self.assertEqual(db.session.execute(text("SELECT username FROM users ORDER BY id")).scalars().all(),
+                             ['kept', 'other'])
+            # The new counters are filled from the existing submissions
+            counters = db.session.execute(text(
+                "SELECT id, submission_count, graded_count FROM assignments ORDER BY id")).all()
+            self.assertEqual([tuple(row) for row in counters], [(1, 2, 1), (2, 0, 0)])
+            # So are the grade summaries the student grade pages read
+            summaries = db.session.execute(text(
+                "SELECT student_id, class_id, submitted_count, graded_count, grade_sum, "
+                "highest, lowest, count_a, count_f FROM student_grade_summary ORDER BY student_id")).all()
+            self.assertEqual([tuple(row) for row in summaries],
+                             [(1, 1, 1, 1, 90, 90, 90, 1, 0), (2, 1, 1, 0, 0, None, None, 0, 0)])
+            self.assertIsNotNone(StudentGradeSummary.query.first().updated_at)
+        self.assertEqual(self.make_app().test_client().get("/login").status_code, 200)
+
+    def test_duplicate_submissions_stop_the_upgrade(self):
+        with self.admin.app_context():
+            upgrade(directory=MIGRATIONS_DIR, revision='519a381d6ba4')
+            for statement in (
+                "INSERT INTO users (id, username, email, password, role, status, created_at) "
+                "VALUES (1, 'twice', 'twice@example.com', 'x', 'student', 'active', '2024-01-01')",
+                "INSERT INTO students (id, user_id, created_at) VALUES (1, 1, '2024-01-01')",
+                "INSERT INTO classes (id, name, class_code, created_at) VALUES (1, 'Math', 'ABC123', '2024-01-01')",
+                "INSERT INTO assignments (id, title, description, due_date, created_at, class_id) "
+                "VALUES (1, 'A', 'd', '2024-02-01', '2024-01-01', 1)",
+                "INSERT INTO submissions (assignment_id, student_id, submitted_at) "
+                "VALUES (1, 1, '2024-01-02'), (1, 1, '2024-01-03')",
+            ):
+                db.session.execute(text(statement))
+            db.session.commit()
+            # Flask-Migrate logs the migration's error and exits
+            with self.assertRaises(SystemExit):
+                upgrade(directory=MIGRATIONS_DIR)
+            db.session.rollback()
+            self.assertEqual(db.session.execute(text("SELECT version_num FROM alembic_version")).scalar(),
+                             '519a381d6ba4')
+
+
+if __name__ == "__main__":
+    unittest.main()
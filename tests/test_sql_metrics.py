@@ -0,0 +1,62 @@
+import re
+import unittest
+from app import create_app, db
+from models.user import User
+from utils.sql_metrics import RequestSQLStats
+from werkzeug.security import generate_password_hash
+
+
+class SQLMetricsTestCase(unittest.TestCase):
+    def make_app(self, **config):
+        app = create_app({
+            'TESTING': True,
+            'WTF_CSRF_ENABLED': False,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+            **config,
+        })
+        with app.app_context():
+            db.create_all()
+            db.session.add(User(username="admin", email="admin@example.com",
+                                password=generate_password_hash("testpass1"), role="admin"))
+            db.session.commit()
+        self.addCleanup(self.drop, app)
+        client = app.test_client()
+        client.post("/login", data={"email": "admin@example.com", "password": "testpass1"})
+        return app, client
+
+    def drop(self, app):
+        with app.app_context():
+            db.drop_all()
+
+    def test_server_timing_header(self):
+        _, client = self.make_app(SQL_METRICS_ENABLED=True, SLOW_REQUEST_MS=None,
+                                  SLOW_REQUEST_QUERIES=None)
+        response = client.get("/admin/users")
+        match = re.fullmatch(r'db;dur=[\d.]+;desc="(\d+) queries", app;dur=[\d.]+',
+                             response.headers["Server-Timing"])
+        self.assertIsNotNone(match)
+        self.assertGreater(int(match.group(1)), 0)
+
+    def test_slow_requests_are_logged(self):
+        app, client = self.make_app(SQL_METRICS_ENABLED=True, SLOW_REQUEST_MS=None,
+                                    SLOW_REQUEST_QUERIES=1)
+        with self.assertLogs(app.logger, "WARNING") as logs:
+            client.get("/admin/users")
+        self.assertIn("Slow request GET /admin/users", logs.output[0])
+        self.assertIn("SELECT", logs.output[0])
+
+    def test_disabled_by_default(self):
+        _, client = self.make_app()
+        self.assertNotIn("Server-Timing", client.get("/admin/users").headers)
+
+    def test_keeps_slowest_statements(self):
+        stats = RequestSQLStats(keep_slowest=2)
+        for statement, duration in (("a", 0.3), ("b", 0.1), ("c", 0.5), ("d", 0.2)):
+            stats.add(statement, duration)
+        self.assertEqual(stats.count, 4)
+        self.assertAlmostEqual(stats.total, 1.1)
+        self.assertEqual([s for _, s in stats.slowest], ["c", "a"])
+
+
+if __name__ == "__main__":
+    unittest.main()
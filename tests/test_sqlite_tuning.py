@@ -0,0 +1,47 @@
+import os
+import shutil
+import tempfile
+import unittest
+from sqlalchemy import text
+from app import create_app, db
+from utils.db_benchmark import run_profile
+
+
+class SQLiteTuningTestCase(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workdir, ignore_errors=True)
+
+    def test_file_database_gets_pragmas_and_pool(self):
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(self.workdir, 'app.db')}",
+            'DB_POOL_SIZE': 3,
+        })
+        with app.app_context():
+            with db.engine.connect() as conn:
+                pragma = lambda name: conn.execute(text(f"PRAGMA {name}")).scalar()
+                self.assertEqual(pragma("journal_mode"), "wal")
+                self.assertEqual(pragma("foreign_keys"), 1)
+                self.assertEqual(pragma("busy_timeout"), 5000)
+                self.assertEqual(pragma("synchronous"), 1)  # NORMAL
+            self.assertEqual(db.engine.pool.size(), 3)
+            db.engine.dispose()
+
+    def test_memory_database_skips_pool_settings(self):
+        app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+        self.assertNotIn('pool_size', app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+        with app.app_context():
+            with db.engine.connect() as conn:
+                self.assertEqual(conn.execute(text("PRAGMA foreign_keys")).scalar(), 1)
+
+    def test_benchmark_profile_runs(self):
+        result = run_profile(os.path.join(self.workdir, 'bench.db'), pragmas={'journal_mode': 'WAL'},
+                             writers=1, readers=1, seconds=0.2)
+        self.assertEqual(result['journal_mode'], 'wal')
+        self.assertGreater(result['writes_per_sec'], 0)
+        self.assertGreater(result['reads_per_sec'], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from app import create_app
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds a fresh interpreter may spend on `import app`. Importing must not
+# build an app; this is generous so a slow CI machine does not trip it.
+IMPORT_BUDGET = 1.5
+
+# Modules only create_app() should pull in
+DEFERRED_MODULES = ('routes.admin', 'routes.teacher', 'routes.student', 'models.user',
+                    'commands', 'flask_migrate', 'alembic')
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+elapsed = time.perf_counter() - started
+print(json.dumps({'seconds': elapsed, 'loaded': [m for m in %r if m in sys.modules],
+                  'app_built': 'app' in vars(app)}))
+""" % (DEFERRED_MODULES,)
+
+
+class StartupTestCase(unittest.TestCase):
+    def test_import_is_within_budget(self):
+        output = subprocess.run([sys.executable, '-c', _PROBE], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        self.assertEqual(result['loaded'], [])
+        self.assertFalse(result['app_built'])
+        self.assertLess(result['seconds'], IMPORT_BUDGET)
+
+    def test_lightweight_mode_skips_side_effects(self):
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir, ignore_errors=True)
+        uploads = os.path.join(workdir, 'uploads')
+
+        # Every app shares the "app" logger, so compare against what is there
+        handlers = list(logging.getLogger('app').handlers)
+        app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+                          'UPLOAD_FOLDER': uploads})
+        self.assertFalse(os.path.exists(uploads))
+        self.assertEqual(app.logger.handlers, handlers)
+        self.assertIn('migrate', app.extensions)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from app import create_app, db
+from models.user import User
+from models.student import Student
+from models.teacher import Teacher
+from models.class_model import Class
+from models.assignment import Assignment
+from models.submission import Submission
+from utils.stats import get_submission_counts
+
+
+class SubmissionCountsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'WTF_CSRF_ENABLED': False,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        })
+
+        with self.app.app_context():
+            db.create_all()
+            teacher_user = User(username="teacher", email="teacher@example.com", password="x", role="teacher")
+            db.session.add(teacher_user)
+            db.session.flush()
+            teacher = Teacher(user_id=teacher_user.id)
+            db.session.add(teacher)
+            db.session.flush()
+            cls = Class(name="Math", teacher_id=teacher.id)
+            db.session.add(cls)
+            db.session.flush()
+
+            # Algebra: three submissions, two graded; Geometry: none
+            algebra = Assignment(title="Algebra", description="d", class_id=cls.id)
+            geometry = Assignment(title="Geometry", description="d", class_id=cls.id)
+            db.session.add_all([algebra, geometry])
+            db.session.flush()
+            for n, grade in enumerate((90, None, 0)):
+                user = User(username=f"s{n}", email=f"s{n}@example.com", password="x", role="student")
+                db.session.add(user)
+                db.session.flush()
+                student = Student(user_id=user.id)
+                db.session.add(student)
+                db.session.flush()
+                db.session.add(Submission(assignment_id=algebra.id, student_id=student.id, grade=grade))
+            db.session.commit()
+            self.algebra_id, self.geometry_id = algebra.id, geometry.id
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def test_counts_total_and_graded_per_assignment(self):
+        with self.app.app_context():
+            # A grade of 0 still counts as graded
+            self.assertEqual(get_submission_counts(), {self.algebra_id: (3, 2)})
+
+    def test_assignments_without_submissions_are_left_out(self):
+        with self.app.app_context():
+            counts = get_submission_counts([self.algebra_id, self.geometry_id])
+            self.assertEqual(counts, {self.algebra_id: (3, 2)})
+            self.assertEqual(counts.get(self.geometry_id, (0, 0)), (0, 0))
+            self.assertEqual(get_submission_counts([self.geometry_id]), {})
+
+    def test_empty_filter_counts_nothing(self):
+        with self.app.app_context():
+            self.assertEqual(get_submission_counts(iter([])), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
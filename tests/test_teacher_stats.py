@@ -0,0 +1,149 @@
+import unittest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import create_app, db
+from models.user import User
+from models.student import Student
+from models.teacher import Teacher
+from models.class_model import Class
+from models.assignment import Assignment
+from models.submission import Submission
+from utils.cache import TTLCache
+from werkzeug.security import generate_password_hash
+
+
+class TeacherStatsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'WTF_CSRF_ENABLED': False,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        })
+        self.now = 1000.0
+        self.app.extensions['teacher_stats_cache'] = TTLCache(ttl=300, clock=lambda: self.now)
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            users = {name: User(username=name, email=f"{name}@example.com",
+                                password=generate_password_hash("testpass1"), role=role)
+                     for name, role in (("teacher", "teacher"), ("alice", "student"), ("bob", "student"))}
+            db.session.add_all(users.values())
+            db.session.flush()
+            teacher = Teacher(user_id=users["teacher"].id)
+            alice = Student(user_id=users["alice"].id, first_name="Alice")
+            bob = Student(user_id=users["bob"].id, first_name="Bob")
+            db.session.add_all([teacher, alice, bob])
+            db.session.flush()
+
+            cls = Class(name="Math", teacher_id=teacher.id)
+            db.session.add(cls)
+            db.session.flush()
+            cls.students.append(alice)
+            assignment = Assignment(title="Algebra", description="d", class_id=cls.id,
+                                    due_date=datetime.utcnow() + timedelta(days=3))
+            db.session.add(assignment)
+            db.session.flush()
+            submission = Submission(assignment_id=assignment.id, student_id=alice.id,
+                                    submitted_at=datetime.utcnow())
+            db.session.add(submission)
+            db.session.commit()
+
+            self.class_id = cls.id
+            self.assignment_id = assignment.id
+            self.submission_id = submission.id
+
+        self.client.post("/login", data={"email": "teacher@example.com", "password": "testpass1"})
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def stats(self):
+        response = self.client.get("/teacher/stats")
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+
+    def test_stats_endpoint(self):
+        data = self.stats()
+        self.assertEqual(data["stats"], {"total_students": 1, "total_classes": 1,
+                                         "pending_assignments": 1, "upcoming_deadlines": 1})
+        self.assertEqual(data["recent_students"][0]["first_name"], "Alice")
+        self.assertEqual(data["recent_students"][0]["last_assignment"], "Algebra")
+        self.assertEqual(data["recent_classes"], [{"id": self.class_id, "name": "Math", "student_count": 1}])
+
+    def test_cached_dashboard_skips_stat_queries(self):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with self.app.app_context():
+            engine = db.engine
+        self.assertEqual(self.client.get("/teacher/dashboard").status_code, 200)
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            self.assertEqual(self.client.get("/teacher/dashboard").status_code, 200)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        self.assertFalse([s for s in statements if "submissions" in s or "class_student" in s])
+
+    def test_grading_invalidates(self):
+        self.assertEqual(self.stats()["stats"]["pending_assignments"], 1)
+        self.client.post(f"/teacher/submissions/{self.submission_id}/grade", data={"grade": "90"})
+        data = self.stats()
+        self.assertEqual(data["stats"]["pending_assignments"], 0)
+        self.assertEqual(data["recent_students"][0]["grade"], 90)
+
+    def test_enrollment_invalidates(self):
+        self.assertEqual(self.stats()["stats"]["total_students"], 1)
+
+        student = self.app.test_client()
+        student.post("/login", data={"email": "bob@example.com", "password": "testpass1"})
+        response = student.post(f"/student/classes/{self.class_id}/join")
+        self.assertTrue(response.get_json()["success"])
+        self.assertEqual(self.stats()["stats"]["total_students"], 2)
+
+        student.post(f"/student/classes/{self.class_id}/leave")
+        self.assertEqual(self.stats()["stats"]["total_students"], 1)
+
+    def test_assignment_creation_invalidates(self):
+        self.assertEqual(self.stats()["stats"]["upcoming_deadlines"], 1)
+        due = (datetime.utcnow() + timedelta(days=7)).strftime("%Y-%m-%d")
+        self.client.post("/teacher/assignments", data={"class_id": self.class_id, "title": "Geometry",
+                                                       "description": "d", "due_date": due})
+        data = self.stats()
+        self.assertEqual(data["stats"]["upcoming_deadlines"], 2)
+        self.assertEqual(data["recent_assignments"][0]["title"], "Geometry")
+
+    def test_ttl_bounds_staleness(self):
+        self.assertEqual(self.stats()["stats"]["total_classes"], 1)
+        with self.app.app_context():
+            # A change this worker was not told about
+            db.session.add(Class(name="Physics", teacher_id=1))
+            db.session.commit()
+        self.assertEqual(self.stats()["stats"]["total_classes"], 1)
+        self.now += 301
+        self.assertEqual(self.stats()["stats"]["total_classes"], 2)
+
+    def test_passed_deadlines_drop_out_without_recompute(self):
+        from utils.teacher_stats import get_teacher_stats
+
+        with self.app.test_request_context():
+            stats = get_teacher_stats(1)
+            self.assertEqual(stats.counts()["upcoming_deadlines"], 1)
+            later = datetime.utcnow() + timedelta(days=4)
+            self.assertEqual(stats.counts(now=later)["upcoming_deadlines"], 0)
+
+    def test_cached_rows_are_read_only(self):
+        from utils.teacher_stats import get_teacher_stats
+
+        with self.app.test_request_context():
+            stats = get_teacher_stats(1)
+            with self.assertRaises(TypeError):
+                stats.recent_classes[0]["name"] = "Changed"
+            self.assertEqual(get_teacher_stats(1).recent_classes[0]["name"], "Math")
+
+
+if __name__ == "__main__":
+    unittest.main()
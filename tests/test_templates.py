@@ -0,0 +1,40 @@
+import os
+import shutil
+import tempfile
+import unittest
+from app import create_app
+
+
+class TemplateCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+
+    def make_app(self, **config):
+        return create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://', **config})
+
+    def test_warm_templates_fills_cache(self):
+        app = self.make_app(TEMPLATE_CACHE_DIR=self.cache_dir)
+        output = app.test_cli_runner().invoke(args=["warm-templates"]).output
+        self.assertRegex(output, r"Compiled \d+ template")
+        self.assertTrue(os.listdir(self.cache_dir))
+
+        # A fresh worker loads compiled code instead of compiling
+        worker = self.make_app(TEMPLATE_CACHE_DIR=self.cache_dir)
+
+        def compile_source(*args, **kwargs):
+            raise AssertionError("template was compiled despite a warm cache")
+
+        worker.jinja_env.compile = compile_source
+        self.assertEqual(worker.test_client().get("/login").status_code, 200)
+
+    def test_no_cache_or_reload_in_tests_by_default(self):
+        app = self.make_app()
+        self.assertIsNone(app.jinja_env.bytecode_cache)
+        self.assertFalse(app.jinja_env.auto_reload)
+        result = app.test_cli_runner().invoke(args=["warm-templates"])
+        self.assertNotEqual(result.exit_code, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,252 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import create_app, db
+from models.user import User
+from models.student import Student
+from models.teacher import Teacher
+from models.class_model import Class
+from models.assignment import Assignment
+from models.submission import Submission
+from models.upload_session import UploadSession
+from werkzeug.security import generate_password_hash
+
+CONTENT = b"%PDF-1.4 " + os.urandom(5000)
+
+
+class ResumableUploadTestCase(unittest.TestCase):
+    def setUp(self):
+        self.submission_dir = tempfile.mkdtemp()
+        self.app = create_app({
+            'TESTING': True,
+            'WTF_CSRF_ENABLED': False,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+            'SUBMISSION_FOLDER': self.submission_dir,
+            'BLOB_STORE_FOLDER': os.path.join(self.submission_dir, 'blobs'),
+        })
+
+        with self.app.app_context():
+            db.create_all()
+            teacher_user = User(username="teacher", email="teacher@example.com",
+                                password=generate_password_hash("testpass1"), role="teacher")
+            student_user = User(username="student", email="student@example.com",
+                                password=generate_password_hash("testpass1"), role="student")
+            db.session.add_all([teacher_user, student_user])
+            db.session.flush()
+            teacher = Teacher(user_id=teacher_user.id)
+            student = Student(user_id=student_user.id)
+            db.session.add_all([teacher, student])
+            db.session.flush()
+            cls = Class(name="Math", teacher_id=teacher.id)
+            db.session.add(cls)
+            db.session.flush()
+            student.classes.append(cls)
+            assignment = Assignment(title="Essay", description="Write it", class_id=cls.id)
+            db.session.add(assignment)
+            db.session.commit()
+            self.assignment_id = assignment.id
+            self.student_id = student.id
+
+        self.client = self.app.test_client()
+        self.client.post("/login", data={"email": "student@example.com", "password": "testpass1"})
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+        shutil.rmtree(self.submission_dir, ignore_errors=True)
+
+    def start(self, size=len(CONTENT)):
+        response = self.client.post("/student/uploads", json={
+            "assignment_id": self.assignment_id,
+            "filename": "essay.pdf",
+            "size": size,
+            "content_type": "application/pdf",
+            "comments": "Final draft",
+        })
+        self.assertEqual(response.status_code, 201)
+        return response.get_json()["upload_id"]
+
+    def put(self, upload_id, offset, data):
+        return self.client.put(f"/student/uploads/{upload_id}", data=data,
+                               headers={"Upload-Offset": str(offset)},
+                               content_type="application/octet-stream")
+
+    def test_chunks_are_assembled_into_a_submission(self):
+        upload_id = self.start()
+        self.assertEqual(self.put(upload_id, 0, CONTENT[:2000]).get_json()["offset"], 2000)
+
+        # A retried chunk at a stale offset is rejected with the offset to resume from
+        conflict = self.put(upload_id, 0, CONTENT[:2000])
+        self.assertEqual(conflict.status_code, 409)
+        self.assertEqual(conflict.get_json()["offset"], 2000)
+
+        # Hash state is per process; losing it falls back to re-hashing the partial file
+        from utils import submissions
+        submissions._hashers.clear()
+
+        status = self.client.get(f"/student/uploads/{upload_id}").get_json()
+        self.put(upload_id, status["offset"], CONTENT[2000:])
+        response = self.client.post(f"/student/uploads/{upload_id}/complete", json={
+            "sha256": hashlib.sha256(CONTENT).hexdigest()})
+        self.assertTrue(response.get_json()["success"])
+
+        with self.app.app_context():
+            submission = Submission.query.one()
+            self.assertEqual(submission.content_hash, hashlib.sha256(CONTENT).hexdigest())
+            self.assertEqual(submission.comments, "Final draft")
+            self.assertEqual(submission.filename, "essay.pdf")
+            self.assertEqual(db.session.get(Assignment, self.assignment_id).submission_count, 1)
+            self.assertIsNone(db.session.get(UploadSession, upload_id))
+            from utils.submissions import resolve_submission_file
+            with open(resolve_submission_file(submission.file_path), "rb") as f:
+                self.assertEqual(f.read(), CONTENT)
+            submission_id = submission.id
+        self.assertEqual(os.listdir(os.path.join(self.submission_dir, "blobs", ".tmp")), [])
+
+        teacher = self.app.test_client()
+        teacher.post("/login", data={"email": "teacher@example.com", "password": "testpass1"})
+        download = teacher.get(f"/teacher/submissions/{submission_id}/download")
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(download.get_data(), CONTENT)
+        download.close()
+
+    def test_incomplete_or_corrupt_uploads_are_not_submitted(self):
+        upload_id = self.start()
+        self.put(upload_id, 0, CONTENT[:100])
+        response = self.client.post(f"/student/uploads/{upload_id}/complete")
+        self.assertEqual(response.status_code, 409)
+
+        overflow = self.put(upload_id, 100, CONTENT[100:] + b"extra")
+        self.assertEqual(overflow.status_code, 413)
+
+        upload_id = self.start()
+        self.put(upload_id, 0, CONTENT)
+        response = self.client.post(f"/student/uploads/{upload_id}/complete", json={"sha256": "0" * 64})
+        self.assertEqual(response.status_code, 422)
+        with self.app.app_context():
+            self.assertEqual(Submission.query.count(), 0)
+
+    def hold(self, upload_id, status, age=timedelta(0)):
+        """Mark an upload as claimed by another request"""
+        with self.app.app_context():
+            upload = db.session.get(UploadSession, upload_id)
+            upload.status = status
+            upload.updated_at = datetime.utcnow() - age
+            db.session.commit()
+
+    def test_one_request_at_a_time_writes_chunks(self):
+        upload_id = self.start()
+        self.hold(upload_id, "receiving")
+        busy = self.put(upload_id, 0, CONTENT[:2000])
+        self.assertEqual(busy.status_code, 409)
+        self.assertEqual(busy.get_json()["offset"], 0)
+
+        # The claim of a request that died is taken over
+        self.hold(upload_id, "receiving", age=timedelta(hours=1))
+        self.assertEqual(self.put(upload_id, 0, CONTENT).get_json()["offset"], len(CONTENT))
+        with self.app.app_context():
+            self.assertEqual(db.session.get(UploadSession, upload_id).status, "open")
+
+    def test_completion_is_claimed_once(self):
+        upload_id = self.start()
+        self.put(upload_id, 0, CONTENT)
+        with self.app.app_context():
+            engine = db.engine
+
+        # Another request claims the upload after this one loaded it
+        raced = []
+
+        def complete_elsewhere(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("UPDATE upload_sessions") and not raced:
+                raced.append(statement)
+                cursor.connection.cursor().execute(
+                    "UPDATE upload_sessions SET status = 'finishing' WHERE id = ?", (upload_id,))
+
+        event.listen(engine, "before_cursor_execute", complete_elsewhere)
+        try:
+            response = self.client.post(f"/student/uploads/{upload_id}/complete")
+        finally:
+            event.remove(engine, "before_cursor_execute", complete_elsewhere)
+        self.assertEqual(response.status_code, 409)
+        with self.app.app_context():
+            self.assertEqual(Submission.query.count(), 0)
+
+        self.hold(upload_id, "open")
+        self.assertTrue(self.client.post(f"/student/uploads/{upload_id}/complete").get_json()["success"])
+        # Repeating the call finds nothing to complete
+        self.assertEqual(self.client.post(f"/student/uploads/{upload_id}/complete").status_code, 404)
+        with self.app.app_context():
+            self.assertEqual(Submission.query.count(), 1)
+            self.assertEqual(db.session.get(Assignment, self.assignment_id).submission_count, 1)
+
+    def test_one_submission_per_assignment_across_uploads(self):
+        first, second, third = self.start(), self.start(), self.start()
+        for upload_id in (first, second, third):
+            self.put(upload_id, 0, CONTENT)
+        with self.app.app_context():
+            engine = db.engine
+
+        # Another upload for the same assignment commits just after this one
+        # found no submission
+        raced = []
+
+        def submit_elsewhere(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("SELECT") and "FROM submissions" in statement and not raced:
+                raced.append(statement)
+                other = cursor.connection.cursor()
+                other.execute("INSERT INTO submissions (assignment_id, student_id, submitted_at) "
+                              "VALUES (?, ?, '2024-01-01')", (self.assignment_id, self.student_id))
+                other.execute("UPDATE assignments SET submission_count = submission_count + 1")
+                cursor.connection.commit()
+
+        event.listen(engine, "after_cursor_execute", submit_elsewhere)
+        try:
+            response = self.client.post(f"/student/uploads/{first}/complete")
+        finally:
+            event.remove(engine, "after_cursor_execute", submit_elsewhere)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()["message"], "Assignment already submitted")
+
+        # A later upload is turned away by the check made under its claim
+        response = self.client.post(f"/student/uploads/{second}/complete")
+        self.assertEqual(response.get_json()["message"], "Assignment already submitted")
+        with self.app.app_context():
+            self.assertEqual(Submission.query.count(), 1)
+            self.assertEqual(db.session.get(Assignment, self.assignment_id).submission_count, 1)
+
+    def test_content_type_is_sniffed_from_the_file(self):
+        executable = b"MZ\x90\x00\x03\x00\x00\x00\x04\x00" + bytes(range(256)) * 10
+        upload_id = self.start(size=len(executable))
+        self.put(upload_id, 0, executable)
+        response = self.client.post(f"/student/uploads/{upload_id}/complete")
+        self.assertEqual(response.status_code, 415)
+        with self.app.app_context():
+            self.assertEqual(Submission.query.count(), 0)
+            self.assertIsNone(db.session.get(UploadSession, upload_id))
+
+    def test_rejects_disallowed_files(self):
+        response = self.client.post("/student/uploads", json={
+            "assignment_id": self.assignment_id, "filename": "run.exe",
+            "size": 10, "content_type": "application/octet-stream"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_form_upload_goes_to_blob_store(self):
+        response = self.client.post("/student/assignments/submit", data={
+            "assignment_id": self.assignment_id,
+            "file": (io.BytesIO(CONTENT), "essay.pdf", "application/pdf"),
+        }, content_type="multipart/form-data")
+        self.assertTrue(response.get_json()["success"])
+        with self.app.app_context():
+            submission = Submission.query.one()
+            self.assertEqual(submission.get_filename(), "essay.pdf")
+            from utils.blobstore import blob_path
+            self.assertTrue(os.path.isfile(blob_path(submission.content_hash)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import create_app, db
+from models.user import User
+from models.student import Student
+from models.teacher import Teacher
+from models.class_model import Class
+from models.assignment import Assignment
+from models.submission import Submission
+from utils.workload import get_student_workload
+from werkzeug.security import generate_password_hash
+
+
+class WorkloadTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            'TESTING': True,
+            'WTF_CSRF_ENABLED': False,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        })
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            teacher_user = User(username="teacher", email="teacher@example.com",
+                                password=generate_password_hash("testpass1"), role="teacher")
+            student_user = User(username="student", email="student@example.com",
+                                password=generate_password_hash("testpass1"), role="student")
+            db.session.add_all([teacher_user, student_user])
+            db.session.flush()
+
+            teacher = Teacher(user_id=teacher_user.id, first_name="Ada", last_name="Lovelace")
+            student = Student(user_id=student_user.id, first_name="Alan", last_name="Turing")
+            db.session.add_all([teacher, student])
+            db.session.flush()
+
+            math = Class(name="Math", teacher_id=teacher.id)
+            physics = Class(name="Physics", teacher_id=teacher.id)
+            empty = Class(name="Empty", teacher_id=teacher.id)
+            other = Class(name="Other", teacher_id=teacher.id)
+            db.session.add_all([math, physics, empty, other])
+            db.session.flush()
+            student.classes.extend([math, physics, empty])
+
+            future = datetime.utcnow() + timedelta(days=3)
+            past = datetime.utcnow() - timedelta(days=3)
+            graded = Assignment(title="Algebra", description="d", class_id=math.id, due_date=past)
+            submitted = Assignment(title="Geometry", description="d", class_id=math.id, due_date=future)
+            overdue = Assignment(title="Optics", description="d", class_id=physics.id, due_date=past)
+            pending = Assignment(title="Mechanics", description="d", class_id=physics.id, due_date=future)
+            hidden = Assignment(title="Hidden", description="d", class_id=other.id, due_date=future)
+            db.session.add_all([graded, submitted, overdue, pending, hidden])
+            db.session.flush()
+
+            db.session.add_all([
+                Submission(assignment_id=graded.id, student_id=student.id, grade=88),
+                Submission(assignment_id=submitted.id, student_id=student.id),
+            ])
+            db.session.commit()
+            self.student_id = student.id
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def test_workload_status_and_aggregates(self):
+        with self.app.app_context():
+            student = db.session.get(Student, self.student_id)
+            workload = get_student_workload(student)
+
+            self.assertEqual([c.name for c in workload.classes], ["Math", "Physics", "Empty"])
+            statuses = {item['assignment'].title: item['status'] for item in workload.items}
+            self.assertEqual(statuses, {
+                "Algebra": "graded",
+                "Geometry": "submitted",
+                "Optics": "overdue",
+                "Mechanics": "pending",
+            })
+            self.assertEqual(workload.grades, [88])
+            self.assertEqual(workload.submitted_count, 2)
+            self.assertEqual(workload.unsubmitted_count, 2)
+            self.assertEqual(workload.pending_grade_count, 1)
+
+            math_id = workload.classes[0].id
+            self.assertEqual(workload.class_stats[math_id]['assignment_count'], 2)
+            self.assertEqual(workload.class_stats[math_id]['student_count'], 1)
+            self.assertEqual(workload.class_average(math_id), 88)
+            self.assertIsNone(workload.class_average(workload.classes[2].id))
+
+    def test_workload_is_a_single_query(self):
+        with self.app.app_context():
+            student = db.session.get(Student, self.student_id)
+            statements = []
+
+            def count(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+
+            event.listen(db.engine, "before_cursor_execute", count)
+            try:
+                workload = get_student_workload(student)
+                names = [cls.teacher.full_name for cls in workload.classes]
+            finally:
+                event.remove(db.engine, "before_cursor_execute", count)
+
+            self.assertEqual(len(statements), 1)
+            self.assertEqual(names, ["Ada Lovelace"] * 3)
+
+    def test_student_pages_render(self):
+        self.client.post("/login", data={"email": "student@example.com", "password": "testpass1"})
+        for page in ("dashboard", "assignments", "grades", "profile"):
+            response = self.client.get(f"/student/{page}")
+            self.assertEqual(response.status_code, 200, page)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+"""
+Assignment attachment manifest
+
+Attachment metadata (name, size, MIME type, content hash) is recorded in
+the assignment_attachments table when files are uploaded, so listing and
+downloading attachments does not need to scan the upload directory.
+
+File contents live in the blob store (utils.blobstore), so a handout
+attached to several assignments is stored once. Files uploaded before the
+blob store stay in UPLOAD_FOLDER/<assignment id>/ until moved with
+import_attachment_files().
+"""
+import os
+from flask import current_app
+from extensions import db
+from models.assignment import Assignment
+from models.attachment import AssignmentAttachment
+from utils.blobstore import add_ref, blob_path, release, store_file, store_stream
+from utils.storage import guess_mime_type, hash_file
+
+# Font Awesome icon suffix per file extension
+ICON_MAP = {
+    'pdf': 'pdf',
+    'doc': 'word',
+    'docx': 'word',
+    'txt': 'alt',
+    'jpg': 'image',
+    'jpeg': 'image',
+    'png': 'image',
+    'xlsx': 'excel',
+    'xls': 'excel',
+    'zip': 'archive'
+}
+
+
+def attachment_icon(filename):
+    """Icon name for a filename based on its extension"""
+    ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    return ICON_MAP.get(ext, 'file')
+
+
+def assignment_upload_dir(assignment_id):
+    """Directory holding an assignment's attachment files"""
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], str(assignment_id))
+
+
+def attachment_path(attachment):
+    """Path of an attachment's file: its blob, or the legacy per-assignment file"""
+    if attachment.content_hash:
+        path = blob_path(attachment.content_hash)
+        if os.path.exists(path):
+            return path
+    return os.path.join(assignment_upload_dir(attachment.assignment_id), attachment.filename)
+
+
+def save_attachment(assignment, file, filename):
+    """
+    Store an uploaded file in the blob store and record it
+
+    Args:
+        assignment: Assignment model instance
+        file: FileStorage from the request
+        filename (str): Secure filename to list and serve it under
+
+    Returns:
+        AssignmentAttachment: New (uncommitted) manifest row
+    """
+    content_hash, size = store_stream(file.stream)
+    attachment = AssignmentAttachment(
+        assignment_id=assignment.id,
+        filename=filename,
+        size=size,
+        mime_type=guess_mime_type(filename, file.content_type),
+        content_hash=content_hash
+    )
+    db.session.add(attachment)
+    return attachment
+
+
+def serialize_attachments(assignment, url_for_file=None):
+    """
+    Attachment dicts for JSON responses
+
+    Args:
+        assignment: Assignment model instance
+        url_for_file: Optional callable building a download URL from a filename
+
+    Returns:
+        list: Dicts with filename, icon, size and (optionally) url
+    """
+    attachments = []
+    for attachment in assignment.attachments:
+        item = {
+            'filename': attachment.filename,
+            'icon': attachment_icon(attachment.filename),
+            'size': attachment.size,
+        }
+        if url_for_file:
+            item['url'] = url_for_file(attachment.filename)
+        attachments.append(item)
+    return attachments
+
+
+def reconcile_attachments():
+    """
+    Rebuild the attachment manifest from the upload directory
+
+    Adds rows for legacy files missing from the manifest, refreshes rows
+    whose size or hash changed and removes rows whose file (legacy or
+    blob) no longer exists. Blob references follow the hashes recorded,
+    so the counts stay right when the files are imported or deleted later.
+
+    Returns:
+        dict: Counts of added, updated and removed rows
+    """
+    result = {'added': 0, 'updated': 0, 'removed': 0}
+    root = current_app.config['UPLOAD_FOLDER']
+
+    existing = {}
+    for attachment in AssignmentAttachment.query.all():
+        existing[(attachment.assignment_id, attachment.filename)] = attachment
+
+    on_disk = set()
+    for (assignment_id,) in db.session.query(Assignment.id):
+        upload_dir = os.path.join(root, str(assignment_id))
+        if not os.path.isdir(upload_dir):
+            continue
+        for entry in os.scandir(upload_dir):
+            if not entry.is_file():
+                continue
+            key = (assignment_id, entry.name)
+            on_disk.add(key)
+            size, content_hash = hash_file(entry.path)
+
+            attachment = existing.get(key)
+            if attachment is None:
+                db.session.add(AssignmentAttachment(
+                    assignment_id=assignment_id,
+                    filename=entry.name,
+                    size=size,
+                    mime_type=guess_mime_type(entry.name),
+                    content_hash=content_hash
+                ))
+                add_ref(content_hash, size)
+                result['added'] += 1
+            elif (attachment.size, attachment.content_hash) != (size, content_hash):
+                release([attachment.content_hash])
+                add_ref(content_hash, size)
+                attachment.size = size
+                attachment.content_hash = content_hash
+                result['updated'] += 1
+
+    for key, attachment in existing.items():
+        if key not in on_disk and not os.path.exists(attachment_path(attachment)):
+            release([attachment.content_hash])
+            db.session.delete(attachment)
+            result['removed'] += 1
+
+    db.session.commit()
+    return result
+
+
+def import_attachment_files():
+    """
+    Move legacy attachment files from UPLOAD_FOLDER into the blob store
+
+    Returns:
+        int: Number of files moved (duplicates are dropped rather than kept)
+    """
+    moved = 0
+    for attachment in AssignmentAttachment.query.all():
+        legacy = os.path.join(assignment_upload_dir(attachment.assignment_id), attachment.filename)
+        if not os.path.isfile(legacy):
+            continue
+        size, content_hash = hash_file(legacy)
+        # The row's reference moves to the stored content
+        release([attachment.content_hash])
+        store_file(legacy, content_hash, size)
+        attachment.size = size
+        attachment.content_hash = content_hash
+        moved += 1
+    db.session.commit()
+    return moved
@@ -0,0 +1,225 @@
+"""
+Content-addressed blob store for uploaded files
+
+Files are stored once per distinct content under BLOB_STORE_FOLDER, named
+by their SHA-256 and sharded into two directory levels
+(``ab/cd/abcd...``) so no directory grows too large. Each Blob row keeps a
+reference count: storing a file takes a reference, deleting the
+attachment or submission that used it releases one.
+
+Reference counts only nominate candidates for garbage collection; before a
+blob is removed, collect_garbage() checks the attachment and submission
+tables for rows that still use it.
+"""
+import os
+import secrets
+import shutil
+import time
+from collections import Counter
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from extensions import db
+from models.attachment import AssignmentAttachment
+from models.blob import Blob
+from models.submission import Submission
+from utils.jobs import enqueue
+from utils.storage import save_stream
+
+
+def blob_root():
+    """Root directory of the blob store"""
+    return current_app.config['BLOB_STORE_FOLDER']
+
+
+def blob_path(content_hash):
+    """Path of the blob with the given SHA-256 hex digest"""
+    return os.path.join(blob_root(), content_hash[:2], content_hash[2:4], content_hash)
+
+
+def thumbnail_path(content_hash):
+    """Path of a blob's PNG thumbnail"""
+    return os.path.join(blob_root(), 'thumbs', content_hash[:2], f'{content_hash}.png')
+
+
+def temp_dir():
+    """Scratch directory on the same filesystem as the blobs, for atomic renames"""
+    path = os.path.join(blob_root(), '.tmp')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _increment(content_hash, count):
+    return Blob.query.filter_by(hash=content_hash).update(
+        {Blob.refcount: Blob.refcount + count}, synchronize_session=False)
+
+
+def add_ref(content_hash, size, count=1):
+    """
+    Take references to a blob, creating its row if needed (no commit)
+
+    Two first uploads of the same content can both find no row; the insert
+    skips a row that already exists (ON CONFLICT DO NOTHING), and the
+    upload that did not create it takes its reference with an UPDATE.
+    """
+    if _increment(content_hash, count):
+        return
+    dialect = postgresql if db.session.get_bind(Blob).dialect.name == 'postgresql' else sqlite
+    created = db.session.execute(
+        dialect.insert(Blob.__table__)
+        .values(hash=content_hash, size=size, refcount=count, created_at=datetime.utcnow())
+        .on_conflict_do_nothing(index_elements=['hash'])
+    ).rowcount
+    if created:
+        enqueue('process_blob', content_hash=content_hash)
+    else:
+        _increment(content_hash, count)
+
+
+def release(hashes):
+    """
+    Drop one reference per hash, e.g. for rows about to be deleted (no commit)
+
+    Args:
+        hashes: Iterable of content hashes; None entries are ignored
+    """
+    counts = Counter(h for h in hashes if h)
+    for content_hash, count in counts.items():
+        Blob.query.filter_by(hash=content_hash).update(
+            {Blob.refcount: Blob.refcount - count}, synchronize_session=False)
+
+
+def store_file(path, content_hash, size):
+    """
+    Move an already-hashed file into the store and take a reference (no commit)
+
+    If the store already holds the content, the file is deleted instead.
+
+    Args:
+        path (str): File to move; should be on the blob store's filesystem
+        content_hash (str): SHA-256 hex digest of the file
+        size (int): Size in bytes
+
+    Returns:
+        str: Path of the blob
+    """
+    target = blob_path(content_hash)
+    if os.path.exists(target):
+        os.remove(path)
+        # Refresh the mtime so a concurrent GC run treats the blob as in use
+        os.utime(target)
+    else:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.replace(path, target)
+        except OSError:
+            # Different filesystem: copy into the store's scratch directory
+            # first so the blob still appears with a single atomic rename
+            tmp_path = os.path.join(temp_dir(), secrets.token_hex(16))
+            shutil.copyfile(path, tmp_path)
+            os.replace(tmp_path, target)
+            os.remove(path)
+    add_ref(content_hash, size)
+    return target
+
+
+def store_stream(stream):
+    """
+    Write a stream into the store and take a reference (no commit)
+
+    Returns:
+        tuple: (SHA-256 hex digest, size in bytes)
+    """
+    tmp_path = os.path.join(temp_dir(), secrets.token_hex(16))
+    try:
+        size, content_hash = save_stream(stream, tmp_path, fsync=True)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    store_file(tmp_path, content_hash, size)
+    return content_hash, size
+
+
+def _reference_counts(hashes=None):
+    """Number of attachment and submission rows using each content hash"""
+    counts = Counter()
+    for column in (AssignmentAttachment.content_hash, Submission.content_hash):
+        query = db.session.query(column, func.count()).filter(column.isnot(None))
+        if hashes is not None:
+            query = query.filter(column.in_(hashes))
+        counts.update(dict(query.group_by(column).all()))
+    return counts
+
+
+def collect_garbage(full=False, grace_seconds=None):
+    """
+    Delete blobs that nothing references
+
+    By default only blobs whose reference count has dropped to zero are
+    checked. A full run recounts every blob's references and also removes
+    files on disk that have no Blob row (left by interrupted uploads).
+    Blobs touched within the grace period are kept.
+
+    Args:
+        full (bool): Recount all references and scan the store directory
+        grace_seconds (int): Minimum age of a file before it is removed
+            (defaults to BLOB_GC_GRACE)
+
+    Returns:
+        dict: Counts of removed blobs, reclaimed bytes and corrected refcounts
+    """
+    if grace_seconds is None:
+        grace_seconds = current_app.config.get('BLOB_GC_GRACE', 3600)
+    cutoff = time.time() - grace_seconds
+    result = {'removed': 0, 'bytes': 0, 'corrected': 0}
+
+    if full:
+        blobs = Blob.query.all()
+        counts = _reference_counts()
+    else:
+        blobs = Blob.query.filter(Blob.refcount <= 0).all()
+        counts = _reference_counts([blob.hash for blob in blobs]) if blobs else Counter()
+
+    doomed = []
+    for blob in blobs:
+        actual = counts.get(blob.hash, 0)
+        if actual:
+            if blob.refcount != actual:
+                blob.refcount = actual
+                result['corrected'] += 1
+            continue
+        path = blob_path(blob.hash)
+        if os.path.exists(path) and os.path.getmtime(path) > cutoff:
+            continue
+        doomed.append((path, blob.size))
+        db.session.delete(blob)
+    db.session.commit()
+
+    # Only unlink files once their rows are gone
+    for path, size in doomed:
+        try:
+            os.remove(path)
+            result['bytes'] += size
+        except FileNotFoundError:
+            pass
+        thumbnail = thumbnail_path(os.path.basename(path))
+        if os.path.exists(thumbnail):
+            os.remove(thumbnail)
+        result['removed'] += 1
+
+    if full:
+        known = {h for (h,) in db.session.query(Blob.hash)}
+        root = blob_root()
+        for dirpath, dirnames, filenames in os.walk(root):
+            if dirpath == root:
+                dirnames[:] = [d for d in dirnames if d not in ('.tmp', 'thumbs')]
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                if name not in known and os.path.getmtime(path) <= cutoff:
+                    result['bytes'] += os.path.getsize(path)
+                    os.remove(path)
+                    result['removed'] += 1
+
+    return result
@@ -0,0 +1,109 @@
+"""
+Concurrent read/write benchmark for the SQLite engine profile
+
+Runs reader and writer threads against a scratch database file, once with
+SQLAlchemy's defaults and once with the tuned profile (SQLITE_PRAGMAS and
+pool settings), and reports throughput and "database is locked" errors.
+Writers mimic a submission burst (short insert transactions); readers run
+the kind of indexed lookups and counts the dashboards do.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from utils.sqlite_tuning import listen_for_pragmas
+
+SCHEMA = (
+    "CREATE TABLE bench_submissions (id INTEGER PRIMARY KEY, student_id INTEGER NOT NULL, "
+    "payload TEXT NOT NULL, submitted_at REAL NOT NULL)",
+    "CREATE INDEX ix_bench_student ON bench_submissions (student_id)",
+)
+
+
+def _writer(engine, stop, result, student_id):
+    while not stop.is_set():
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(
+                    "INSERT INTO bench_submissions (student_id, payload, submitted_at) "
+                    "VALUES (:student_id, :payload, :now)"),
+                    {'student_id': student_id, 'payload': 'x' * 200, 'now': time.time()})
+            result['writes'] += 1
+        except OperationalError as e:
+            if 'locked' not in str(e) and 'busy' not in str(e):
+                raise
+            result['errors'] += 1
+
+
+def _reader(engine, stop, result, student_id):
+    while not stop.is_set():
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT count(*) FROM bench_submissions")).scalar()
+                conn.execute(text(
+                    "SELECT id, submitted_at FROM bench_submissions WHERE student_id = :student_id "
+                    "ORDER BY id DESC LIMIT 20"), {'student_id': student_id}).all()
+            result['reads'] += 1
+        except OperationalError as e:
+            if 'locked' not in str(e) and 'busy' not in str(e):
+                raise
+            result['errors'] += 1
+
+
+def run_profile(path, engine_options=None, pragmas=None, writers=4, readers=8, seconds=5.0):
+    """
+    Benchmark one engine profile against a fresh database at ``path``
+
+    Returns:
+        dict: reads, writes and errors per second, and the journal mode used
+    """
+    engine = create_engine(f"sqlite:///{path}", **(engine_options or {}))
+    listen_for_pragmas(engine, pragmas or {})
+    with engine.begin() as conn:
+        for statement in SCHEMA:
+            conn.execute(text(statement))
+        journal_mode = conn.execute(text("PRAGMA journal_mode")).scalar()
+
+    stop = threading.Event()
+    results = []
+    threads = []
+    for kind, target, count in (('write', _writer, writers), ('read', _reader, readers)):
+        for n in range(count):
+            result = {'reads': 0, 'writes': 0, 'errors': 0}
+            results.append(result)
+            threads.append(threading.Thread(target=target, args=(engine, stop, result, n % 50)))
+
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    return {
+        'journal_mode': journal_mode,
+        'reads_per_sec': sum(r['reads'] for r in results) / seconds,
+        'writes_per_sec': sum(r['writes'] for r in results) / seconds,
+        'errors': sum(r['errors'] for r in results),
+    }
+
+
+def compare_profiles(engine_options, pragmas, **kwargs):
+    """
+    Run the default and tuned profiles on separate scratch files
+
+    Returns:
+        dict: {'default': result, 'tuned': result} as from run_profile()
+    """
+    workdir = tempfile.mkdtemp(prefix='bench-db-')
+    try:
+        return {
+            'default': run_profile(os.path.join(workdir, 'default.db'), **kwargs),
+            'tuned': run_profile(os.path.join(workdir, 'tuned.db'), engine_options, pragmas, **kwargs),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
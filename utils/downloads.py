@@ -0,0 +1,212 @@
+"""
+Cacheable, resumable file downloads
+
+Uploaded files are stored under randomized names and never rewritten, so
+their content hash is a strong validator: responses carry it as the ETag
+and may be cached for a long time. Last-Modified comes from the database
+row, not the file: blobs are shared and their mtime is refreshed whenever
+the same content is uploaded again. Conditional requests (If-None-Match,
+If-Modified-Since) are answered with 304, and Range requests with single
+or multipart/byteranges 206 responses.
+
+Rows saved before content hashes were recorded get a weak ETag from the
+file's size and mtime until `flask import-blobs` hashes them; downloads
+never write to the database.
+
+With DOWNLOAD_OFFLOAD set, the body is left to the front proxy through an
+X-Accel-Redirect or X-Sendfile header; Flask still does the authorization
+and answers conditional requests.
+"""
+import os
+import secrets
+from datetime import timezone
+from urllib.parse import quote
+from flask import Response, current_app, request
+from utils.storage import CHUNK_SIZE, guess_mime_type
+
+# Requests asking for more ranges than this get the whole file instead
+MAX_RANGES = 16
+
+
+def _read_range(path, start, stop):
+    """Yield bytes start..stop-1 of a file in chunks"""
+    with open(path, 'rb') as stream:
+        stream.seek(start)
+        remaining = stop - start
+        while remaining > 0:
+            chunk = stream.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _content_disposition(download_name, as_attachment):
+    """Content-Disposition value, with an RFC 5987 name for non-ASCII filenames"""
+    kind = 'attachment' if as_attachment else 'inline'
+    try:
+        download_name.encode('ascii')
+    except UnicodeEncodeError:
+        return f"{kind}; filename*=UTF-8''{quote(download_name, safe='')}"
+    escaped = download_name.replace('\\', '\\\\').replace('"', '\\"')
+    return f'{kind}; filename="{escaped}"'
+
+
+def _satisfiable_ranges(byte_range, size):
+    """
+    Resolve a parsed Range header against the file size
+
+    Returns:
+        list: (start, stop) tuples with stop exclusive; empty when no range
+        can be served
+    """
+    ranges = []
+    for start, stop in byte_range.ranges:
+        if start < 0:  # suffix range: the last -start bytes
+            start, stop = max(size + start, 0), size
+        else:
+            stop = size if stop is None else min(stop, size)
+        if start < stop:
+            ranges.append((start, stop))
+    return ranges
+
+
+def _range_applies(etag, weak, last_modified):
+    """Check If-Range; a mismatch means the full file must be sent"""
+    if 'If-Range' not in request.headers:
+        return True
+    if_range = request.if_range
+    if if_range.date is not None:
+        return if_range.date == last_modified
+    # If-Range requires a strong comparison, so weak validators never match
+    if weak or request.headers['If-Range'].lstrip().startswith('W/'):
+        return False
+    return if_range.etag == etag
+
+
+def _not_modified(etag, last_modified):
+    """Check If-None-Match, falling back to If-Modified-Since"""
+    if 'If-None-Match' in request.headers:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    return since is not None and last_modified <= since
+
+
+def _offload_headers(path):
+    """
+    Internal redirect header for the configured proxy offload mode
+
+    Returns:
+        dict: Header to add, or None to stream the file from Python
+    """
+    mode = current_app.config.get('DOWNLOAD_OFFLOAD')
+    if not mode:
+        return None
+    path = os.path.abspath(path)
+    if mode == 'x-sendfile':
+        return {'X-Sendfile': path}
+    if mode == 'x-accel':
+        root = os.path.abspath(current_app.config['DOWNLOAD_OFFLOAD_ROOT'])
+        if os.path.commonpath([root, path]) != root:
+            return None
+        relative = os.path.relpath(path, root).replace(os.sep, '/')
+        prefix = current_app.config['DOWNLOAD_OFFLOAD_PREFIX'].rstrip('/')
+        return {'X-Accel-Redirect': f'{prefix}/{quote(relative)}'}
+    raise ValueError(f"Unknown DOWNLOAD_OFFLOAD mode: {mode!r}")
+
+
+def send_upload(path, etag, last_modified, download_name=None, mimetype=None, as_attachment=False):
+    """
+    Send an uploaded file with validators, caching and Range support
+
+    Args:
+        path (str): Absolute path of the file on disk
+        etag (str): Content hash of the file, used as a strong ETag; None
+            for rows saved without one (a weak ETag is derived instead)
+        last_modified (datetime): When the row was saved (naive UTC)
+        download_name (str): Filename shown to the browser (defaults to the basename)
+        mimetype (str): Content type (guessed from the name when omitted)
+        as_attachment (bool): Ask the browser to save rather than display the file
+
+    Returns:
+        Response: 200, 206, 304 or 416 response (an empty 200 carrying
+        the redirect header when offloading)
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+    """
+    stat = os.stat(path)
+    size = stat.st_size
+    weak = etag is None
+    if weak:
+        etag = f'{size:x}-{int(stat.st_mtime):x}'
+    last_modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+    download_name = download_name or os.path.basename(path)
+    mimetype = mimetype or guess_mime_type(download_name)
+
+    response = Response(mimetype=mimetype)
+    response.set_etag(etag, weak=weak)
+    response.last_modified = last_modified
+    response.headers['Cache-Control'] = (
+        f"private, max-age={current_app.config.get('DOWNLOAD_MAX_AGE', 31536000)}, immutable")
+
+    if _not_modified(etag, last_modified):
+        response.status_code = 304
+        response.headers.pop('Content-Type', None)
+        return response
+
+    response.headers['Content-Disposition'] = _content_disposition(download_name, as_attachment)
+
+    offload = _offload_headers(path)
+    if offload:
+        # The proxy sends the body and handles Range itself
+        response.headers.update(offload)
+        return response
+
+    response.headers['Accept-Ranges'] = 'bytes'
+
+    byte_range = request.range
+    if (byte_range is None or byte_range.units != 'bytes'
+            or len(byte_range.ranges) > MAX_RANGES
+            or not _range_applies(etag, weak, last_modified)):
+        response.response = _read_range(path, 0, size)
+        response.content_length = size
+        response.direct_passthrough = True
+        return response
+
+    ranges = _satisfiable_ranges(byte_range, size)
+    if not ranges:
+        response.status_code = 416
+        response.headers['Content-Range'] = f'bytes */{size}'
+        response.headers.pop('Content-Disposition')
+        response.content_length = 0
+        return response
+
+    response.status_code = 206
+    response.direct_passthrough = True
+    if len(ranges) == 1:
+        start, stop = ranges[0]
+        response.headers['Content-Range'] = f'bytes {start}-{stop - 1}/{size}'
+        response.response = _read_range(path, start, stop)
+        response.content_length = stop - start
+        return response
+
+    boundary = secrets.token_hex(16)
+    parts = []
+    for start, stop in ranges:
+        head = (f'--{boundary}\r\nContent-Type: {mimetype}\r\n'
+                f'Content-Range: bytes {start}-{stop - 1}/{size}\r\n\r\n').encode('latin-1')
+        parts.append((head, start, stop))
+    tail = f'--{boundary}--\r\n'.encode('latin-1')
+
+    def generate():
+        for head, start, stop in parts:
+            yield head
+            yield from _read_range(path, start, stop)
+            yield b'\r\n'
+        yield tail
+
+    response.response = generate()
+    response.content_type = f'multipart/byteranges; boundary={boundary}'
+    response.content_length = sum(len(head) + (stop - start) + 2 for head, start, stop in parts) + len(tail)
+    return response
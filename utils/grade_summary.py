@@ -0,0 +1,165 @@
+"""
+Materialized per-student grade summaries
+
+StudentGradeSummary keeps, per student and class, the submission and
+grade counts, grade sum, highest/lowest grade and letter distribution the
+student grade pages display. Writes that change a grade or add or remove
+a submission call refresh_grade_summaries() for the (student, class)
+pairs they touched, inside their own transaction; each refresh is one
+grouped query over just those pairs. `flask rebuild-grade-summaries`
+recomputes the whole table.
+"""
+from datetime import datetime
+from sqlalchemy import case, delete, func, insert, tuple_
+from extensions import db
+from models.assignment import Assignment
+from models.class_model import Class, class_student
+from models.grade_summary import GRADE_BANDS, StudentGradeSummary
+from models.submission import Submission
+from utils.loaders import class_count_columns, loader_options
+
+
+def _band_count(lower, upper):
+    condition = Submission.grade >= lower if lower is not None else Submission.grade.isnot(None)
+    if upper is not None:
+        condition = condition & (Submission.grade < upper)
+    return func.sum(case((condition, 1), else_=0))
+
+
+def _aggregate_rows(pairs=None):
+    """Summary values per (student, class), computed from submissions"""
+    columns = [
+        Submission.student_id, Assignment.class_id,
+        func.count(Submission.id), func.count(Submission.grade),
+        func.coalesce(func.sum(Submission.grade), 0),
+        func.max(Submission.grade), func.min(Submission.grade),
+    ]
+    upper = None
+    for _, lower in GRADE_BANDS:
+        columns.append(_band_count(lower, upper))
+        upper = lower
+
+    query = (
+        db.session.query(*columns)
+        .join(Assignment, Submission.assignment_id == Assignment.id)
+        .group_by(Submission.student_id, Assignment.class_id)
+    )
+    if pairs is not None:
+        query = query.filter(tuple_(Submission.student_id, Assignment.class_id).in_(pairs))
+
+    now = datetime.utcnow()
+    for student_id, class_id, submitted, graded, total, highest, lowest, *bands in query:
+        row = {
+            'student_id': student_id, 'class_id': class_id,
+            'submitted_count': submitted, 'graded_count': graded, 'grade_sum': total,
+            'highest': highest, 'lowest': lowest, 'updated_at': now,
+        }
+        for (letter, _), count in zip(GRADE_BANDS, bands):
+            row[f'count_{letter.lower()}'] = count or 0
+        yield row
+
+
+def refresh_grade_summaries(pairs):
+    """
+    Recompute the summaries of the given (student id, class id) pairs (no commit)
+
+    Args:
+        pairs: Iterable of (student_id, class_id) tuples
+    """
+    pairs = sorted(set(pairs))
+    if not pairs:
+        return
+    rows = list(_aggregate_rows(pairs))
+    db.session.execute(delete(StudentGradeSummary).where(
+        tuple_(StudentGradeSummary.student_id, StudentGradeSummary.class_id).in_(pairs)))
+    if rows:
+        db.session.execute(insert(StudentGradeSummary), rows)
+
+
+def summary_pairs(submissions):
+    """
+    (student id, class id) pairs covered by a Submission query, e.g. rows
+    about to be deleted
+
+    Returns:
+        set: Pairs to pass to refresh_grade_summaries()
+    """
+    rows = (
+        submissions.join(Assignment, Submission.assignment_id == Assignment.id)
+        .with_entities(Submission.student_id, Assignment.class_id)
+        .distinct()
+    )
+    return {(student_id, class_id) for student_id, class_id in rows}
+
+
+def drop_student_summaries(student_id):
+    """Delete a student's summaries, e.g. with their profile (no commit)"""
+    db.session.execute(delete(StudentGradeSummary).where(StudentGradeSummary.student_id == student_id))
+
+
+def rebuild_grade_summaries():
+    """
+    Recompute the whole summary table from submissions
+
+    Returns:
+        int: Number of summary rows written
+    """
+    rows = list(_aggregate_rows())
+    db.session.execute(delete(StudentGradeSummary))
+    if rows:
+        db.session.execute(insert(StudentGradeSummary), rows)
+    db.session.commit()
+    return len(rows)
+
+
+def get_class_summaries(student):
+    """
+    The student's enrolled classes with their grade summaries
+
+    Args:
+        student: Student model instance
+
+    Returns:
+        list: (class, summary or None, student_count, assignment_count)
+        tuples ordered by class id, with each class's teacher loaded
+    """
+    student_count, assignment_count = class_count_columns()
+
+    return (
+        db.session.query(Class, StudentGradeSummary, student_count, assignment_count)
+        .join(class_student, class_student.c.class_id == Class.id)
+        .outerjoin(StudentGradeSummary, (StudentGradeSummary.class_id == Class.id)
+                   & (StudentGradeSummary.student_id == student.id))
+        .options(*loader_options('student_class_list'))
+        .filter(class_student.c.student_id == student.id)
+        .order_by(Class.id)
+        .all()
+    )
+
+
+def combine_summaries(summaries):
+    """
+    Totals across several class summaries
+
+    Args:
+        summaries: StudentGradeSummary rows (None entries are ignored)
+
+    Returns:
+        dict: submitted_count, graded_count, pending_count, average (0 when
+        nothing is graded) and distribution (letter -> count)
+    """
+    summaries = [summary for summary in summaries if summary is not None]
+    graded = sum(summary.graded_count for summary in summaries)
+    submitted = sum(summary.submitted_count for summary in summaries)
+    total = sum(summary.grade_sum for summary in summaries)
+    distribution = {letter: 0 for letter, _ in GRADE_BANDS}
+    for summary in summaries:
+        for letter, count in summary.distribution.items():
+            distribution[letter] += count
+    return {
+        'submitted_count': submitted,
+        'graded_count': graded,
+        'pending_count': submitted - graded,
+        'average': total / graded if graded else 0,
+        'distribution': distribution,
+    }
@@ -0,0 +1,164 @@
+"""
+Applying grades to submissions
+
+Single and bulk grading share apply_grades(): ownership of every
+submission is checked with one query, the grades are written with
+executemany UPDATEs, the affected grade summaries are refreshed, and the
+whole batch is committed once.
+
+Whether a grade is a submission's first decides graded_count, so it is
+not taken from the ownership query: first grades are written with
+``WHERE grade IS NULL`` and the UPDATE's row count is what gets added.
+Two workers grading the same submission at once count it once.
+"""
+import math
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import bindparam, func, update
+from extensions import db
+from models.assignment import Assignment
+from models.class_model import Class
+from models.submission import Submission
+from utils.activity import record_activity
+from utils.grade_summary import refresh_grade_summaries
+from utils.teacher_stats import invalidate_teacher_stats
+
+_submissions = Submission.__table__
+
+# Feedback left as None keeps the submission's existing feedback
+_GRADE_SUBMISSION = (
+    update(_submissions)
+    .where(_submissions.c.id == bindparam('submission_id'))
+    .values(grade=bindparam('new_grade'), graded_at=bindparam('new_graded_at'),
+            feedback=func.coalesce(bindparam('new_feedback'), _submissions.c.feedback))
+)
+_FIRST_GRADE = _GRADE_SUBMISSION.where(_submissions.c.grade.is_(None))
+
+
+def parse_grade(value):
+    """
+    Parse a grade out of 100
+
+    Args:
+        value: Grade as submitted (string or number)
+
+    Returns:
+        float: The grade
+
+    Raises:
+        ValueError: With a user-facing message if the grade is invalid
+    """
+    try:
+        grade = float(str(value).strip())
+    except (TypeError, ValueError):
+        raise ValueError("Invalid grade format")
+    if not math.isfinite(grade):
+        raise ValueError("Invalid grade format")
+    if grade < 0 or grade > 100:
+        raise ValueError("Grade must be between 0 and 100")
+    return grade
+
+
+def _result(submission_id, status, message, grade=None):
+    result = {'submission_id': submission_id, 'success': status == 200,
+              'status': status, 'message': message}
+    if grade is not None:
+        result['grade'] = grade
+    return result
+
+
+def apply_grades(teacher, entries):
+    """
+    Grade many submissions in one transaction
+
+    Entries that fail validation or belong to another teacher's class are
+    reported and skipped; the rest are saved together. Omitting
+    ``feedback`` from an entry keeps the submission's existing feedback.
+
+    Args:
+        teacher: Teacher doing the grading
+        entries (list): Dicts with submission_id, grade and optional feedback
+
+    Returns:
+        list: One result dict per entry, in input order, with
+        submission_id, success, status (HTTP-style code) and message
+    """
+    results = [None] * len(entries)
+    pending = {}  # submission id -> (entry index, grade, feedback)
+
+    for index, entry in enumerate(entries):
+        submission_id = entry.get('submission_id') if isinstance(entry, dict) else None
+        try:
+            submission_id = int(submission_id)
+        except (TypeError, ValueError):
+            results[index] = _result(submission_id, 400, "submission_id is required")
+            continue
+        if submission_id in pending:
+            results[index] = _result(submission_id, 400, "Submission listed more than once")
+            continue
+        try:
+            grade = parse_grade(entry.get('grade'))
+        except ValueError as e:
+            results[index] = _result(submission_id, 400, str(e))
+            continue
+        feedback = entry.get('feedback')
+        if feedback is not None:
+            feedback = str(feedback).strip()
+        pending[submission_id] = (index, grade, feedback)
+
+    if not pending:
+        return results
+
+    # One query resolves existence, ownership and the previous grade
+    rows = (
+        db.session.query(Submission.id, Submission.student_id, Submission.assignment_id,
+                         Assignment.class_id, Assignment.title, Submission.grade, Class.teacher_id)
+        .join(Assignment, Submission.assignment_id == Assignment.id)
+        .join(Class, Assignment.class_id == Class.id)
+        .filter(Submission.id.in_(pending))
+        .all()
+    )
+    found = {row.id: row for row in rows}
+
+    now = datetime.utcnow()
+    regrades = []
+    first_grades = defaultdict(list)  # assignment id -> updates
+    summaries = set()
+    graded = []
+    for submission_id, (index, grade, feedback) in pending.items():
+        row = found.get(submission_id)
+        if row is None:
+            results[index] = _result(submission_id, 404, "Submission not found")
+            continue
+        if row.teacher_id != teacher.id:
+            results[index] = _result(submission_id, 403, "Unauthorized")
+            continue
+
+        values = {'submission_id': submission_id, 'new_grade': grade,
+                  'new_graded_at': now, 'new_feedback': feedback}
+        if row.grade is None:
+            first_grades[row.assignment_id].append(values)
+        else:
+            regrades.append(values)
+        summaries.add((row.student_id, row.class_id))
+        results[index] = _result(submission_id, 200, "Grade saved!", grade)
+        graded.append((row.title, row.student_id, grade))
+
+    if graded:
+        for assignment_id, updates in first_grades.items():
+            count = db.session.execute(_FIRST_GRADE, updates).rowcount
+            if count:
+                Assignment.adjust_counters(assignment_id, graded=count)
+            if count < len(updates):
+                # Graded by someone else meanwhile: still save this grade
+                regrades.extend(updates)
+        if regrades:
+            db.session.execute(_GRADE_SUBMISSION, regrades)
+        refresh_grade_summaries(summaries)
+        db.session.commit()
+        invalidate_teacher_stats(teacher.id)
+        for title, student_id, grade in graded:
+            record_activity('assignment_graded',
+                            f'"{title}" graded for student ID {student_id}: {grade:g}')
+
+    return results
@@ -0,0 +1,179 @@
+"""
+Request-scoped identity for the logged-in user
+
+The user and their Teacher/Student profile are resolved at most once per
+request and kept on ``flask.g``, so route handlers and decorators do not
+each look the profile up again.
+
+Across requests, users are served from an in-process TTL/LRU cache of
+immutable UserSnapshot objects. Code that changes a user must load the
+User row itself and call invalidate_user() afterwards.
+"""
+from flask import current_app, g
+from flask_login import UserMixin, current_user
+from extensions import db
+from models.user import User
+from models.student import Student
+from models.teacher import Teacher
+from utils.cache import TTLCache
+from utils.loaders import loader_options
+
+_MISSING = object()
+
+
+class UserSnapshot(UserMixin):
+    """
+    Read-only copy of a User row used as Flask-Login's current_user
+
+    Snapshots are shared between requests and threads, so they cannot be
+    modified. Load the User model to make changes.
+    """
+
+    FIELDS = ('id', 'username', 'email', 'password', 'role', 'status',
+              'created_at', 'last_login')
+    __slots__ = FIELDS
+
+    def __init__(self, user):
+        for field in self.FIELDS:
+            object.__setattr__(self, field, getattr(user, field))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(
+            "UserSnapshot is read-only; load the User model to change it")
+
+    def __repr__(self):
+        return f"<UserSnapshot {self.username} ({self.role})>"
+
+    def is_admin(self):
+        """Check if user is an admin"""
+        return self.role == 'admin'
+
+    def is_teacher(self):
+        """Check if user is a teacher"""
+        return self.role == 'teacher'
+
+    def is_student(self):
+        """Check if user is a student"""
+        return self.role == 'student'
+
+
+def init_user_cache(app):
+    """Create the app's user snapshot cache from USER_CACHE_SIZE/USER_CACHE_TTL"""
+    app.extensions['user_cache'] = TTLCache(
+        maxsize=app.config.get('USER_CACHE_SIZE', 1024),
+        ttl=app.config.get('USER_CACHE_TTL', 60)
+    )
+
+
+def get_user_cache():
+    """The current app's user snapshot cache"""
+    return current_app.extensions['user_cache']
+
+
+def invalidate_user(user_id):
+    """Drop a user's cached snapshot after the user row changed or was deleted"""
+    get_user_cache().invalidate(int(user_id))
+
+
+def load_user_identity(user_id):
+    """
+    Load the session user for Flask-Login
+
+    Returns a cached snapshot when one is available. Otherwise the user is
+    queried, with the role profile joined into the same query (and cached
+    on ``g`` for get_role_profile()) when LOAD_ROLE_PROFILE is enabled.
+
+    Args:
+        user_id: User id stored in the session
+
+    Returns:
+        UserSnapshot or None
+    """
+    user_id = int(user_id)
+    cache = get_user_cache()
+    snapshot = cache.get(user_id)
+    if snapshot is not None:
+        return snapshot
+
+    query = User.query
+    load_profile = current_app.config.get('LOAD_ROLE_PROFILE', True)
+    if load_profile:
+        query = query.options(*loader_options('user_identity'))
+
+    user = query.filter(User.id == user_id).first()
+    if user is None:
+        return None
+    # Keep the model alive for this request so lazy loads such as
+    # profile.user are served from the session's identity map
+    g.user_model = user
+    if load_profile:
+        g.role_profile = _profile_for(user)
+
+    snapshot = UserSnapshot(user)
+    cache.set(user_id, snapshot)
+    return snapshot
+
+
+def get_current_user_model():
+    """
+    Get the current user as a User model instance, for making changes
+
+    Returns:
+        User or None
+    """
+    if not current_user.is_authenticated:
+        return None
+    if isinstance(current_user._get_current_object(), User):
+        return current_user._get_current_object()
+    if 'user_model' not in g:
+        g.user_model = db.session.get(User, current_user.id)
+    return g.user_model
+
+
+def _profile_for(user):
+    """Pick the profile matching the user's role from loaded relationships"""
+    if user.role == 'teacher':
+        return user.teacher_profile
+    if user.role == 'student':
+        return user.student_profile
+    return None
+
+
+def get_role_profile():
+    """
+    Get the current user's Teacher or Student profile
+
+    Uses the profile loaded with the user when available, otherwise queries
+    it (joined with its user row) once and caches the result for the rest
+    of the request.
+
+    Returns:
+        Teacher, Student or None (admins and anonymous users have no profile)
+    """
+    if not current_user.is_authenticated:
+        return None
+
+    profile = g.get('role_profile', _MISSING)
+    if profile is _MISSING:
+        if current_user.role == 'teacher':
+            profile = Teacher.query.options(*loader_options('teacher_profile')).filter_by(
+                user_id=current_user.id).first()
+        elif current_user.role == 'student':
+            profile = Student.query.options(*loader_options('student_profile')).filter_by(
+                user_id=current_user.id).first()
+        else:
+            profile = None
+        g.role_profile = profile
+    return profile
+
+
+def get_current_teacher():
+    """Get the current user's Teacher profile, or None"""
+    profile = get_role_profile()
+    return profile if isinstance(profile, Teacher) else None
+
+
+def get_current_student():
+    """Get the current user's Student profile, or None"""
+    profile = get_role_profile()
+    return profile if isinstance(profile, Student) else None
@@ -0,0 +1,200 @@
+"""
+Background job queue backed by the jobs table
+
+Requests enqueue work with enqueue(); `flask jobs-worker` runs a pool of
+worker processes that claim queued jobs and execute their handlers. The
+queue lives in the application database, so no external broker is needed.
+
+Claiming uses a conditional UPDATE, so a job is only run by one worker
+even when several processes poll the same table. Failed jobs are retried
+with a backoff up to JOB_MAX_ATTEMPTS; jobs left running by a crashed
+worker are requeued after JOB_TIMEOUT seconds.
+
+With JOBS_EAGER enabled (useful in tests and single-process setups),
+jobs run inline when they are enqueued.
+"""
+import json
+import logging
+import multiprocessing
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from extensions import db
+from models.job import Job
+
+logger = logging.getLogger(__name__)
+
+# Job kind -> handler function
+JOB_HANDLERS = {}
+
+
+def job_handler(kind):
+    """
+    Register a function as the handler for a job kind
+
+    Handlers receive the job's payload as keyword arguments, work in the
+    current session and must not commit; the worker commits on success.
+    """
+    def decorator(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def _load_handlers():
+    """Import the modules that register job handlers"""
+    import utils.processing  # noqa: F401
+
+
+def _run_handler(kind, payload):
+    _load_handlers()
+    handler = JOB_HANDLERS.get(kind)
+    if handler is None:
+        raise LookupError(f"No handler registered for job kind {kind!r}")
+    handler(**payload)
+
+
+def enqueue(kind, **payload):
+    """
+    Queue a job (no commit; it becomes visible with the caller's commit)
+
+    Args:
+        kind (str): Registered job kind
+        **payload: JSON-serializable keyword arguments for the handler
+
+    Returns:
+        Job: The queued job, or None when the job ran eagerly
+    """
+    if current_app.config.get('JOBS_EAGER'):
+        try:
+            with db.session.begin_nested():
+                _run_handler(kind, payload)
+        except Exception:
+            logger.exception("Eager job %s failed", kind)
+        return None
+
+    job = Job(kind=kind, payload=json.dumps(payload))
+    db.session.add(job)
+    return job
+
+
+def _requeue_stale(now):
+    """Return jobs stuck in 'running' past JOB_TIMEOUT to the queue"""
+    timeout = current_app.config.get('JOB_TIMEOUT', 600)
+    Job.query.filter(
+        Job.status == 'running',
+        Job.started_at < now - timedelta(seconds=timeout)
+    ).update({Job.status: 'queued'}, synchronize_session=False)
+
+
+def claim_job():
+    """
+    Atomically take the oldest runnable job
+
+    Returns:
+        Job or None
+    """
+    now = datetime.utcnow()
+    _requeue_stale(now)
+    db.session.commit()
+
+    while True:
+        candidate = (
+            db.session.query(Job.id)
+            .filter(Job.status == 'queued', Job.run_after <= now)
+            .order_by(Job.run_after, Job.id)
+            .first()
+        )
+        if candidate is None:
+            return None
+        claimed = Job.query.filter(Job.id == candidate.id, Job.status == 'queued').update(
+            {Job.status: 'running', Job.started_at: now, Job.attempts: Job.attempts + 1},
+            synchronize_session=False)
+        db.session.commit()
+        if claimed:
+            return db.session.get(Job, candidate.id)
+        # Another worker got there first; try the next one
+
+
+def run_job(job):
+    """
+    Execute a claimed job and record the outcome
+
+    Returns:
+        bool: True if the handler succeeded
+    """
+    try:
+        _run_handler(job.kind, job.args)
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(Job, job.id)
+        job.last_error = f"{type(e).__name__}: {e}"
+        if job.attempts >= current_app.config.get('JOB_MAX_ATTEMPTS', 3):
+            job.status = 'failed'
+            job.finished_at = datetime.utcnow()
+            logger.exception("Job %s (%s) failed permanently", job.id, job.kind)
+        else:
+            job.status = 'queued'
+            job.run_after = datetime.utcnow() + timedelta(seconds=2 ** job.attempts)
+            logger.warning("Job %s (%s) failed, will retry: %s", job.id, job.kind, e)
+        db.session.commit()
+        return False
+
+    job.status = 'done'
+    job.last_error = None
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return True
+
+
+def work(burst=False, poll_interval=1.0):
+    """
+    Run jobs until stopped (or, in burst mode, until the queue is empty)
+
+    Returns:
+        int: Number of jobs processed
+    """
+    processed = 0
+    while True:
+        job = claim_job()
+        if job is None:
+            if burst:
+                return processed
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+        processed += 1
+
+
+def _worker_process(burst, poll_interval):
+    """Entry point of a pool process: build its own app and work the queue"""
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        work(burst=burst, poll_interval=poll_interval)
+
+
+def run_worker_pool(processes, burst=False, poll_interval=1.0):
+    """
+    Work the queue with a pool of processes
+
+    Each process creates its own app and database connections. With a
+    single process the worker runs in the current process instead.
+    """
+    if processes <= 1:
+        return work(burst=burst, poll_interval=poll_interval)
+
+    context = multiprocessing.get_context('spawn')
+    workers = [
+        context.Process(target=_worker_process, args=(burst, poll_interval), daemon=True)
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
@@ -0,0 +1,121 @@
+"""
+Named eager-loading strategies
+
+Each listing or detail page that walks relationships asks for its loader
+options here by name instead of building them inline, so the whole
+app's loading profile can be reviewed in one place:
+
+    Student.query.options(*loader_options('teacher_student_list'))
+
+joinedload is used for many-to-one and one-to-one hops (one LEFT JOIN,
+no extra round trip); selectinload for collections (one extra
+``IN (...)`` query for the whole page instead of one per row).
+
+Class.students, Class.assignments and Assignment.submissions are dynamic
+relationships and cannot be eager loaded. Pages that only need their
+sizes select class_count_columns() alongside the class instead.
+"""
+from sqlalchemy import func
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
+from extensions import db
+from models.assignment import Assignment
+from models.class_model import Class, class_student
+from models.student import Student
+from models.submission import Submission
+from models.teacher import Teacher
+from models.user import User
+
+# Built on first use: backref attributes such as Student.user only exist
+# once the mappers are configured
+LOADER_STRATEGIES = {
+    # Per-request identity lookups (utils.identity)
+    'user_identity': lambda: (
+        joinedload(User.student_profile),
+        joinedload(User.teacher_profile),
+    ),
+    'teacher_profile': lambda: (
+        joinedload(Teacher.user),
+    ),
+    'student_profile': lambda: (
+        joinedload(Student.user),
+    ),
+    # Admin
+    'admin_user_table': lambda: (
+        joinedload(User.student_profile),
+        joinedload(User.teacher_profile),
+    ),
+    'admin_teacher_table': lambda: (
+        joinedload(Teacher.user),
+    ),
+    'admin_student_table': lambda: (
+        joinedload(Student.user),
+        selectinload(Student.classes),
+    ),
+    'admin_assignment_table': lambda: (
+        joinedload(Assignment.teacher).joinedload(Teacher.user),
+        joinedload(Assignment.class_obj),
+    ),
+    'admin_assignment_detail': lambda: (
+        joinedload(Assignment.class_obj).joinedload(Class.teacher).joinedload(Teacher.user),
+        selectinload(Assignment.attachments),
+    ),
+    # Teacher; the assignment list already joins Class to filter by teacher
+    'teacher_assignment_list': lambda: (
+        contains_eager(Assignment.class_obj),
+    ),
+    'teacher_assignment_detail': lambda: (
+        joinedload(Submission.student),
+    ),
+    'teacher_class_roster': lambda: (
+        joinedload(Student.user),
+    ),
+    'teacher_student_list': lambda: (
+        joinedload(Student.user),
+    ),
+    'teacher_student_detail': lambda: (
+        joinedload(Submission.assignment),
+    ),
+    # Student
+    'student_class_list': lambda: (
+        joinedload(Class.teacher).joinedload(Teacher.user),
+    ),
+}
+
+
+def loader_options(name):
+    """
+    Loader options for a named strategy
+
+    Args:
+        name (str): Key of LOADER_STRATEGIES
+
+    Returns:
+        tuple: Options to pass to Query.options()
+    """
+    try:
+        strategy = LOADER_STRATEGIES[name]
+    except KeyError:
+        raise KeyError(f"Unknown loader strategy: {name!r}") from None
+    return strategy()
+
+
+def class_count_columns():
+    """
+    Correlated student and assignment counts for a query over Class
+
+    Returns:
+        tuple: (student_count, assignment_count) scalar subqueries
+    """
+    student_count = (
+        db.session.query(func.count(class_student.c.student_id))
+        .filter(class_student.c.class_id == Class.id)
+        .correlate(Class)
+        .scalar_subquery()
+    )
+    assignment_count = (
+        db.session.query(func.count(Assignment.id))
+        .filter(Assignment.class_id == Class.id)
+        .correlate(Class)
+        .scalar_subquery()
+    )
+    return student_count, assignment_count
@@ -0,0 +1,98 @@
+"""
+Keyset (cursor) pagination helpers
+
+Pages are ordered newest first on a (timestamp, id) pair. The cursor
+records the last row of the previous page, so fetching the next page is an
+index range scan instead of an OFFSET over everything before it. That
+needs a composite index on the pair (ix_users_created_at_id,
+ix_activity_events_timestamp plus the primary key).
+"""
+import base64
+import binascii
+from datetime import datetime
+from sqlalchemy import and_, func, or_, select
+
+
+def encode_cursor(timestamp, row_id):
+    """
+    Encode a (timestamp, id) position as an opaque URL-safe cursor
+
+    Args:
+        timestamp (datetime): Timestamp of the last row on the page
+        row_id (int): Primary key of the last row on the page
+
+    Returns:
+        str: Cursor string
+    """
+    raw = f"{timestamp.isoformat() if timestamp else ''}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor()
+
+    Args:
+        cursor (str): Cursor string from the query string
+
+    Returns:
+        tuple: (timestamp, id), or None if the cursor is missing or invalid
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        timestamp, row_id = raw.rsplit('|', 1)
+        return (datetime.fromisoformat(timestamp) if timestamp else None), int(row_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+
+
+def keyset_page(query, timestamp_col, id_col, cursor=None, per_page=50):
+    """
+    Fetch one page of a query ordered by (timestamp_col, id_col) descending
+
+    The cursor row's timestamp is re-read from the table so the comparison
+    is made against the stored value, which keeps pages stable on SQLite
+    where the same instant can be stored in more than one text format.
+
+    Args:
+        query: SQLAlchemy query selecting a single mapped entity
+        timestamp_col: Timestamp column to order by
+        id_col: Primary key column used as the tie breaker
+        cursor (str): Cursor from a previous page, or None for the first page
+        per_page (int): Number of rows per page
+
+    Returns:
+        tuple: (rows, next_cursor) where next_cursor is None on the last page
+    """
+    position = decode_cursor(cursor)
+    if position:
+        timestamp, row_id = position
+        stored = func.coalesce(
+            select(timestamp_col).where(id_col == row_id).scalar_subquery(),
+            timestamp
+        )
+        query = query.filter(or_(
+            timestamp_col < stored,
+            and_(timestamp_col == stored, id_col < row_id)
+        ))
+
+    rows = (
+        query.order_by(timestamp_col.desc(), id_col.desc())
+        .limit(per_page + 1)
+        .all()
+    )
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, timestamp_col.key), getattr(last, id_col.key))
+    return rows, next_cursor
+
+
+def escape_like(value):
+    """Escape LIKE wildcards in user input (use with escape='\\\\')"""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
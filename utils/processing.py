@@ -0,0 +1,178 @@
+"""
+Post-upload processing jobs
+
+New blobs are queued for processing when they are stored. The job checks
+the stored bytes against their hash, sniffs the real MIME type from the
+content, counts PDF pages and renders a thumbnail, then writes the
+results to the Blob row (and fills in the MIME type of attachments using
+that blob when it could not be guessed from the filename).
+
+Thumbnails are optional: images need Pillow and PDFs need PyMuPDF. PDF
+page counts use pypdf when it is installed and a scan of the file's page
+objects otherwise.
+"""
+import os
+import re
+import zipfile
+from datetime import datetime
+from sqlalchemy import or_
+from extensions import db
+from models.attachment import AssignmentAttachment
+from models.blob import Blob
+from utils.blobstore import blob_path, thumbnail_path
+from utils.jobs import job_handler
+from utils.storage import hash_file
+
+# Optional libraries for richer processing
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+THUMBNAIL_SIZE = (256, 256)
+
+# Leading bytes of common formats
+MAGIC_NUMBERS = [
+    (b'%PDF-', 'application/pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'application/x-ole-storage'),  # legacy doc/xls/ppt
+    (b'PK\x03\x04', 'application/zip'),
+]
+
+# Office Open XML documents are zip files with a telltale top-level folder
+OOXML_TYPES = {
+    'word/': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'xl/': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'ppt/': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+}
+
+PDF_PAGE_RE = re.compile(rb'/Type\s*/Page(?![a-zA-Z])')
+
+
+def sniff_mime_type(path):
+    """
+    Detect a file's MIME type from its content
+
+    Args:
+        path (str): File path
+
+    Returns:
+        str: MIME type ('application/octet-stream' if unknown)
+    """
+    with open(path, 'rb') as f:
+        head = f.read(4096)
+
+    for magic, mime_type in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            if mime_type == 'application/zip':
+                return _sniff_zip(path)
+            return mime_type
+
+    if head and b'\x00' not in head:
+        try:
+            head.decode('utf-8')
+            return 'text/plain'
+        except UnicodeDecodeError:
+            # The read may have split a multi-byte character at the end
+            try:
+                head[:-3].decode('utf-8')
+                return 'text/plain'
+            except UnicodeDecodeError:
+                pass
+    return 'application/octet-stream'
+
+
+def _sniff_zip(path):
+    """Tell Office documents apart from plain zip archives"""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            names = archive.namelist()
+    except zipfile.BadZipFile:
+        return 'application/octet-stream'
+    for prefix, mime_type in OOXML_TYPES.items():
+        if any(name.startswith(prefix) for name in names):
+            return mime_type
+    return 'application/zip'
+
+
+def count_pdf_pages(path):
+    """
+    Number of pages in a PDF
+
+    Returns:
+        int: Page count, or None if it cannot be determined
+    """
+    if PdfReader is not None:
+        try:
+            return len(PdfReader(path).pages)
+        except Exception:
+            return None
+
+    # Without pypdf, count page objects. PDFs that keep their objects in
+    # compressed object streams hide them, so 0 means "unknown".
+    with open(path, 'rb') as f:
+        count = len(PDF_PAGE_RE.findall(f.read()))
+    return count or None
+
+
+def make_thumbnail(path, mime_type, target):
+    """
+    Render a PNG thumbnail of an image or the first page of a PDF
+
+    Returns:
+        bool: True if a thumbnail was written
+    """
+    if mime_type.startswith('image/') and Image is not None:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with Image.open(path) as image:
+            image.thumbnail(THUMBNAIL_SIZE)
+            image.save(target, 'PNG')
+        return True
+    if mime_type == 'application/pdf' and fitz is not None:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with fitz.open(path) as document:
+            page = document.load_page(0)
+            zoom = THUMBNAIL_SIZE[0] / max(page.rect.width, page.rect.height)
+            page.get_pixmap(matrix=fitz.Matrix(zoom, zoom)).save(target)
+        return True
+    return False
+
+
+@job_handler('process_blob')
+def process_blob(content_hash):
+    """Verify, sniff and analyse a newly stored blob"""
+    blob = db.session.get(Blob, content_hash)
+    path = blob_path(content_hash)
+    if blob is None or not os.path.exists(path):
+        return  # collected before the job ran
+
+    _, digest = hash_file(path)
+    if digest != content_hash:
+        raise ValueError(f"Blob {content_hash} is corrupt (content hashes to {digest})")
+
+    mime_type = sniff_mime_type(path)
+    blob.mime_type = mime_type
+    if mime_type == 'application/pdf':
+        blob.page_count = count_pdf_pages(path)
+    blob.has_thumbnail = make_thumbnail(path, mime_type, thumbnail_path(content_hash))
+    blob.processed_at = datetime.utcnow()
+
+    if mime_type != 'application/octet-stream':
+        AssignmentAttachment.query.filter(
+            AssignmentAttachment.content_hash == content_hash,
+            or_(AssignmentAttachment.mime_type.is_(None),
+                AssignmentAttachment.mime_type == 'application/octet-stream')
+        ).update({AssignmentAttachment.mime_type: mime_type}, synchronize_session=False)
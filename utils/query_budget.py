@@ -0,0 +1,46 @@
+"""
+Per-request query budget
+
+With MAX_QUERIES_PER_REQUEST set, every SQL statement a request runs, on
+the primary or the read replica, is counted and a request that goes over
+the limit fails with QueryBudgetExceeded, listing the statements it ran.
+Tests that set it (tests/test_loaders.py covers the listing pages) fail
+when a page starts issuing a query per row instead of it quietly getting
+slower. The budget is off (None) by default.
+"""
+from flask import current_app, g, has_request_context
+from sqlalchemy import event
+from utils.replica import app_engines
+
+
+class QueryBudgetExceeded(Exception):
+    """A request ran more SQL statements than MAX_QUERIES_PER_REQUEST allows"""
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'query_log' in g:
+        g.query_log.append(statement)
+
+
+def _start_request():
+    g.query_log = []
+
+
+def _check_budget(response):
+    limit = current_app.config.get('MAX_QUERIES_PER_REQUEST')
+    statements = g.pop('query_log', None)
+    if limit is not None and statements is not None and len(statements) > limit:
+        listing = "\n".join(f"  {s.splitlines()[0][:120]}" for s in statements)
+        raise QueryBudgetExceeded(
+            f"{len(statements)} queries (limit {limit}):\n{listing}")
+    return response
+
+
+def init_query_budget(app):
+    """Count each request's statements when MAX_QUERIES_PER_REQUEST is set"""
+    if app.config.get('MAX_QUERIES_PER_REQUEST') is None:
+        return
+    for engine in app_engines(app):
+        event.listen(engine, 'before_cursor_execute', _count_statement)
+    app.before_request(_start_request)
+    app.after_request(_check_budget)
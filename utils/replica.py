@@ -0,0 +1,74 @@
+"""
+Read-replica routing
+
+With SQLALCHEMY_REPLICA_URI set, init_replica() creates a read-only engine
+for it and views decorated with @read_only send their SELECTs there (see
+extensions.RoutingSession). Everything else, and every write, uses the
+primary. The replica is not a Flask-SQLAlchemy bind: no model lives only
+there, and create_all()/drop_all() must never touch it.
+
+A replica lags the primary, so a user who has just written is pinned to
+the primary for REPLICA_PIN_SECONDS: after joining a class, the redirect
+to the class list reads the primary and shows the new enrollment. Pages
+that fill shared caches (dashboard statistics) may cache replica data
+that is up to the replication lag old; the caches' TTLs bound that.
+
+Engine-level instrumentation (SQL metrics, the query budget) listens on
+every engine from app_engines(), so replica reads are counted too.
+"""
+import time
+from functools import wraps
+from flask import current_app, g, session
+from sqlalchemy import create_engine
+from extensions import db
+from utils.sqlite_tuning import listen_for_pragmas
+
+PIN_SESSION_KEY = 'db_primary_until'
+
+
+def get_replica_engine():
+    """The app's replica engine, or None when no replica is configured"""
+    return current_app.extensions.get('db_replica')
+
+
+def replica_enabled():
+    return get_replica_engine() is not None
+
+
+def app_engines(app):
+    """The app's primary engine, then its replica engine if it has one"""
+    with app.app_context():
+        engines = [db.engine]
+    if 'db_replica' in app.extensions:
+        engines.append(app.extensions['db_replica'])
+    return engines
+
+
+def read_only(view):
+    """Let a view read from the replica unless the user is pinned to the primary"""
+    @wraps(view)
+    def decorated_function(*args, **kwargs):
+        g.db_replica = replica_enabled() and session.get(PIN_SESSION_KEY, 0) <= time.time()
+        return view(*args, **kwargs)
+    return decorated_function
+
+
+def pin_after_write(response):
+    """after_request hook: keep a user who just wrote on the primary for a while"""
+    if g.get('db_wrote'):
+        session[PIN_SESSION_KEY] = time.time() + current_app.config.get('REPLICA_PIN_SECONDS', 5)
+    return response
+
+
+def init_replica(app):
+    """Create the read-only replica engine and pin writers to the primary"""
+    uri = app.config.get('SQLALCHEMY_REPLICA_URI')
+    if not uri:
+        return
+    engine = create_engine(uri, **(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}))
+    if engine.dialect.name == 'sqlite':
+        pragmas = dict(app.config.get('SQLITE_PRAGMAS') or {})
+        pragmas['query_only'] = 'ON'
+        listen_for_pragmas(engine, pragmas)
+    app.extensions['db_replica'] = engine
+    app.after_request(pin_after_write)
@@ -0,0 +1,103 @@
+"""
+Schema version check
+
+The database schema is created and changed only by the Alembic
+migrations in migrations/ (`flask db upgrade`, run once per deploy before
+workers start). Workers never create or drop tables. While the app is
+being created they compare the database's alembic_version with the
+migration head, once. With SCHEMA_CHECK on, a worker whose database is
+behind (or ahead of) the code refuses to start with SchemaOutdated,
+instead of erroring deep inside a view later on.
+
+Databases created before the migrations existed hold the baseline
+revision's tables without an alembic_version row. Mark them with
+`flask db stamp f2fe5a81910e` and then run `flask db upgrade`; their data
+is kept.
+
+In-memory SQLite databases are built by whoever uses them (the tests call
+db.create_all()) and are never checked.
+"""
+import os
+import click
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from extensions import db
+from utils.sqlite_tuning import is_memory_database
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+
+class SchemaOutdated(RuntimeError):
+    """The database is not at the migration head this code expects"""
+
+
+def head_revisions(directory=MIGRATIONS_DIR):
+    """Revision ids of the migration heads in ``directory``"""
+    from alembic.script import ScriptDirectory
+
+    return set(ScriptDirectory(directory).get_heads())
+
+
+def current_revisions():
+    """Revision ids recorded in the database (empty if it was never migrated)"""
+    try:
+        return {row[0] for row in db.session.execute(text("SELECT version_num FROM alembic_version"))}
+    except (OperationalError, ProgrammingError):
+        db.session.rollback()
+        return set()
+
+
+def verify_schema():
+    """
+    Raise SchemaOutdated unless the database is at the migration head
+
+    Returns:
+        set: The current (head) revisions
+    """
+    current, head = current_revisions(), head_revisions()
+    if current != head:
+        raise SchemaOutdated(
+            f"Database schema is at {', '.join(sorted(current)) or 'no revision'} but the code "
+            f"expects {', '.join(sorted(head))}; run `flask db upgrade`")
+    return current
+
+
+def check_schema(app):
+    """
+    Verify the schema once, while the app is created
+
+    Raises SchemaOutdated when the database is not at the migration head.
+    Flask CLI commands only log it: they include `flask db upgrade`, which
+    is how the database gets there.
+    """
+    if not app.config.get('SCHEMA_CHECK', True) or is_memory_database(app.config['SQLALCHEMY_DATABASE_URI']):
+        return
+    with app.app_context():
+        try:
+            verify_schema()
+        except SchemaOutdated as e:
+            if click.get_current_context(silent=True) is None:
+                raise
+            app.logger.warning(str(e))
+        else:
+            app.logger.info("Database schema is up to date")
+        finally:
+            # Do not hand the check's connection to forked workers
+            db.session.remove()
+            db.engine.dispose()
+
+
+def reset_schema():
+    """
+    Drop every table in the database, then run all migrations
+
+    Development only: deletes all data. Existing databases are upgraded
+    in place instead (see the module docstring).
+    """
+    from flask_migrate import upgrade
+    from sqlalchemy import MetaData
+
+    existing = MetaData()
+    existing.reflect(bind=db.engine)
+    existing.drop_all(bind=db.engine)
+    upgrade(directory=MIGRATIONS_DIR)
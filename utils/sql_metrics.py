@@ -0,0 +1,109 @@
+"""
+Per-request SQL metrics
+
+With SQL_METRICS_ENABLED set, listeners on the db engines (the primary
+and the read replica, if any) time every
+statement a request runs. Each response gets a Server-Timing header
+(`db` = time in SQL with the statement count, `app` = whole request), and
+requests over SLOW_REQUEST_MS or SLOW_REQUEST_QUERIES are logged to the
+app log together with their slowest statements.
+
+When disabled nothing is registered, so requests pay nothing for it.
+Statements run while a streamed response is being sent happen after the
+response headers and are not included.
+"""
+import heapq
+from time import perf_counter
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from utils.replica import app_engines
+
+
+class RequestSQLStats:
+    """Statement count, total time and slowest statements of one request"""
+
+    def __init__(self, keep_slowest=3):
+        self.count = 0
+        self.total = 0.0
+        self.keep_slowest = keep_slowest
+        self._slowest = []
+
+    def add(self, statement, duration):
+        self.count += 1
+        self.total += duration
+        entry = (duration, self.count, statement)
+        if len(self._slowest) < self.keep_slowest:
+            heapq.heappush(self._slowest, entry)
+        elif self._slowest and duration > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    @property
+    def slowest(self):
+        """(seconds, statement) pairs, slowest first"""
+        return [(duration, statement) for duration, _, statement in sorted(self._slowest, reverse=True)]
+
+
+def _request_stats():
+    if has_request_context():
+        return g.get('sql_stats')
+    return None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _request_stats() is not None:
+        conn.info.setdefault('sql_metrics_start', []).append(perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_stats()
+    started = conn.info.get('sql_metrics_start')
+    if stats is not None and started:
+        stats.add(statement, perf_counter() - started.pop())
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute
+    started = context.connection.info.get('sql_metrics_start') if context.connection else None
+    if started:
+        started.pop()
+
+
+def _start_request():
+    g.sql_stats = RequestSQLStats(current_app.config.get('SQL_METRICS_SLOWEST', 3))
+    g.sql_request_started = perf_counter()
+
+
+def _finish_request(response):
+    stats = g.pop('sql_stats', None)
+    if stats is None:
+        return response
+    elapsed = perf_counter() - g.pop('sql_request_started')
+    config = current_app.config
+
+    if config.get('SQL_METRICS_SERVER_TIMING', True):
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={stats.total * 1000:.2f};desc="{stats.count} queries", app;dur={elapsed * 1000:.2f}')
+
+    slow_ms = config.get('SLOW_REQUEST_MS')
+    slow_queries = config.get('SLOW_REQUEST_QUERIES')
+    if ((slow_ms is not None and elapsed * 1000 >= slow_ms)
+            or (slow_queries is not None and stats.count >= slow_queries)):
+        lines = [f"Slow request {request.method} {request.path}: {elapsed * 1000:.1f} ms, "
+                 f"{stats.count} queries, {stats.total * 1000:.1f} ms in SQL"]
+        for duration, statement in stats.slowest:
+            lines.append(f"  {duration * 1000:.1f} ms  {' '.join(statement.split())[:300]}")
+        current_app.logger.warning("\n".join(lines))
+    return response
+
+
+def init_sql_metrics(app):
+    """Instrument the engine and request cycle if SQL_METRICS_ENABLED is set"""
+    if not app.config.get('SQL_METRICS_ENABLED'):
+        return
+    for engine in app_engines(app):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'handle_error', _handle_error)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
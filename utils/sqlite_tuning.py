@@ -0,0 +1,74 @@
+"""
+SQLite engine profile
+
+SQLite's defaults suit a single process: a rollback journal, so a writer
+blocks every reader while it commits, and readers can make a writer give
+up with "database is locked". init_sqlite_tuning() runs SQLITE_PRAGMAS
+(WAL journal, synchronous=NORMAL, busy timeout, mmap and page cache size,
+foreign keys) on every new connection, and configure_engine_options()
+sizes the connection pool from config. Non-SQLite databases only get the
+pool settings.
+
+`flask bench-db` compares the default and tuned profiles under
+concurrent reads and writes (see utils.db_benchmark).
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from extensions import db
+
+
+def is_memory_database(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def pool_options(config):
+    """Pool keyword arguments for create_engine from the DB_POOL_* settings"""
+    options = {
+        'pool_size': config.get('DB_POOL_SIZE'),
+        'max_overflow': config.get('DB_MAX_OVERFLOW'),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT'),
+        'pool_recycle': config.get('DB_POOL_RECYCLE'),
+    }
+    return {key: value for key, value in options.items() if value is not None}
+
+
+def configure_engine_options(app):
+    """
+    Merge pool sizing into SQLALCHEMY_ENGINE_OPTIONS
+
+    Must run before db.init_app(). In-memory SQLite databases use a single
+    shared connection, so they get no pool settings. Explicit
+    SQLALCHEMY_ENGINE_OPTIONS entries win.
+    """
+    if is_memory_database(app.config['SQLALCHEMY_DATABASE_URI']):
+        return
+    options = pool_options(app.config)
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def apply_pragmas(dbapi_connection, pragmas):
+    """Run ``PRAGMA name=value`` for each entry on a raw sqlite3 connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def listen_for_pragmas(engine, pragmas):
+    """Apply ``pragmas`` to every connection ``engine`` opens from now on"""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)
+
+
+def init_sqlite_tuning(app):
+    """Install the SQLITE_PRAGMAS connect hook; call right after db.init_app()"""
+    with app.app_context():
+        listen_for_pragmas(db.engine, dict(app.config.get('SQLITE_PRAGMAS') or {}))
@@ -0,0 +1,44 @@
+"""
+Startup benchmark
+
+Measures, in fresh interpreters, how long a worker takes from `import app`
+to answering its first request, split into import, create_app() and the
+first request. Used by `flask bench-startup`.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CHILD = """
+import json, time
+started = time.perf_counter()
+import app as module
+imported = time.perf_counter()
+application = module.create_app()
+created = time.perf_counter()
+application.test_client().get('/login')
+served = time.perf_counter()
+print(json.dumps({'import': imported - started, 'create_app': created - imported,
+                  'first_request': served - created, 'total': served - started}))
+"""
+
+
+def measure_startup(runs=5):
+    """
+    Time cold starts in ``runs`` separate processes
+
+    Returns:
+        dict: Median seconds for each phase ('import', 'create_app',
+        'first_request', 'total')
+    """
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', _CHILD], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {phase: statistics.median(sample[phase] for sample in samples) for phase in samples[0]}
@@ -0,0 +1,182 @@
+"""
+Aggregate statistics queries
+
+The admin dashboard's totals come from two roll-up queries (users grouped
+by role and status, and the assignments table with its denormalized
+submission counters) and are kept as one snapshot shared by every admin
+session in the process for ADMIN_STATS_TTL seconds. The snapshot's
+mappings are read-only, since every request is handed the same object.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from flask import current_app
+from sqlalchemy import case, func, update
+from extensions import db
+from models.assignment import Assignment
+from models.submission import Submission
+from models.user import User
+from utils.cache import TTLCache
+
+_SNAPSHOT_KEY = 'admin_dashboard'
+
+
+def get_submission_counts(assignment_ids=None):
+    """
+    Count total and graded submissions per assignment in one grouped query
+
+    Args:
+        assignment_ids: Iterable of assignment ids to restrict the counts to,
+            or None to count every assignment
+
+    Returns:
+        dict: Assignment id -> (total, graded). Assignments without
+        submissions are absent, callers should default to (0, 0).
+    """
+    query = db.session.query(
+        Submission.assignment_id,
+        func.count(Submission.id),
+        func.sum(case((Submission.grade.isnot(None), 1), else_=0))
+    )
+
+    if assignment_ids is not None:
+        assignment_ids = list(assignment_ids)
+        if not assignment_ids:
+            return {}
+        query = query.filter(Submission.assignment_id.in_(assignment_ids))
+
+    rows = query.group_by(Submission.assignment_id).all()
+    return {assignment_id: (total, graded or 0) for assignment_id, total, graded in rows}
+
+
+def release_submission_counters(submissions):
+    """
+    Subtract submissions that are about to be deleted from their
+    assignments' counters, inside the caller's transaction
+
+    Args:
+        submissions: Query over the Submission rows being deleted
+    """
+    rows = (
+        submissions.with_entities(
+            Submission.assignment_id,
+            func.count(Submission.id),
+            func.sum(case((Submission.grade.isnot(None), 1), else_=0))
+        )
+        .group_by(Submission.assignment_id)
+        .all()
+    )
+    for assignment_id, total, graded in rows:
+        Assignment.adjust_counters(
+            assignment_id, submissions=-total, graded=-(graded or 0))
+
+
+def rebuild_assignment_counters():
+    """
+    Recompute Assignment.submission_count and graded_count from submissions
+
+    Returns:
+        int: Number of assignments whose counters had drifted and were fixed
+    """
+    counts = get_submission_counts()
+
+    drifted = []
+    rows = db.session.query(
+        Assignment.id, Assignment.submission_count, Assignment.graded_count)
+    for assignment_id, submission_count, graded_count in rows:
+        total, graded = counts.get(assignment_id, (0, 0))
+        if (submission_count, graded_count) != (total, graded):
+            drifted.append({'id': assignment_id,
+                            'submission_count': total, 'graded_count': graded})
+
+    if drifted:
+        db.session.execute(update(Assignment), drifted)
+        db.session.commit()
+    return len(drifted)
+
+
+@dataclass(frozen=True)
+class AdminSnapshot:
+    """System-wide dashboard totals as of computed_at (read-only)"""
+    users: MappingProxyType  # (role, status) -> count
+    assignments: MappingProxyType
+    computed_at: datetime = field(default_factory=datetime.utcnow)
+
+    def count_users(self, role=None, status=None):
+        """Users matching an optional role and/or status"""
+        return sum(count for (user_role, user_status), count in self.users.items()
+                   if role in (None, user_role) and status in (None, user_status))
+
+    @property
+    def stats(self):
+        """Headline user and assignment totals"""
+        return {
+            'total_users': self.count_users(),
+            'total_teachers': self.count_users(role='teacher'),
+            'total_students': self.count_users(role='student'),
+            'total_admins': self.count_users(role='admin'),
+            'active_users': self.count_users(status='active'),
+            'total_assignments': self.assignments['total'],
+        }
+
+
+def compute_admin_snapshot():
+    """
+    Compute the admin dashboard totals with two roll-up queries
+
+    Returns:
+        AdminSnapshot: Fresh totals
+    """
+    now = datetime.utcnow()
+
+    users = {
+        (role, status): count
+        for role, status, count in db.session.query(
+            User.role, User.status, func.count(User.id)).group_by(User.role, User.status)
+    }
+
+    total, pending, late, submissions, graded = db.session.query(
+        func.count(Assignment.id),
+        func.sum(case((Assignment.status == 'pending', 1), else_=0)),
+        func.sum(case((Assignment.due_date < now, 1), else_=0)),
+        func.sum(Assignment.submission_count),
+        func.sum(Assignment.graded_count),
+    ).one()
+
+    return AdminSnapshot(
+        users=MappingProxyType(users),
+        assignments=MappingProxyType({
+            'total': total,
+            'pending': pending or 0,
+            'late': late or 0,
+            'submissions': submissions or 0,
+            'graded': graded or 0,
+        }),
+        computed_at=now,
+    )
+
+
+def init_admin_stats_cache(app):
+    """Create the app's admin snapshot cache (a single entry living ADMIN_STATS_TTL seconds)"""
+    app.extensions['admin_stats_cache'] = TTLCache(
+        maxsize=1, ttl=app.config.get('ADMIN_STATS_TTL', 30))
+
+
+def get_admin_snapshot():
+    """
+    The admin dashboard totals, from the shared snapshot when it is fresh
+
+    Returns:
+        AdminSnapshot: Cached or freshly computed totals
+    """
+    cache = current_app.extensions['admin_stats_cache']
+    snapshot = cache.get(_SNAPSHOT_KEY)
+    if snapshot is None:
+        snapshot = compute_admin_snapshot()
+        cache.set(_SNAPSHOT_KEY, snapshot)
+    return snapshot
+
+
+def invalidate_admin_snapshot():
+    """Drop the snapshot after an admin change so the next dashboard load recomputes it"""
+    current_app.extensions['admin_stats_cache'].invalidate(_SNAPSHOT_KEY)
@@ -0,0 +1,57 @@
+"""
+File storage helpers shared by uploads and downloads
+"""
+import hashlib
+import mimetypes
+import os
+
+CHUNK_SIZE = 64 * 1024
+
+
+def save_stream(stream, path, fsync=False):
+    """
+    Copy a file-like stream to disk, hashing it on the way
+
+    Args:
+        stream: Readable binary stream
+        path (str): Destination file path
+        fsync (bool): Flush the file to stable storage before returning
+
+    Returns:
+        tuple: (size in bytes, SHA-256 hex digest)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'wb') as out:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+            out.write(chunk)
+        if fsync:
+            out.flush()
+            os.fsync(out.fileno())
+    return size, digest.hexdigest()
+
+
+def hash_file(path):
+    """
+    Hash a file on disk
+
+    Returns:
+        tuple: (size in bytes, SHA-256 hex digest)
+    """
+    with open(path, 'rb') as stream:
+        digest = hashlib.sha256()
+        size = 0
+        for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+            size += len(chunk)
+    return size, digest.hexdigest()
+
+
+def guess_mime_type(filename, fallback=None):
+    """MIME type for a filename, or fallback when it cannot be guessed"""
+    return mimetypes.guess_type(filename)[0] or fallback or 'application/octet-stream'
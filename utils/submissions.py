@@ -0,0 +1,426 @@
+"""
+Submission file storage and resumable uploads
+
+Submission files are kept in the blob store (utils.blobstore), so the
+same file handed in by many students is stored once; Submission.file_path
+points at the blob and Submission.filename holds the name to show.
+Submissions made before the blob store live in SUBMISSION_FOLDER until
+moved with import_submission_files().
+
+Besides the single-request form upload, students can upload in chunks: an
+UploadSession records how many bytes have arrived, each chunk is streamed
+straight to a partial file (never buffered in memory), and the finished
+file is moved into the store with an atomic rename before the Submission
+row is created.
+
+Only one request at a time works on an upload: writing a chunk or
+completing the upload first claims the session with a conditional UPDATE
+of its status, so concurrent chunks cannot interleave their writes and a
+repeated "complete" cannot create a second submission. Claims left by a
+request that died are taken over after UPLOAD_CLAIM_TIMEOUT seconds.
+
+The SHA-256 of a partial file is updated as chunks arrive. Hash state is
+kept per process; if a chunk lands on a worker without it (or after a
+restart), the bytes received so far are re-hashed from disk. The type of
+the finished file is sniffed from its content rather than taken from the
+browser.
+"""
+import hashlib
+import os
+import secrets
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from werkzeug.exceptions import ClientDisconnected
+from werkzeug.utils import secure_filename
+from extensions import db
+from models.assignment import Assignment
+from models.submission import Submission
+from models.upload_session import UploadSession
+from utils.blobstore import blob_path, blob_root, store_file, store_stream, temp_dir
+from utils.grade_summary import refresh_grade_summaries
+from utils.helpers import validate_file_extension
+from utils.processing import sniff_mime_type
+from utils.storage import CHUNK_SIZE, hash_file
+from utils.teacher_stats import invalidate_teacher_stats
+
+ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx', 'txt', 'zip'}
+ALLOWED_MIME_TYPES = [
+    'application/pdf',
+    'application/msword',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'text/plain',
+    'application/zip'
+]
+# What sniff_mime_type() reports for those files (legacy .doc files are OLE containers)
+SNIFFED_MIME_TYPES = set(ALLOWED_MIME_TYPES) | {'application/x-ole-storage'}
+
+# Incremental hash state: upload id -> (bytes hashed, hash object)
+_MAX_HASHERS = 1024
+_hashers = OrderedDict()
+_hashers_lock = threading.Lock()
+
+
+class UploadError(Exception):
+    """A chunked upload request that cannot be applied"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def submission_folder():
+    """Directory holding submission files stored before the blob store"""
+    return current_app.config['SUBMISSION_FOLDER']
+
+
+def partial_path(upload):
+    """Path of an upload's partial file (same filesystem as the blobs)"""
+    return os.path.join(temp_dir(), f'{upload.id}.part')
+
+
+def stored_file_path(path):
+    """
+    Value to store in Submission.file_path for a file on disk
+
+    Paths inside the project are stored relative to it, as older
+    submissions were, so the database stays portable between checkouts.
+    """
+    path = os.path.abspath(path)
+    root = os.path.abspath(current_app.root_path)
+    if os.path.commonpath([root, path]) == root:
+        return os.path.relpath(path, root).replace(os.sep, '/')
+    return path
+
+
+def resolve_submission_file(file_path):
+    """
+    Absolute path of a stored submission file
+
+    Args:
+        file_path (str): Submission.file_path value
+
+    Returns:
+        str: Absolute path, or None if it points outside the blob store
+        and SUBMISSION_FOLDER
+    """
+    file_path = file_path.replace('\\', os.sep).replace('/', os.sep)
+    if not os.path.isabs(file_path):
+        file_path = os.path.join(current_app.root_path, file_path)
+    full_path = os.path.normpath(os.path.abspath(file_path))
+    for folder in (blob_root(), submission_folder()):
+        folder = os.path.normpath(os.path.abspath(folder))
+        if os.path.commonpath([folder, full_path]) == folder:
+            return full_path
+    return None
+
+
+def create_submission(assignment, student, content_hash, filename, comments=''):
+    """
+    Add a Submission for a stored blob, bump the assignment's counter and
+    refresh the student's grade summary for the class (no commit)
+
+    Args:
+        assignment: Assignment being submitted
+        student: Submitting Student
+        content_hash (str): Hash of the blob holding the file
+        filename (str): Secure name to show and download the file as
+        comments (str): Submission comments
+
+    Returns:
+        Submission: The new submission
+    """
+    submission = Submission(
+        assignment_id=assignment.id,
+        student_id=student.id,
+        file_path=stored_file_path(blob_path(content_hash)),
+        content_hash=content_hash,
+        filename=filename,
+        comments=comments,
+        submitted_at=datetime.utcnow()
+    )
+    db.session.add(submission)
+    Assignment.adjust_counters(assignment.id, submissions=1)
+    refresh_grade_summaries([(student.id, assignment.class_id)])
+    return submission
+
+
+def _take_hasher(upload, path):
+    """Hash state for the bytes received so far, re-hashing from disk on a miss"""
+    with _hashers_lock:
+        entry = _hashers.pop(upload.id, None)
+    if entry is not None and entry[0] == upload.received:
+        return entry[1]
+
+    hasher = hashlib.sha256()
+    if upload.received:
+        with open(path, 'rb') as stream:
+            remaining = upload.received
+            while remaining > 0:
+                chunk = stream.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    raise UploadError('Partial upload is missing data; start again', 410)
+                hasher.update(chunk)
+                remaining -= len(chunk)
+    return hasher
+
+
+def _keep_hasher(upload, hasher):
+    """Store hash state for the upload's next chunk"""
+    with _hashers_lock:
+        _hashers[upload.id] = (upload.received, hasher)
+        while len(_hashers) > _MAX_HASHERS:
+            _hashers.popitem(last=False)
+
+
+def _drop_hasher(upload_id):
+    with _hashers_lock:
+        _hashers.pop(upload_id, None)
+
+
+def _claim_upload(upload, status, **criteria):
+    """
+    Atomically move an open upload to `status` for the current request
+
+    Commits, so requests on other workers see the claim.
+
+    Args:
+        upload: UploadSession
+        status (str): 'receiving' or 'finishing'
+        **criteria: Further column values the row must still have
+
+    Returns:
+        bool: True if this request now holds the upload
+    """
+    now = datetime.utcnow()
+    timeout = current_app.config.get('UPLOAD_CLAIM_TIMEOUT', 600)
+    claimed = UploadSession.query.filter(
+        UploadSession.id == upload.id,
+        or_(UploadSession.status == 'open',
+            UploadSession.updated_at < now - timedelta(seconds=timeout))
+    ).filter_by(**criteria).update(
+        {UploadSession.status: status, UploadSession.updated_at: now},
+        synchronize_session=False)
+    db.session.commit()
+    return bool(claimed)
+
+
+def start_upload(assignment, student, filename, size, mime_type=None, comments=''):
+    """
+    Open a resumable upload for a submission (no commit)
+
+    Args:
+        assignment: Assignment being submitted
+        student: Submitting Student
+        filename (str): Original filename
+        size (int): Total size in bytes
+        mime_type (str): Content type reported by the browser
+        comments (str): Submission comments
+
+    Returns:
+        UploadSession: The new session
+
+    Raises:
+        UploadError: If the file type or size is not accepted
+    """
+    if not filename or not validate_file_extension(filename, ALLOWED_EXTENSIONS):
+        raise UploadError('Invalid file type. Allowed: PDF, DOC, DOCX, TXT, ZIP')
+    if mime_type not in ALLOWED_MIME_TYPES:
+        raise UploadError('Invalid file type. Allowed: PDF, DOC, DOCX, TXT, ZIP')
+    max_size = current_app.config.get('MAX_SUBMISSION_SIZE')
+    if size <= 0 or (max_size and size > max_size):
+        raise UploadError('File is empty or too large', 413)
+    filename = secure_filename(filename)
+    if not filename:
+        raise UploadError('Invalid filename')
+
+    upload = UploadSession(
+        id=secrets.token_hex(16),
+        student_id=student.id,
+        assignment_id=assignment.id,
+        filename=filename,
+        mime_type=mime_type,
+        comments=comments,
+        total_size=size,
+        received=0
+    )
+    db.session.add(upload)
+    return upload
+
+
+def append_chunk(upload, offset, stream):
+    """
+    Stream a chunk onto the end of an upload's partial file
+
+    Bytes are written and hashed as they are read. If the client
+    disconnects mid-chunk, whatever arrived is kept and upload.received
+    tells the client where to resume. Commits the new offset.
+
+    Args:
+        upload: UploadSession
+        offset (int): Byte offset the client believes the chunk starts at
+        stream: Readable binary stream with the chunk body
+
+    Raises:
+        UploadError: On an offset mismatch, data past the declared size or
+            while another request holds the upload
+    """
+    if offset != upload.received:
+        raise UploadError('Offset does not match the bytes received', 409)
+    upload_id = upload.id
+    if not _claim_upload(upload, 'receiving', received=offset):
+        current = db.session.get(UploadSession, upload_id)
+        if current is None:
+            raise UploadError('Upload was completed or cancelled', 404)
+        if current.received != offset:
+            raise UploadError('Offset does not match the bytes received', 409)
+        raise UploadError('Another request is still writing to this upload', 409)
+
+    path = partial_path(upload)
+    hasher = None
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        hasher = _take_hasher(upload, path)
+        with open(path, 'r+b' if os.path.exists(path) else 'wb') as out:
+            # Drop any bytes past the recorded offset left by an earlier failure
+            out.truncate(upload.received)
+            out.seek(upload.received)
+            while True:
+                try:
+                    chunk = stream.read(CHUNK_SIZE)
+                except ClientDisconnected:
+                    break
+                if not chunk:
+                    break
+                if upload.received + len(chunk) > upload.total_size:
+                    raise UploadError('Chunk goes past the declared file size', 413)
+                out.write(chunk)
+                hasher.update(chunk)
+                upload.received += len(chunk)
+            # Make the received bytes durable before the offset is recorded
+            out.flush()
+            os.fsync(out.fileno())
+    finally:
+        upload.status = 'open'
+        upload.updated_at = datetime.utcnow()
+        if hasher is not None:
+            _keep_hasher(upload, hasher)
+        db.session.commit()
+
+
+def finish_upload(upload, expected_hash=None):
+    """
+    Move a complete upload into the blob store and create its Submission
+
+    Commits the new submission and removes the upload session.
+
+    Args:
+        upload: UploadSession
+        expected_hash (str): Optional SHA-256 hex digest computed by the client
+
+    Returns:
+        Submission: The new submission
+
+    Raises:
+        UploadError: If bytes are missing, the hash or file type does not
+            match, the assignment was already submitted or another request
+            is completing the upload
+    """
+    if not upload.is_complete():
+        raise UploadError('Upload is not complete', 409)
+
+    assignment = upload.assignment
+    student_id = upload.student_id
+    upload_id = upload.id
+    if not _claim_upload(upload, 'finishing'):
+        raise UploadError('Upload is already being completed', 409)
+
+    try:
+        # Another upload session for the same assignment may have finished
+        # first; the unique constraint catches one finishing concurrently
+        if assignment.submissions.filter_by(student_id=student_id).first():
+            raise UploadError('Assignment already submitted')
+
+        path = partial_path(upload)
+        content_hash = _take_hasher(upload, path).hexdigest()
+        if expected_hash and expected_hash.lower() != content_hash:
+            discard_upload(upload)
+            db.session.commit()
+            raise UploadError('Checksum mismatch; upload the file again', 422)
+        if sniff_mime_type(path) not in SNIFFED_MIME_TYPES:
+            discard_upload(upload)
+            db.session.commit()
+            raise UploadError('File content is not a PDF, DOC, DOCX, TXT or ZIP file', 415)
+
+        try:
+            store_file(path, content_hash, upload.total_size)
+            submission = create_submission(
+                assignment, upload.student, content_hash, upload.filename, upload.comments or '')
+            db.session.delete(upload)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            if not assignment.submissions.filter_by(student_id=student_id).first():
+                raise
+            raise UploadError('Assignment already submitted')
+    except Exception:
+        # Reopen the upload so the client can retry (discarded ones are already gone)
+        db.session.rollback()
+        UploadSession.query.filter_by(id=upload_id, status='finishing').update(
+            {UploadSession.status: 'open'}, synchronize_session=False)
+        db.session.commit()
+        raise
+    invalidate_teacher_stats(assignment.class_obj.teacher_id)
+    return submission
+
+
+def discard_upload(upload):
+    """Delete an upload session and its partial file (no commit)"""
+    _drop_hasher(upload.id)
+    try:
+        os.remove(partial_path(upload))
+    except FileNotFoundError:
+        pass
+    db.session.delete(upload)
+
+
+def prune_uploads(max_age_hours=24):
+    """
+    Remove upload sessions that have not received data recently
+
+    Returns:
+        int: Number of sessions removed
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=max_age_hours)
+    stale = UploadSession.query.filter(UploadSession.updated_at < cutoff).all()
+    for upload in stale:
+        discard_upload(upload)
+    db.session.commit()
+    return len(stale)
+
+
+def import_submission_files():
+    """
+    Move submission files stored before the blob store into it
+
+    Returns:
+        int: Number of files moved (duplicates are dropped rather than kept)
+    """
+    moved = 0
+    root = os.path.normpath(os.path.abspath(blob_root()))
+    for submission in Submission.query.filter(Submission.file_path.isnot(None)):
+        path = resolve_submission_file(submission.file_path)
+        if not path or os.path.commonpath([root, path]) == root or not os.path.isfile(path):
+            continue
+        size, content_hash = hash_file(path)
+        submission.filename = submission.get_filename()
+        store_file(path, content_hash, size)
+        submission.file_path = stored_file_path(blob_path(content_hash))
+        submission.content_hash = content_hash
+        moved += 1
+    db.session.commit()
+    return moved
@@ -0,0 +1,193 @@
+"""
+Cached teacher dashboard statistics
+
+The dashboard's counts and "recent" lists are computed with a handful of
+grouped queries and kept per teacher in an in-process TTLCache. Writes
+that change them (enrollment, submissions, grading, new classes and
+assignments) call invalidate_teacher_stats() after committing; the TTL
+(TEACHER_STATS_TTL) bounds staleness for changes made by other worker
+processes, which have their own caches. Cached entries are shared by
+every request, so their rows are read-only mappings.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from flask import current_app
+from sqlalchemy import func
+from extensions import db
+from models.assignment import Assignment
+from models.class_model import Class, class_student
+from models.student import Student
+from models.submission import Submission
+from utils.cache import TTLCache
+
+RECENT_LIMIT = 5
+
+
+@dataclass(frozen=True)
+class TeacherDashboardStats:
+    """A teacher's dashboard numbers as of computed_at (read-only)"""
+    total_students: int
+    total_classes: int
+    pending_assignments: int
+    # Due dates of assignments that were still upcoming when computed, so
+    # the count stays right as deadlines pass without a recompute
+    upcoming_due_dates: tuple
+    recent_classes: tuple
+    recent_assignments: tuple
+    recent_students: tuple
+    computed_at: datetime = field(default_factory=datetime.utcnow)
+
+    def counts(self, now=None):
+        """The four headline counts"""
+        now = now or datetime.utcnow()
+        return {
+            'total_students': self.total_students,
+            'total_classes': self.total_classes,
+            'pending_assignments': self.pending_assignments,
+            'upcoming_deadlines': sum(1 for due in self.upcoming_due_dates if due > now),
+        }
+
+    def to_dict(self):
+        """JSON-friendly form for the stats endpoint"""
+        return {
+            'stats': self.counts(),
+            'recent_classes': [dict(row) for row in self.recent_classes],
+            'recent_assignments': [dict(row) for row in self.recent_assignments],
+            'recent_students': [dict(row) for row in self.recent_students],
+            'computed_at': self.computed_at.isoformat(),
+        }
+
+
+def init_teacher_stats_cache(app):
+    """Create the app's dashboard stats cache from TEACHER_STATS_CACHE_SIZE/TEACHER_STATS_TTL"""
+    app.extensions['teacher_stats_cache'] = TTLCache(
+        maxsize=app.config.get('TEACHER_STATS_CACHE_SIZE', 512),
+        ttl=app.config.get('TEACHER_STATS_TTL', 30)
+    )
+
+
+def get_teacher_stats_cache():
+    """The current app's dashboard stats cache"""
+    return current_app.extensions['teacher_stats_cache']
+
+
+def invalidate_teacher_stats(*teacher_ids):
+    """Drop cached dashboard stats after a committed change; None ids are ignored"""
+    cache = get_teacher_stats_cache()
+    for teacher_id in teacher_ids:
+        if teacher_id is not None:
+            cache.invalidate(int(teacher_id))
+
+
+def clear_teacher_stats():
+    """Drop every teacher's cached stats, e.g. after admin deletions that span teachers"""
+    get_teacher_stats_cache().clear()
+
+
+def compute_teacher_stats(teacher_id):
+    """
+    Compute a teacher's dashboard statistics from the database
+
+    Args:
+        teacher_id (int): Teacher id
+
+    Returns:
+        TeacherDashboardStats: Fresh statistics
+    """
+    now = datetime.utcnow()
+
+    # Classes with their enrollment counts in one grouped query
+    classes = (
+        db.session.query(Class.id, Class.name, func.count(class_student.c.student_id))
+        .outerjoin(class_student, class_student.c.class_id == Class.id)
+        .filter(Class.teacher_id == teacher_id)
+        .group_by(Class.id, Class.name)
+        .order_by(Class.id)
+        .all()
+    )
+
+    pending = (
+        db.session.query(func.count(Submission.id))
+        .join(Assignment, Submission.assignment_id == Assignment.id)
+        .join(Class, Assignment.class_id == Class.id)
+        .filter(Class.teacher_id == teacher_id, Submission.grade.is_(None))
+        .scalar()
+    )
+
+    upcoming = (
+        db.session.query(Assignment.due_date)
+        .join(Class, Assignment.class_id == Class.id)
+        .filter(Class.teacher_id == teacher_id, Assignment.due_date > now)
+        .order_by(Assignment.due_date)
+    )
+
+    recent_assignments = (
+        db.session.query(Assignment.id, Assignment.title, Assignment.due_date)
+        .join(Class, Assignment.class_id == Class.id)
+        .filter(Class.teacher_id == teacher_id)
+        .order_by(Assignment.created_at.desc())
+        .limit(RECENT_LIMIT)
+    )
+
+    # Latest submissions to this teacher's assignments
+    recent_students = (
+        db.session.query(Student.id, Student.first_name, Student.last_name,
+                         Class.name, Assignment.title, Submission.grade)
+        .join(Submission, Submission.student_id == Student.id)
+        .join(Assignment, Submission.assignment_id == Assignment.id)
+        .join(Class, Assignment.class_id == Class.id)
+        .filter(Class.teacher_id == teacher_id)
+        .order_by(Submission.submitted_at.desc())
+        .limit(RECENT_LIMIT)
+    )
+
+    return TeacherDashboardStats(
+        total_students=sum(count for _, _, count in classes),
+        total_classes=len(classes),
+        pending_assignments=pending or 0,
+        upcoming_due_dates=tuple(due for (due,) in upcoming),
+        recent_classes=tuple(
+            MappingProxyType({"id": class_id, "name": name, "student_count": count})
+            for class_id, name, count in classes[:RECENT_LIMIT]
+        ),
+        recent_assignments=tuple(
+            MappingProxyType({
+                "id": assignment_id,
+                "title": title,
+                "due_date": due_date.strftime("%b %d, %Y") if due_date else "No date",
+                "status": "pending",
+            })
+            for assignment_id, title, due_date in recent_assignments
+        ),
+        recent_students=tuple(
+            MappingProxyType({
+                "id": student_id,
+                "first_name": first_name or "",
+                "last_name": last_name or "",
+                "class_name": class_name or "",
+                "last_assignment": title,
+                "grade": grade,
+            })
+            for student_id, first_name, last_name, class_name, title, grade in recent_students
+        ),
+        computed_at=now,
+    )
+
+
+def get_teacher_stats(teacher_id):
+    """
+    A teacher's dashboard statistics, from the cache when possible
+
+    Args:
+        teacher_id (int): Teacher id
+
+    Returns:
+        TeacherDashboardStats: Cached or freshly computed statistics
+    """
+    cache = get_teacher_stats_cache()
+    stats = cache.get(teacher_id)
+    if stats is None:
+        stats = compute_teacher_stats(teacher_id)
+        cache.set(teacher_id, stats)
+    return stats
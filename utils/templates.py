@@ -0,0 +1,53 @@
+"""
+Compiled template cache
+
+Jinja compiles each template to Python the first time a worker renders
+it. With a FileSystemBytecodeCache in TEMPLATE_CACHE_DIR (default
+instance/jinja_cache) the compiled code is written once and every worker
+loads it instead of compiling. Entries are keyed by template name and
+source checksum, so a deploy that changes a template simply misses the
+old entry. `flask warm-templates` fills the cache at deploy time, before
+the first requests arrive.
+
+Outside debug mode Flask already skips the per-render source mtime check
+(TEMPLATES_AUTO_RELOAD unset follows DEBUG); the setting is spelled out in
+config.py so production keeps it off explicitly.
+"""
+import os
+from jinja2 import FileSystemBytecodeCache, TemplateError
+
+
+def init_template_cache(app, lightweight=False):
+    """
+    Attach the bytecode cache to the app's Jinja environment
+
+    Must run before the environment is first used. Lightweight apps only
+    get a cache when TEMPLATE_CACHE_DIR is set explicitly.
+    """
+    directory = app.config.get('TEMPLATE_CACHE_DIR')
+    if not directory:
+        if lightweight:
+            return
+        directory = os.path.join(app.instance_path, 'jinja_cache')
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(directory)}
+
+
+def warm_templates(app):
+    """
+    Compile every HTML template into the bytecode cache
+
+    Returns:
+        tuple: (number compiled, list of (template name, error message))
+    """
+    env = app.jinja_env
+    compiled = 0
+    failures = []
+    for name in env.list_templates(extensions=['html']):
+        try:
+            env.get_template(name)
+        except TemplateError as e:
+            failures.append((name, str(e)))
+        else:
+            compiled += 1
+    return compiled, failures
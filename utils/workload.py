@@ -0,0 +1,155 @@
+"""
+Student workload queries
+
+Loads every assignment in a student's enrolled classes together with the
+student's own submission in a single outer-joined query, so views do not
+have to walk classes -> assignments -> submissions one query at a time.
+"""
+from datetime import datetime
+from sqlalchemy import and_, func
+from extensions import db
+from models.assignment import Assignment
+from models.class_model import Class, class_student
+from models.submission import Submission
+from utils.loaders import loader_options
+
+
+def get_assignment_status(assignment, submission, now=None):
+    """
+    Work out a student's status for an assignment
+
+    Args:
+        assignment: Assignment model instance
+        submission: The student's Submission for it, or None
+        now: Reference time (defaults to utcnow)
+
+    Returns:
+        str: 'graded', 'submitted', 'overdue' or 'pending'
+    """
+    if submission:
+        return 'graded' if submission.grade is not None else 'submitted'
+    now = now or datetime.utcnow()
+    if assignment.due_date and assignment.due_date < now:
+        return 'overdue'
+    return 'pending'
+
+
+class StudentWorkload:
+    """
+    A student's classes, assignments, submissions and per-class aggregates
+
+    Attributes:
+        classes: Enrolled classes (teacher profiles already loaded)
+        items: One dict per assignment with 'class', 'assignment',
+            'submission' and 'status' keys
+        class_stats: Class id -> dict with assignment_count, student_count,
+            submitted_count, pending_count and the list of grades
+    """
+
+    def __init__(self, student, rows, now=None):
+        self.student = student
+        self.now = now or datetime.utcnow()
+        self.classes = []
+        self.items = []
+        self.class_stats = {}
+
+        seen = set()
+        for cls, assignment, submission, student_count in rows:
+            if cls.id not in self.class_stats:
+                self.classes.append(cls)
+                self.class_stats[cls.id] = {
+                    'assignment_count': 0,
+                    'student_count': student_count or 0,
+                    'submitted_count': 0,
+                    'pending_count': 0,
+                    'grades': [],
+                }
+            if assignment is None or (cls.id, assignment.id) in seen:
+                continue
+            seen.add((cls.id, assignment.id))
+
+            stats = self.class_stats[cls.id]
+            stats['assignment_count'] += 1
+            if submission:
+                stats['submitted_count'] += 1
+                if submission.grade is not None:
+                    stats['grades'].append(submission.grade)
+                else:
+                    stats['pending_count'] += 1
+
+            self.items.append({
+                'class': cls,
+                'assignment': assignment,
+                'submission': submission,
+                'status': get_assignment_status(assignment, submission, self.now),
+            })
+
+    @property
+    def grades(self):
+        """All grades the student has received"""
+        return [item['submission'].grade for item in self.items
+                if item['submission'] and item['submission'].grade is not None]
+
+    @property
+    def average_grade(self):
+        """Average of all grades, or 0 when nothing is graded yet"""
+        grades = self.grades
+        return sum(grades) / len(grades) if grades else 0
+
+    @property
+    def submitted_count(self):
+        """Number of assignments with a submission"""
+        return sum(1 for item in self.items if item['submission'])
+
+    @property
+    def unsubmitted_count(self):
+        """Number of assignments without a submission"""
+        return sum(1 for item in self.items if not item['submission'])
+
+    @property
+    def pending_grade_count(self):
+        """Number of submissions still waiting for a grade"""
+        return sum(1 for item in self.items if item['status'] == 'submitted')
+
+    def class_average(self, class_id):
+        """Average grade in a class, or None when nothing is graded"""
+        grades = self.class_stats[class_id]['grades']
+        return sum(grades) / len(grades) if grades else None
+
+
+def get_student_workload(student):
+    """
+    Load a student's workload in a single query
+
+    Classes are inner-joined through enrollment, assignments and the
+    student's submissions are outer-joined so classes without assignments
+    and assignments without submissions are still returned.
+
+    Args:
+        student: Student model instance
+
+    Returns:
+        StudentWorkload: Workload for the student
+    """
+    student_count = (
+        db.session.query(func.count(class_student.c.student_id))
+        .filter(class_student.c.class_id == Class.id)
+        .correlate(Class)
+        .scalar_subquery()
+    )
+
+    rows = (
+        db.session.query(Class, Assignment, Submission, student_count)
+        .join(class_student, class_student.c.class_id == Class.id)
+        .outerjoin(Assignment, Assignment.class_id == Class.id)
+        .outerjoin(Submission, and_(
+            Submission.assignment_id == Assignment.id,
+            Submission.student_id == student.id
+        ))
+        .options(*loader_options('student_class_list'))
+        .filter(class_student.c.student_id == student.id)
+        .order_by(Class.id, Assignment.id, Submission.id)
+        .all()
+    )
+
+    return StudentWorkload(student, rows)